@@ -0,0 +1,244 @@
+import os
+import sys
+import tempfile
+
+# Everything runs offline against a private store of tiny stand-in models;
+# set before any models.* import so the global model_store picks it up
+BENCH_STORE_DIR = os.path.join(tempfile.gettempdir(), "hit137-ai-gui-bench-store")
+os.environ.setdefault("AI_GUI_MODEL_STORE", BENCH_STORE_DIR)
+os.environ["AI_GUI_MODEL_STORE_AUTOSAVE"] = "0"
+os.environ["HF_HUB_OFFLINE"] = "1"
+os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+import argparse
+import io
+import json
+import platform
+import resource
+import subprocess
+import time
+
+from benchmarks import standins
+from cli import run_batch
+from models.batching import percentile
+from models.model_store import model_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_summary(seconds):
+    ms = [s * 1000 for s in seconds]
+    return {"count": len(ms), "mean_ms": sum(ms) / len(ms) if ms else 0.0,
+            "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95), "p99_ms": percentile(ms, 99)}
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def cold_load(model_id, runs):
+    """load_model in a fresh interpreter: imports, weight mapping and page cache misses included"""
+    code = (
+        "import json, resource, sys, time\n"
+        "from benchmarks import standins\n"
+        f"model = standins.make_model({model_id!r})\n"
+        "start = time.perf_counter()\n"
+        "message = model.load_model()\n"
+        "seconds = time.perf_counter() - start\n"
+        "assert model._is_loaded, message\n"
+        "print(json.dumps({'seconds': seconds, 'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+    )
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [s["seconds"] for s in samples]
+    return {"runs": runs, "min_s": min(seconds), "mean_s": sum(seconds) / runs,
+            "peak_rss_mb": max(s["peak_rss_kb"] for s in samples) / 1024}
+
+
+def warm_load(model, runs):
+    """unload + load in this process (modules imported, files in the page cache)"""
+    seconds = []
+    for _ in range(runs):
+        model.unload_model()
+        message, elapsed = timed(model.load_model)
+        if not model._is_loaded:
+            raise RuntimeError(message)
+        seconds.append(elapsed)
+    return {"runs": runs, "min_s": min(seconds), "mean_s": sum(seconds) / runs}
+
+
+def sequential_latency(model, inputs):
+    """One request at a time, every request a cache miss"""
+    model.clear_cache()
+    return latency_summary([timed(model.process_input, value)[1] for value in inputs])
+
+
+def throughput_grid(model, inputs, batch_sizes, concurrencies):
+    """Requests per second through the CLI runner for each batch size x concurrency"""
+    cells = []
+    for batch_size in batch_sizes:
+        for concurrency in concurrencies:
+            model.clear_cache()
+            records = [(None, value) for value in inputs]
+            started = time.perf_counter()
+            counts = run_batch(model, records, io.StringIO(), concurrency=concurrency, batch_size=batch_size)
+            elapsed = time.perf_counter() - started
+            if hasattr(model, "disable_batching"):
+                model.disable_batching()
+            # run_batch raises concurrency to the batch size when micro-batching
+            cells.append({"batch_size": batch_size, "concurrency": counts["concurrency"], "items": counts["items"],
+                          "errors": counts["errors"], "seconds": elapsed,
+                          "items_per_second": counts["items"] / elapsed if elapsed else 0.0})
+    return cells
+
+
+def cache_impact(model, inputs, repeat_ratio=0.5):
+    """Miss vs hit latency, and a mixed workload where repeat_ratio of requests repeat earlier ones"""
+    model.clear_cache()
+    misses = [timed(model.process_input, value)[1] for value in inputs]
+    hits = [timed(model.process_input, value)[1] for value in inputs]
+
+    model.clear_cache()
+    unique = inputs[:max(1, int(len(inputs) * (1 - repeat_ratio)))]
+    workload = [unique[i % len(unique)] for i in range(len(inputs))]
+    before = model.cache_stats
+    _, mixed_seconds = timed(lambda: [model.process_input(value) for value in workload])
+    after = model.cache_stats
+    lookups = (after["hits"] - before["hits"]) + (after["misses"] - before["misses"])
+
+    miss, hit = latency_summary(misses), latency_summary(hits)
+    return {"miss": miss, "hit": hit,
+            "hit_speedup": miss["p50_ms"] / hit["p50_ms"] if hit["p50_ms"] else 0.0,
+            "mixed_workload": {"repeat_ratio": repeat_ratio, "requests": len(workload),
+                               "hit_rate": (after["hits"] - before["hits"]) / lookups if lookups else 0.0,
+                               "items_per_second": len(workload) / mixed_seconds if mixed_seconds else 0.0}}
+
+
+def assisted_generation(model, inputs, max_new_tokens=32):
+    """
+    Greedy tokens/sec with and without the stand-in draft model. The random stand-in
+    weights rarely agree, so this tracks the overhead of the assisted path; run
+    python -m models.text_generator with real weights to measure the actual gain.
+    """
+    from models.text_generator import compare_assisted
+
+    return compare_assisted(model, inputs, assistant=standins.TINY_DRAFT_ID, max_new_tokens=max_new_tokens)
+
+
+def benchmark_model(model_id, args, workdir):
+    model = standins.make_model(model_id)
+    inputs = standins.make_inputs(model_id, args.requests, workdir)
+    result = {"variant": standins.STANDIN_VARIANTS[model_id]["hf_id"]}
+
+    result["cold_load"] = cold_load(model_id, args.cold_runs)
+    message, first = timed(model.load_model)
+    if not model._is_loaded:
+        raise RuntimeError(message)
+    result["first_load_s"] = first
+    result["warm_load"] = warm_load(model, args.warm_runs)
+    # Warm-up request so lazy initialisation is not counted as latency
+    model.process_input(inputs[0])
+    result["latency"] = sequential_latency(model, inputs)
+    result["throughput"] = throughput_grid(model, inputs, args.batch_sizes, args.concurrency)
+    result["cache"] = cache_impact(model, inputs)
+    if hasattr(model, "enable_assisted_decoding"):
+        result["assisted_generation"] = assisted_generation(model, inputs[:8])
+    result["weights_mb"] = model.memory_footprint_mb()
+    result["peak_rss_mb"] = peak_rss_mb()
+    model.unload_model()
+    return result
+
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    for name in ("torch", "transformers"):
+        try:
+            info[name] = __import__(name).__version__
+        except ImportError:
+            info[name] = None
+    try:
+        import torch
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def flatten(value, prefix=""):
+    """Numeric leaves of a results document as {"a.b.0.c": number}"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((f"{entry.get('batch_size')}x{entry.get('concurrency')}" if isinstance(entry, dict)
+                  and "batch_size" in entry else str(i), entry) for i, entry in enumerate(value))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    else:
+        return {}
+    flat = {}
+    for key, child in items:
+        flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def compare(old_path, new_path):
+    """Print every metric of two result files with the new/old ratio"""
+    with open(old_path, encoding="utf-8") as f:
+        old = flatten(json.load(f)["models"])
+    with open(new_path, encoding="utf-8") as f:
+        new = flatten(json.load(f)["models"])
+    for key in sorted(set(old) & set(new)):
+        if key.endswith((".batch_size", ".concurrency")):
+            continue
+        ratio = new[key] / old[key] if old[key] else float("nan")
+        print(f"{key:60} {old[key]:12.3f} {new[key]:12.3f} {ratio:8.2f}x")
+
+
+def main(argv=None):
+    """python -m benchmarks.run [--models text-generation] [--output results.json]"""
+    parser = argparse.ArgumentParser(description="Offline benchmarks with tiny stand-in models")
+    parser.add_argument("--models", nargs="*", default=list(standins.STANDIN_VARIANTS))
+    parser.add_argument("--requests", type=int, default=32, help="distinct inputs per measurement")
+    parser.add_argument("--batch-sizes", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 8])
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4])
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--warm-runs", type=int, default=3)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    standins.prepare_store(model_store)
+    results = {"environment": environment(), "models": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for model_id in args.models:
+            print(f"Benchmarking {model_id}...", file=sys.stderr)
+            results["models"][model_id] = benchmark_model(model_id, args, workdir)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results["models"], indent=2))
+    print(f"Results saved to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
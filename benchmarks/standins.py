@@ -0,0 +1,115 @@
+import os
+import random
+
+# Tiny randomly initialised models with the same architectures as the real ones.
+# They are built locally and saved into a private model store, so the benchmark
+# exercises the real load_model/process_input code paths without any download.
+TINY_TEXT_ID = "bench/tiny-gpt2"
+TINY_VIT_ID = "bench/tiny-vit"
+# Smaller GPT-2 with the same tokenizer: the draft model for assisted decoding
+TINY_DRAFT_ID = "bench/tiny-gpt2-draft"
+
+STANDIN_VARIANTS = {
+    "text-generation": {"name": "Tiny GPT-2 (benchmark)", "hf_id": TINY_TEXT_ID, "memory_mb": 2},
+    "image-classification": {"name": "Tiny ViT (benchmark)", "hf_id": TINY_VIT_ID, "memory_mb": 1}
+}
+
+_WORDS = ("the model reads a prompt and writes a short reply about weather music code "
+          "images cats dogs trains coffee books rain sun night day city river").split()
+
+
+def _corpus(lines=400, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 12))) for _ in range(lines)]
+
+
+def _train_tokenizer():
+    """Byte-level BPE tokenizer trained in memory on the benchmark corpus"""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    backend = Tokenizer(models.BPE())
+    backend.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    backend.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=512, special_tokens=["<|endoftext|>"],
+                                  initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    backend.train_from_iterator(_corpus(), trainer)
+    return PreTrainedTokenizerFast(tokenizer_object=backend, eos_token="<|endoftext|>",
+                                   bos_token="<|endoftext|>", unk_token="<|endoftext|>")
+
+
+def _tiny_gpt2(tokenizer, n_embd, n_layer, n_head):
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(0)
+    eos_id = tokenizer.eos_token_id
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=256, n_embd=n_embd, n_layer=n_layer,
+                        n_head=n_head, bos_token_id=eos_id, eos_token_id=eos_id)
+    return GPT2LMHeadModel(config).eval()
+
+
+def build_tiny_text_generator(store):
+    """GPT-2 shaped causal LM (2 layers, 64 dims) with a byte-level BPE tokenizer trained in memory"""
+    tokenizer = _train_tokenizer()
+    return _tiny_gpt2(tokenizer, n_embd=64, n_layer=2, n_head=2), tokenizer
+
+
+def build_tiny_draft_generator(store):
+    """1 layer, 32 dims; reuses the stored text stand-in's tokenizer so token ids match"""
+    from transformers import AutoTokenizer
+
+    tokenizer = store.from_pretrained(AutoTokenizer, TINY_TEXT_ID)
+    return _tiny_gpt2(tokenizer, n_embd=32, n_layer=1, n_head=1), tokenizer
+
+
+def build_tiny_image_classifier(store):
+    """ViT shaped classifier on 32x32 inputs with ten labels"""
+    import torch
+    from transformers import ViTConfig, ViTForImageClassification, ViTImageProcessor
+
+    torch.manual_seed(0)
+    labels = {i: f"class_{i}" for i in range(10)}
+    config = ViTConfig(image_size=32, patch_size=8, hidden_size=32, num_hidden_layers=2,
+                       num_attention_heads=2, intermediate_size=64, num_labels=len(labels),
+                       id2label=labels, label2id={v: k for k, v in labels.items()})
+    processor = ViTImageProcessor(size={"height": 32, "width": 32})
+    return ViTForImageClassification(config).eval(), processor
+
+
+# Built in this order: the draft needs the text stand-in's tokenizer
+_BUILDERS = {TINY_TEXT_ID: build_tiny_text_generator, TINY_DRAFT_ID: build_tiny_draft_generator,
+             TINY_VIT_ID: build_tiny_image_classifier}
+
+
+def prepare_store(store):
+    """Build and save any stand-in that is not in the store yet"""
+    for hf_id, build in _BUILDERS.items():
+        if store.local_path(hf_id) is None:
+            store.save(hf_id, *build(store))
+    return store
+
+
+def make_model(model_id):
+    """Instance of the real AIModel class configured with the stand-in weights"""
+    from models.registry import registry
+
+    return registry.spec(model_id).load_class()(variant=STANDIN_VARIANTS[model_id])
+
+
+def make_inputs(model_id, count, directory, seed=0):
+    """count distinct inputs: prompts, or random-noise PNG files written to directory"""
+    rng = random.Random(seed)
+    if model_id == "text-generation":
+        return [f"{i}: " + " ".join(rng.choice(_WORDS) for _ in range(8)) for i in range(count)]
+
+    from PIL import Image
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"bench_{seed}_{i:04d}.png")
+        pixels = bytes(rng.getrandbits(8) for _ in range(48 * 48 * 3))
+        Image.frombytes("RGB", (48, 48), pixels).save(path)
+        paths.append(path)
+    return paths
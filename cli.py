@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from models.disk_cache import enable_disk_cache
+from models.registry import registry
+
+# Input of an object record with none of the input fields; written as an error line
+MISSING_INPUT = object()
+
+
+def read_records(stream):
+    """
+    Yield (id, input) pairs from JSONL. A line may be an object with an "input"
+    (or "prompt"/"text"/"path") field and optional "id", a JSON string, or plain text.
+    Objects without an input field yield MISSING_INPUT.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line
+        if isinstance(record, dict):
+            value = next((record[k] for k in ("input", "prompt", "text", "path") if k in record), MISSING_INPUT)
+            yield record.get("id"), value
+        else:
+            yield None, record if isinstance(record, str) else json.dumps(record)
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def make_runner(model, batch_size):
+    """
+    Return (unit_size, min_workers, run) where run(inputs) returns one result per
+    input. Models with a native batch API get whole batches; text generation gets
+    its micro-batcher, which only forms batches with min_workers units in flight.
+    """
+    if batch_size > 1 and hasattr(model, "classify_batch"):
+        def run(inputs):
+            return [result for batch in model.classify_batch(inputs, batch_size=len(inputs))
+                    for _, result in batch]
+        return batch_size, 1, run
+    if batch_size > 1 and hasattr(model, "enable_batching"):
+        model.enable_batching(max_batch_size=batch_size)
+        return 1, batch_size, lambda inputs: [model.process_input(inputs[0])]
+    return 1, 1, lambda inputs: [model.process_input(inputs[0])]
+
+
+def serialize(result, index, image_dir):
+    """JSON-friendly form of a model result (images are written to image_dir)"""
+    if hasattr(result, "to_dict"):
+        return {"output": result.to_dict()}
+    if hasattr(result, "save") and hasattr(result, "size"):
+        os.makedirs(image_dir, exist_ok=True)
+        path = os.path.join(image_dir, f"{index:06d}.png")
+        result.save(path)
+        return {"image": path}
+    text = str(result)
+    if text.startswith("Error") or text.startswith("Please load"):
+        return {"error": text}
+    return {"output": text}
+
+
+def run_batch(model, records, out, concurrency=1, batch_size=1, image_dir="cli_images"):
+    """Run records through the model, writing one JSON line per item as soon as it finishes"""
+    unit_size, min_workers, run = make_runner(model, batch_size)
+    # Fewer workers than the batch size would leave the micro-batcher waiting out max_wait alone
+    concurrency = max(concurrency, min_workers)
+    counts = {"items": 0, "errors": 0, "concurrency": concurrency}
+
+    def task(unit):
+        started = time.perf_counter()
+        # Records without an input never reach the model
+        values = [value for _, _, value in unit if value is not MISSING_INPUT]
+        try:
+            computed = iter(run(values) if values else [])
+        except Exception as e:
+            computed = iter([f"Error: {str(e)}"] * len(values))
+        results = [None if value is MISSING_INPUT else next(computed) for _, _, value in unit]
+        # Per item: a batch's time is shared by the items that ran in it
+        return unit, results, (time.perf_counter() - started) * 1000 / max(1, len(values))
+
+    def write(future):
+        unit, results, elapsed_ms = future.result()
+        for (index, item_id, value), result in zip(unit, results):
+            if value is MISSING_INPUT:
+                line = {"index": index, "id": item_id, "input": None, "error": "record has no input field"}
+                counts["items"] += 1
+                counts["errors"] += 1
+                out.write(json.dumps(line) + "\n")
+                continue
+            line = {"index": index, "id": item_id, "input": value}
+            line.update(serialize(result, index, image_dir))
+            line["elapsed_ms"] = round(elapsed_ms, 2)
+            if len(unit) > 1:
+                line["batch_size"] = len(unit)
+            counts["items"] += 1
+            counts["errors"] += "error" in line
+            out.write(json.dumps(line) + "\n")
+        out.flush()
+
+    indexed = ((index, item_id, value) for index, (item_id, value) in enumerate(records))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cli-worker") as pool:
+        pending = set()
+        for unit in chunked(indexed, unit_size):
+            # Bounded look-ahead so huge (or endless stdin) inputs stream
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future)
+            pending.add(pool.submit(task, unit))
+        for future in wait(pending).done:
+            write(future)
+    return counts
+
+
+def main(argv=None):
+    """Headless batch runner: python -m cli MODEL [-i prompts.jsonl] [-o results.jsonl]"""
+    parser = argparse.ArgumentParser(description="Run a file of prompts or image paths through a model")
+    parser.add_argument("model", nargs="?", help="display name or model_id (see --list)")
+    parser.add_argument("-i", "--input", help="JSONL input file (default: stdin)")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="worker threads")
+    parser.add_argument("-b", "--batch-size", type=int, default=1, help="items per forward pass")
+    parser.add_argument("--variant", help="model variant name or hf_id")
+    parser.add_argument("--backend", help="inference backend (default: the model's first)")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--image-dir", default="cli_images", help="where generated images are saved")
+    parser.add_argument("--assistant", help="draft model for assisted decoding (variant name, hf_id or auto)")
+    parser.add_argument("--max-new-tokens", type=int, help="text generation: reply length limit")
+    parser.add_argument("--temperature", type=float, help="text generation: sampling temperature")
+    parser.add_argument("--stop", action="append", default=None, metavar="TEXT",
+                        help="text generation: end the reply at TEXT (repeatable)")
+    parser.add_argument("--list", action="store_true", help="list available models and exit")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.model:
+        for spec in registry.specs():
+            print(f"{spec.model_id:24} {spec.name:24} backends: {', '.join(spec.backends)}")
+        return 0
+
+    model = registry.get(args.model, variant=args.variant)
+    if model is None:
+        parser.error(f"unknown model {args.model!r} (see --list)")
+
+    enable_disk_cache()
+    load_kwargs = {"num_threads": args.threads} if args.threads else {}
+    if args.backend:
+        load_kwargs["backend"] = args.backend
+    if args.assistant:
+        load_kwargs["assistant"] = args.assistant
+    settings = {"max_new_tokens": args.max_new_tokens, "temperature": args.temperature,
+                "stop_sequences": args.stop}
+    if any(value is not None for value in settings.values()) and not hasattr(model, "configure_generation"):
+        parser.error(f"{args.model} has no generation settings")
+    print(model.load_model(**load_kwargs), file=sys.stderr)
+    if not model._is_loaded:
+        return 2
+    if hasattr(model, "configure_generation"):
+        model.configure_generation(**settings)
+
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    try:
+        counts = run_batch(model, read_records(source), out, concurrency=max(1, args.concurrency),
+                           batch_size=max(1, args.batch_size), image_dir=args.image_dir)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    summary = dict(counts, seconds=round(elapsed, 3),
+                   items_per_second=round(counts["items"] / elapsed, 2) if elapsed else 0.0)
+    if getattr(model, "batching_stats", None):
+        summary["batching"] = model.batching_stats
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if counts["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,48 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from PIL import Image, ImageTk
+import inspect
 import os
 import traceback
+import logging
+import time
+from gui.task_runner import TaskRunner
+from gui.output_view import OutputView
+from gui.thumbnails import ThumbnailGallery, ThumbnailLoader
+from models.registry import registry
+from models.model_manager import ModelManager
+from models.instrumentation import instrumentation
 
 class MainWindow:
     """Main GUI window demonstrating OOP concepts"""
     
-    def __init__(self, root):
+    def __init__(self, root, started_at=None, warm_up=False, memory_budget_mb=None, model_registry=None):
         self.root = root
         self.root.title("AI Model GUI - HIT137 Assignment 3")
         self.root.geometry("1000x700")
         
         # Encapsulation: Private attributes
         self._current_model = None
-        self._models = {}
+        # A RemoteRegistry makes the window a thin client of server.py
+        self._registry = model_registry or registry
+        # Loads go through the manager so idle models can be unloaded to stay in budget
+        self._manager = ModelManager(budget_mb=memory_budget_mb)
+        self._tasks = TaskRunner(self.root)
+        # Separate pool so thumbnails never wait behind a long model job
+        self._thumbnails = ThumbnailLoader(self.root)
+        self._preview_job = None
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._warm_up = warm_up
+        self._chat_session = None
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         
         self._setup_oop_explanations()  # Must be called first
         self._setup_menu()
         self._setup_gui()
         self._load_models()  # Load models after GUI setup
         self._on_model_change(None)  # Initialize with default model
+        
+        # Runs once the first frame has been drawn
+        self.root.after_idle(self._on_first_paint)
     
     def _setup_menu(self):
         """Setup menu bar as shown in assignment example"""
@@ -31,12 +53,19 @@ class MainWindow:
             # File menu
             file_menu = tk.Menu(menubar, tearoff=0)
             menubar.add_cascade(label="File", menu=file_menu)
-            file_menu.add_command(label="Exit", command=self.root.quit)
+            file_menu.add_command(label="Save Output...", command=self._save_output)
+            file_menu.add_command(label="Exit", command=self._on_close)
             
             # Models menu
             models_menu = tk.Menu(menubar, tearoff=0)
             menubar.add_cascade(label="Models", menu=models_menu)
             models_menu.add_command(label="Load All Models", command=self._load_all_models)
+            models_menu.add_command(label="Unload Selected Model", command=self._unload_model)
+            models_menu.add_separator()
+            self.timings_enabled = tk.BooleanVar(value=instrumentation.enabled)
+            models_menu.add_checkbutton(label="Record Stage Timings", variable=self.timings_enabled,
+                                        command=self._toggle_timings)
+            models_menu.add_command(label="Export Timings...", command=self._export_timings)
             
             # Help menu
             help_menu = tk.Menu(menubar, tearoff=0)
@@ -46,26 +75,14 @@ class MainWindow:
             print(f"Menu setup error: {e}")
     
     def _load_models(self):
-        """Load models with proper error handling"""
+        """List the registered models; model modules are imported on first use"""
+        if hasattr(self, 'model_combo'):
+            self.model_combo['values'] = self._registry.names()
+    
+    def _get_model(self, model_name):
+        """Create (on first use) and return the model instance, or None if unavailable"""
         try:
-            # Try to import models with better error handling
-            from models.text_to_image import TextToImageModel
-            from models.text_generator import TextGeneratorModel
-            
-            self._models = {
-                "Text-to-Image": TextToImageModel(),
-                "Text Generation": TextGeneratorModel()
-            }
-            
-            # Update combobox values if it exists
-            if hasattr(self, 'model_var'):
-                children = self.root.winfo_children()
-                for child in children:
-                    if isinstance(child, ttk.Frame):
-                        for widget in child.winfo_children():
-                            if isinstance(widget, ttk.Combobox):
-                                widget['values'] = list(self._models.keys())
-            
+            return self._registry.get(model_name)
         except ImportError as e:
             error_msg = f"Failed to import models: {str(e)}\n\n"
             error_msg += "Please make sure:\n"
@@ -74,26 +91,87 @@ class MainWindow:
             error_msg += f"3. Error details: {traceback.format_exc()}"
             
             messagebox.showerror("Import Error", error_msg)
-            self._models = {}
+            return None
+    
+    def _on_first_paint(self):
+        """Report startup time and optionally start loading weights in the background"""
+        elapsed_ms = (time.perf_counter() - self._started_at) * 1000
+        logging.info(f"Startup to first paint: {elapsed_ms:.0f} ms")
+        print(f"Startup to first paint: {elapsed_ms:.0f} ms")
+        if hasattr(self, 'status_var'):
+            self.status_var.set(f"Ready (started in {elapsed_ms:.0f} ms)")
+        
+        if self._warm_up:
+            self._start_warm_up()
+        self._refresh_timings()
+    
+    def _start_warm_up(self):
+        """Load every model's weights on the worker pool after the window is visible"""
+        for model_name in self._registry.names():
+            model = self._get_model(model_name)
+            if model is None or getattr(model, '_is_loaded', False):
+                continue
+            self._tasks.submit(self._manager.ensure_loaded, model,
+                               on_done=lambda result, name=model_name: self._on_warm_up_done(name, result),
+                               on_error=lambda e, name=model_name: print(f"Warm-up of {name} failed: {e}"))
+        self._update_status()
+    
+    def _on_warm_up_done(self, model_name, result):
+        print(f"Warm-up {model_name}: {result}")
+        self._update_status()
+        if model_name == self.model_var.get():
+            self._on_model_change(None)
     
     def _load_all_models(self):
-        """Load all models at once"""
-        if not self._models:
+        """Load all models one after another on the worker pool"""
+        if not self._registry.names():
             messagebox.showerror("Error", "No models available to load")
             return
-            
-        results = []
-        for model_name, model in self._models.items():
+        
+        # Creating the instances only imports the model modules; the weights load in the background
+        models, results = [], []
+        for model_name in self._registry.names():
+            model = self._get_model(model_name)
+            if model is None:
+                results.append(f"{model_name}: ERROR - could not import model")
+            else:
+                models.append((model_name, model))
+        
+        self._tasks.submit(self._load_all_job, self._manager, models, results, with_job=True,
+                           on_progress=self._on_load_progress,
+                           on_done=self._on_load_all_done,
+                           on_error=self._on_load_error)
+        self._update_status()
+    
+    @staticmethod
+    def _load_all_job(job, manager, models, results):
+        """Worker thread: load each model in turn, reporting which one is loading"""
+        results = list(results)
+        for model_name, model in models:
+            if job.cancelled:
+                break
+            job.report(model_name)
             try:
-                result = model.load_model()
-                results.append(f"{model_name}: {result}")
-                print(f"{model_name}: {result}")
+                result = manager.ensure_loaded(model)
             except Exception as e:
-                results.append(f"{model_name}: ERROR - {str(e)}")
-        
+                result = f"ERROR - {str(e)}"
+            results.append(f"{model_name}: {result}")
+            print(f"{model_name}: {result}")
+        return results
+    
+    def _on_load_progress(self, model_name):
+        if hasattr(self, 'status_var'):
+            self.status_var.set(f"Loading {model_name}...")
+    
+    def _on_load_all_done(self, results):
+        self._update_status()
         messagebox.showinfo("Models Loaded", "\n".join(results))
         self._on_model_change(None)
     
+    def _on_load_error(self, error):
+        self._update_status()
+        messagebox.showerror("Load Error", f"Failed to load model: {str(error)}")
+    
     def _show_about(self):
         """Show about information"""
         about_text = """AI Model GUI - HIT137 Assignment 3
@@ -104,8 +182,9 @@ This application demonstrates:
 • Tkinter GUI development
 
 Models:
-• Text-to-Image: Stable Diffusion v1.5
-• Text Generation: DialoGPT Medium"""
+• Text-to-Image: Stable Diffusion v1.5 (local diffusers)
+• Text Generation: DialoGPT Medium
+• Image Classification: ViT Base Patch16-224"""
         messagebox.showinfo("About", about_text)
     
     def _setup_gui(self):
@@ -134,17 +213,29 @@ Models:
             ttk.Label(model_frame, text="Model Selection:").grid(row=0, column=0, sticky=tk.W)
             self.model_var = tk.StringVar(value="Text-to-Image")
             
-            # Get available models or use defaults
-            model_values = list(self._models.keys()) if self._models else ["Text-to-Image", "Text Generation"]
-            
-            model_combo = ttk.Combobox(model_frame, textvariable=self.model_var, 
-                                     values=model_values, state="readonly", width=20)
-            model_combo.grid(row=0, column=1, padx=(10, 0))
-            model_combo.bind('<<ComboboxSelected>>', self._on_model_change)
+            self.model_combo = ttk.Combobox(model_frame, textvariable=self.model_var, 
+                                     values=self._registry.names(), state="readonly", width=20)
+            self.model_combo.grid(row=0, column=1, padx=(10, 0))
+            self.model_combo.bind('<<ComboboxSelected>>', self._on_model_change)
             
             ttk.Button(model_frame, text="✔ Load Model", 
                       command=self._load_model).grid(row=0, column=2, padx=(10, 0))
             
+            # Inference backend and thread count used by the next load
+            ttk.Label(model_frame, text="Backend:").grid(row=0, column=3, padx=(15, 0))
+            self.backend_var = tk.StringVar(value="eager")
+            self.backend_combo = ttk.Combobox(model_frame, textvariable=self.backend_var,
+                                              values=["eager"], state="readonly", width=11)
+            self.backend_combo.grid(row=0, column=4, padx=(5, 0))
+            ttk.Label(model_frame, text="Threads:").grid(row=0, column=5, padx=(10, 0))
+            self.threads_var = tk.StringVar(value="")
+            ttk.Spinbox(model_frame, from_=1, to=64, textvariable=self.threads_var,
+                        width=4).grid(row=0, column=6, padx=(5, 0))
+            # Assisted decoding: a smaller variant drafts tokens for the loaded model to verify
+            self.assisted_var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(model_frame, text="Draft model",
+                            variable=self.assisted_var).grid(row=0, column=7, padx=(10, 0))
+            
             # Input and Output sections
             io_frame = ttk.Frame(main_frame)
             io_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
@@ -170,10 +261,40 @@ Models:
             ttk.Button(input_type_frame, text="Browse", 
                       command=self._browse_file).pack(side=tk.LEFT, padx=(10, 0))
             
+            # Multi-turn chat keeps DialoGPT's context between messages
+            self.chat_mode = tk.BooleanVar(value=False)
+            ttk.Checkbutton(input_type_frame, text="Chat mode", variable=self.chat_mode).pack(side=tk.LEFT, padx=(10, 0))
+            ttk.Button(input_type_frame, text="New Chat",
+                      command=self._new_chat).pack(side=tk.LEFT, padx=(5, 0))
+            
+            # Low resolution, few steps: quick drafts from the text-to-image model
+            self.preview_mode = tk.BooleanVar(value=False)
+            ttk.Checkbutton(input_type_frame, text="Fast preview",
+                            variable=self.preview_mode).pack(side=tk.LEFT, padx=(10, 0))
+            
             self.input_text = scrolledtext.ScrolledText(input_frame, height=12, width=45)
             self.input_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
             self.input_text.insert(1.0, "Enter your text here...")
             
+            # Text generation settings, applied to the next request
+            generation_frame = ttk.Frame(input_frame)
+            generation_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+            self.temperature_var = tk.StringVar(value="0.7")
+            self.ngram_var = tk.StringVar(value="3")
+            self.max_new_tokens_var = tk.StringVar(value="128")
+            self.stop_var = tk.StringVar(value="")
+            ttk.Label(generation_frame, text="Temp:").pack(side=tk.LEFT)
+            ttk.Spinbox(generation_frame, from_=0.1, to=2.0, increment=0.1, textvariable=self.temperature_var,
+                        width=4).pack(side=tk.LEFT, padx=(2, 6))
+            ttk.Label(generation_frame, text="No-repeat n-gram:").pack(side=tk.LEFT)
+            ttk.Spinbox(generation_frame, from_=0, to=10, textvariable=self.ngram_var,
+                        width=3).pack(side=tk.LEFT, padx=(2, 6))
+            ttk.Label(generation_frame, text="Max tokens:").pack(side=tk.LEFT)
+            ttk.Spinbox(generation_frame, from_=1, to=1024, textvariable=self.max_new_tokens_var,
+                        width=5).pack(side=tk.LEFT, padx=(2, 6))
+            ttk.Label(generation_frame, text="Stop (| separated):").pack(side=tk.LEFT)
+            ttk.Entry(generation_frame, textvariable=self.stop_var, width=10).pack(side=tk.LEFT, padx=(2, 0))
+            
             # Output section
             output_frame = ttk.LabelFrame(io_frame, text="Model Output Section", padding="10")
             output_frame.grid(row=0, column=1, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -183,21 +304,39 @@ Models:
             
             self.output_text = scrolledtext.ScrolledText(output_frame, height=12, width=45, state=tk.DISABLED)
             self.output_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+            # All writes go through the view: batched per frame, bounded line count
+            self.output_view = OutputView(self.output_text, max_lines=5000, fps=30)
             
             self.image_label = ttk.Label(output_frame, text="Image output will appear here")
             self.image_label.grid(row=1, column=0, pady=(10, 0))
             
+            # Every image result (and classified file) lands here; click to preview
+            self.gallery = ThumbnailGallery(output_frame, self._thumbnails, height=110,
+                                            on_select=self._show_preview)
+            self.gallery.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+            
             # Control buttons
             control_frame = ttk.Frame(main_frame)
             control_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
             
+            ttk.Button(control_frame, text="▶ Run Selected",
+                      command=lambda: self._run_model(self.model_var.get())).pack(side=tk.LEFT, padx=(0, 10))
             ttk.Button(control_frame, text="Run Model 1", 
                       command=lambda: self._run_model("Text-to-Image")).pack(side=tk.LEFT, padx=(0, 10))
             ttk.Button(control_frame, text="Run Model 2", 
                       command=lambda: self._run_model("Text Generation")).pack(side=tk.LEFT, padx=(0, 10))
+            ttk.Button(control_frame, text="Run Model 3",
+                      command=lambda: self._run_model("Image Classification")).pack(side=tk.LEFT, padx=(0, 10))
+            ttk.Button(control_frame, text="Classify Folder",
+                      command=self._classify_folder).pack(side=tk.LEFT, padx=(0, 10))
+            ttk.Button(control_frame, text="Cancel",
+                      command=self._cancel_jobs).pack(side=tk.LEFT, padx=(0, 10))
             ttk.Button(control_frame, text="Clear", 
                       command=self._clear_output).pack(side=tk.LEFT, padx=(0, 10))
             
+            self.status_var = tk.StringVar(value="Ready")
+            ttk.Label(control_frame, textvariable=self.status_var).pack(side=tk.RIGHT)
+            
             # Information section
             info_frame = ttk.LabelFrame(main_frame, text="Model Information & Explanation", padding="10")
             info_frame.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -226,6 +365,7 @@ Models:
             if filename:
                 self.input_text.delete(1.0, tk.END)
                 self.input_text.insert(1.0, filename)
+                self._show_preview(filename)
         except Exception as e:
             messagebox.showerror("File Error", f"Failed to browse file: {str(e)}")
     
@@ -244,6 +384,11 @@ Models:
             self.model_info_text = scrolledtext.ScrolledText(model_info_frame, height=8, width=45)
             self.model_info_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
             
+            # Live per-stage timings, refreshed while recording is on
+            self.timings_var = tk.StringVar(value="")
+            ttk.Label(model_info_frame, textvariable=self.timings_var, justify=tk.LEFT,
+                      font=('Courier', 8)).grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+            
             # OOP explanations
             oop_frame = ttk.Frame(parent)
             oop_frame.grid(row=0, column=1, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -312,26 +457,93 @@ Models:
         """Handle model selection change"""
         try:
             model_name = self.model_var.get()
-            self._current_model = self._models.get(model_name)
+            spec = self._registry.spec(model_name)
+            # Only look at instances that already exist; selecting a model must not import it
+            self._current_model = self._registry.get(model_name) if self._registry.is_created(model_name) else None
             
             if not self._current_model:
-                # Show default info if model not available
+                # Show registry metadata until the model is created
                 info_text = f"• Model Name: {model_name}\n"
-                info_text += f"• Category: {'Text-to-Image' if 'Image' in model_name else 'Text Generation'}\n"
+                info_text += f"• Category: {spec.category if spec else model_name}\n"
+                if spec:
+                    info_text += f"• Short Description: {spec.description}\n"
                 info_text += f"• Status: Not Loaded\n\n"
-                info_text += "Please load the model first"
+                info_text += "Please load the model first\n"
             else:
                 # Update model info
                 info = self._current_model.model_info
                 info_text = f"• Model Name: {info['name']}\n"
                 info_text += f"• Category: {info['category']}\n"
                 info_text += f"• Short Description: {info['description']}\n"
-                info_text += f"• Status: {'Loaded' if info['loaded'] else 'Not Loaded'}\n\n"
-                info_text += f"Hugging Face Model:\n"
-                if model_name == "Text-to-Image":
-                    info_text += "runwayml/stable-diffusion-v1-5"
-                else:
-                    info_text += "microsoft/DialoGPT-medium"
+                info_text += f"• Status: {'Loaded' if info['loaded'] else 'Not Loaded'}\n"
+                if 'cache' in info:
+                    cache = info['cache']
+                    info_text += (f"• Cache: {cache['entries']} entries, {cache['bytes'] // 1024} KB, "
+                                  f"{cache['hits']} hits ({cache['disk_hits']} from disk) / {cache['misses']} misses / "
+                                  f"{cache['evictions']} evictions\n")
+                if info.get('timings'):
+                    for stage, timing in info['timings']['stages'].items():
+                        info_text += (f"• Stage {stage}: {timing['count']}x, mean {timing['mean_ms']:.1f} ms, "
+                                      f"p95 {timing['p95_ms']:.1f} ms\n")
+                if info.get('single_flight', {}).get('shared'):
+                    flights = info['single_flight']
+                    info_text += (f"• Deduplicated: {flights['shared']} request(s) shared "
+                                  f"{flights['leaders']} computation(s)\n")
+                if 'process' in info:
+                    process = info['process']
+                    state = f"pid {process['pid']}" if process['alive'] else "not running"
+                    if process.get('rss_mb') is not None:
+                        state += f", {process['rss_mb']:.0f} MB RSS"
+                    info_text += f"• Worker process: {state}, {process['restarts']} restart(s)"
+                    if process['last_exit'] is not None:
+                        info_text += f" (last exit code {process['last_exit']})"
+                    info_text += "\n"
+                if 'generation' in info:
+                    generation = info['generation']
+                    info_text += f"• Generation: up to {generation['max_new_tokens']} new tokens"
+                    if generation['replies']:
+                        info_text += (f", {generation['tokens_per_s']:.1f} tok/s over {generation['replies']} "
+                                      f"replies (last {generation['last_tokens_per_s']:.1f} tok/s)")
+                    if generation['assistant']:
+                        info_text += f", draft {generation['assistant']}"
+                    info_text += "\n"
+                if 'batching' in info:
+                    batching = info['batching']
+                    info_text += (f"• Batching: {batching['requests']} requests in {batching['batches']} batches, "
+                                  f"{batching['throughput_rps']:.2f} req/s, p95 {batching['latency_p95_ms']:.0f} ms\n")
+            
+            if self._current_model and 'backend_report' in info:
+                report = info['backend_report']
+                info_text += (f"• Backend: {report['backend']} ({report['speedup']:.2f}x vs fp32, "
+                              f"max diff {report['max_abs_diff']:.4f}, "
+                              f"top-1 agreement {report['top1_agreement']:.0%})\n")
+            
+            memory = self._manager.stats()
+            budget = f"{memory['budget_mb']} MB" if memory['budget_mb'] else "unlimited"
+            info_text += f"• Memory: {memory['used_mb']:.0f} MB of {budget} budget used by models"
+            if memory['process_rss_mb'] is not None:
+                info_text += f" (process RSS {memory['process_rss_mb']:.0f} MB)"
+            info_text += "\n"
+            if self._current_model:
+                for entry in memory['models']:
+                    if entry['name'] == str(self._current_model):
+                        info_text += f"• This model: {entry['memory_mb']:.0f} MB resident\n"
+            for event in list(self._manager.events)[-3:]:
+                info_text += f"  {event}\n"
+            
+            if spec:
+                info_text += f"• Input: {spec.input_type}, Hardware: {spec.hardware}, ~{spec.memory_mb} MB\n"
+                if hasattr(self, 'backend_combo'):
+                    self.backend_combo['values'] = spec.backends
+                    if self.backend_var.get() not in spec.backends:
+                        self.backend_var.set(spec.backends[0])
+                # Follow the input type the model declares
+                if hasattr(self, 'input_type'):
+                    self.input_type.set(spec.input_type)
+            
+            hf_id = getattr(self._current_model, '_hf_id', None) or (spec.hf_id if spec else None)
+            if hf_id:
+                info_text += f"\nHugging Face Model:\n{hf_id}"
             
             if hasattr(self, 'model_info_text'):
                 self.model_info_text.config(state=tk.NORMAL)
@@ -345,27 +557,75 @@ Models:
     def _load_model(self):
         """Load the selected model"""
         try:
+            self._current_model = self._get_model(self.model_var.get())
             if not self._current_model:
                 messagebox.showerror("Error", "Please select a model first")
                 return
                 
-            result = self._current_model.load_model()
-            messagebox.showinfo("Model Load", result)
-            self._on_model_change(None)
+            backend = self.backend_var.get() if hasattr(self, 'backend_var') else "eager"
+            threads = self.threads_var.get().strip() if hasattr(self, 'threads_var') else ""
+            if backend not in self._current_model.backends:
+                messagebox.showerror("Error", f"Backend '{backend}' is not supported by this model")
+                return
+            # Always explicit, so switching back to the defaults (or turning the draft model off) reloads
+            load_kwargs = {"backend": backend, "num_threads": int(threads) if threads else None}
+            if self._accepts_load_option(self.model_var.get(), "assistant"):
+                load_kwargs["assistant"] = "auto" if self.assisted_var.get() else None
+            # Loading can take minutes; it runs on the worker pool so the window stays responsive
+            model_name = self.model_var.get()
+            self._tasks.submit(self._manager.ensure_loaded, self._current_model,
+                               on_done=self._on_load_done,
+                               on_error=self._on_load_error, **load_kwargs)
+            self._update_status()
+            self._on_load_progress(model_name)
             
         except Exception as e:
-            messagebox.showerror("Load Error", f"Failed to load model: {str(e)}")
+            self._on_load_error(e)
+    
+    def _on_load_done(self, result):
+        self._update_status()
+        messagebox.showinfo("Model Load", result)
+        self._on_model_change(None)
+    
+    def _accepts_load_option(self, model_name, option):
+        """Whether the model class's load_model() takes option (checked on the class, so proxies work too)"""
+        spec = self._registry.spec(model_name)
+        try:
+            return spec is not None and option in inspect.signature(spec.load_class().load_model).parameters
+        except (ImportError, AttributeError):
+            return False
+    
+    def _generation_settings(self):
+        """Sampling settings from the input panel (raises ValueError for bad values)"""
+        stop = tuple(part.replace("\\n", "\n") for part in self.stop_var.get().split("|") if part)
+        return {"temperature": float(self.temperature_var.get()),
+                "no_repeat_ngram_size": int(self.ngram_var.get()),
+                "max_new_tokens": int(self.max_new_tokens_var.get()),
+                "stop_sequences": stop}
+    
+    def _unload_model(self):
+        """Release the selected model's weights"""
+        model_name = self.model_var.get()
+        if not self._registry.is_created(model_name):
+            messagebox.showinfo("Unload Model", f"{model_name} is not loaded")
+            return
+        messagebox.showinfo("Unload Model", self._manager.unload(self._get_model(model_name)))
+        self._on_model_change(None)
+    
+    def _is_available(self, model):
+        """Loaded now, or loaded before and evicted (the manager reloads it on use)"""
+        return getattr(model, '_is_loaded', False) or self._manager.was_loaded(model)
     
     def _run_model(self, model_name):
         """Run specified model"""
         try:
-            model = self._models.get(model_name)
+            model = self._get_model(model_name)
             
             if not model:
                 messagebox.showerror("Error", f"Model '{model_name}' not available")
                 return
                 
-            if not getattr(model, '_is_loaded', False):
+            if not self._is_available(model):
                 messagebox.showerror("Error", f"Please load {model_name} model first")
                 return
             
@@ -375,55 +635,302 @@ Models:
                 messagebox.showerror("Error", "Please provide input data")
                 return
             
-            # Show processing message
-            if hasattr(self, 'output_text'):
-                self.output_text.config(state=tk.NORMAL)
-                self.output_text.delete(1.0, tk.END)
-                self.output_text.insert(1.0, "Processing... Please wait.")
-                self.output_text.config(state=tk.DISABLED)
-                self.root.update()
+            settings = None
+            if hasattr(model, 'configure_generation'):
+                try:
+                    settings = self._generation_settings()
+                except ValueError as e:
+                    messagebox.showerror("Error", f"Invalid generation setting: {str(e)}")
+                    return
+            
+            # Inference runs on the worker pool so the Tk loop keeps redrawing
+            if self.chat_mode.get():
+                if hasattr(model, 'create_session'):
+                    self._send_chat_message(model, input_data, settings)
+                    return
+                # e.g. models served by another process over HTTP: say so instead of silently dropping history
+                self.chat_mode.set(False)
+                messagebox.showinfo("Chat mode", f"{model_name} cannot keep a conversation here; "
+                                                 f"the message is sent on its own.")
+            
+            self._set_output_text("Processing... Please wait.")
+            if hasattr(model, 'generate_image'):
+                # Per-step progress from the diffusion loop
+                self._tasks.submit(self._image_job, self._manager, model, input_data,
+                                   self.preview_mode.get(), with_job=True,
+                                   on_progress=self._on_image_progress,
+                                   on_done=lambda result: self._on_job_done(result, model_name),
+                                   on_error=lambda e: self._on_job_error(e, model_name))
+            elif hasattr(model, 'stream_input'):
+                # Show tokens as they arrive instead of waiting for the whole reply
+                stream_state = {"started": False}
+                self._tasks.submit(self._stream_job, self._manager, model, input_data, settings, with_job=True,
+                                   on_progress=lambda piece: self._on_stream_piece(piece, stream_state),
+                                   on_done=lambda result: self._on_job_done(None, model_name),
+                                   on_error=lambda e: self._on_job_error(e, model_name))
+            else:
+                self._tasks.submit(self._manager.run, model, input_data,
+                                   on_done=lambda result: self._on_job_done(result, model_name),
+                                   on_error=lambda e: self._on_job_error(e, model_name))
+            self._update_status()
             
-            # Process input
-            result = model.process_input(input_data)
-            self._display_result(result, model_name)
+        except Exception as e:
+            self._on_job_error(e, model_name)
+    
+    def _classify_folder(self):
+        """Classify every image in a folder in batches, streaming results into the output"""
+        try:
+            model = self._get_model("Image Classification")
+            if not model:
+                messagebox.showerror("Error", "Model 'Image Classification' not available")
+                return
+            if not self._is_available(model):
+                messagebox.showerror("Error", "Please load Image Classification model first")
+                return
+            if not hasattr(model, 'classify_batch'):
+                messagebox.showerror("Error", "Folder classification needs the model to run locally")
+                return
+            
+            folder = filedialog.askdirectory(title="Select Image Folder")
+            if not folder:
+                return
+            paths = model.list_images(folder)
+            if not paths:
+                messagebox.showinfo("Classify Folder", "No image files found in that folder")
+                return
+            
+            self._set_output_text(f"Classifying {len(paths)} images...\n\n")
+            self._tasks.submit(self._classify_folder_job, self._manager, model, paths, with_job=True,
+                               on_progress=self._append_batch_results,
+                               on_done=lambda count: self._append_output_text(f"Done: {count} images classified.\n"),
+                               on_error=lambda e: self._on_job_error(e, "Image Classification"))
+            self._update_status()
             
         except Exception as e:
-            error_msg = f"Error running {model_name}: {str(e)}"
-            if hasattr(self, 'output_text'):
-                self.output_text.config(state=tk.NORMAL)
-                self.output_text.delete(1.0, tk.END)
-                self.output_text.insert(1.0, error_msg)
-                self.output_text.config(state=tk.DISABLED)
-            messagebox.showerror("Runtime Error", error_msg)
+            messagebox.showerror("Folder Error", f"Failed to classify folder: {str(e)}")
+    
+    @staticmethod
+    def _classify_folder_job(job, manager, model, paths):
+        """Worker-thread loop: report each finished batch, stop early if cancelled"""
+        count = 0
+        with manager.use(model):
+            for batch in model.classify_batch(paths):
+                if job.cancelled:
+                    break
+                count += len(batch)
+                job.report(batch)
+        return count
+    
+    def _append_batch_results(self, batch):
+        """Append one batch of (path, top-5 result) pairs to the output"""
+        lines = [f"{os.path.basename(path)}\n{result}\n" for path, result in batch]
+        self._append_output_text("\n".join(lines) + "\n")
+        if hasattr(self, 'gallery'):
+            for path, result in batch:
+                self.gallery.add(path, caption=result.labels[0] if hasattr(result, 'labels') else "")
+    
+    def _show_preview(self, source):
+        """Show an image file or PIL image in the image panel; decoding happens off the Tk thread"""
+        if not hasattr(self, 'image_label'):
+            return
+        # Only the latest request may update the panel
+        self._cancel_preview()
+        self.image_label.configure(text="Loading preview...")
+        
+        def show(photo):
+            self._preview_job = None
+            self.image_label.configure(image=photo, text="")
+            self.image_label.image = photo
+        
+        self._preview_job = self._thumbnails.request(
+            source, (300, 300), show,
+            on_error=lambda e: self.image_label.configure(image='', text=f"No preview: {e}"))
+    
+    def _cancel_preview(self):
+        if self._preview_job is not None:
+            self._thumbnails.cancel(self._preview_job)
+            self._preview_job = None
+    
+    def _append_output_text(self, text):
+        """Append to the end of the output box"""
+        if hasattr(self, 'output_view'):
+            self.output_view.append(text)
+    
+    def _send_chat_message(self, model, message, settings=None):
+        """Send one chat turn on the worker pool and append the exchange to the output"""
+        if self._chat_session is None:
+            self._set_output_text("")
+        self._append_output_text(f"You: {message}\n")
+        self.input_text.delete(1.0, tk.END)
+        # One lane for chat: turns share a session (and its KV cache) and must run in order
+        self._tasks.submit(self._chat_job, model, message, settings, lane="chat",
+                           on_done=self._on_chat_reply,
+                           on_error=lambda e: self._on_job_error(e, "Text Generation"))
+        self._update_status()
+    
+    def _chat_job(self, model, message, settings=None):
+        """Chat lane: (re)create the session if needed and send one turn"""
+        with self._manager.use(model):
+            # Settings belong to this conversation, not to the shared model
+            session_settings = {key: value for key, value in (settings or {}).items() if key != "stop_sequences"}
+            session = self._chat_session
+            # A session from before an unload (or a worker restart) is stale; start over
+            if session is None or not model.session_is_current(session):
+                session = self._chat_session = model.create_session(**session_settings)
+            elif settings:
+                # Keep the history; later turns use the new settings
+                session.temperature = settings["temperature"]
+                session.no_repeat_ngram_size = settings["no_repeat_ngram_size"]
+                session.max_new_tokens = settings["max_new_tokens"]
+            reply = session.send(message)
+            # Read here: for a hosted session every attribute is a round trip to its worker
+            latencies = session.turn_latencies
+            return reply, latencies[-1] if latencies else 0, session.history_length
+    
+    def _on_chat_reply(self, result):
+        reply, latency, context_tokens = result
+        self._append_output_text(f"Bot: {reply}\n   ({latency * 1000:.0f} ms, {context_tokens} context tokens)\n\n")
+        self._update_status()
+    
+    def _new_chat(self):
+        """Forget the conversation history"""
+        self._chat_session = None
+        self._clear_output()
+    
+    @staticmethod
+    def _image_job(job, manager, model, prompt, preview):
+        """Worker thread: run the diffusion pipeline, reporting each denoising step"""
+        with manager.use(model):
+            return model.generate_image(prompt, preview=preview,
+                                        progress_callback=lambda step, total: job.report((step, total)),
+                                        should_stop=lambda: job.cancelled)
+    
+    def _on_image_progress(self, progress):
+        step, total = progress
+        self._set_output_text(f"Generating image... step {step}/{total}")
+        if hasattr(self, 'status_var'):
+            self.status_var.set(f"Denoising {step}/{total}")
+    
+    @staticmethod
+    def _stream_job(job, manager, model, input_data, settings=None):
+        """Worker-thread loop: forward each streamed piece to the Tk thread"""
+        with manager.use(model):
+            # Settings go with this call; changing the shared model would affect other jobs
+            for piece in model.stream_input(input_data, should_stop=lambda: job.cancelled, **(settings or {})):
+                job.report(piece)
+    
+    def _on_stream_piece(self, piece, stream_state):
+        """Replace the 'Processing...' message with the first piece, then append"""
+        if not stream_state["started"]:
+            stream_state["started"] = True
+            self._clear_output()
+        self._append_output_text(piece)
+    
+    def _on_job_done(self, result, model_name):
+        """Called on the Tk thread when a background job finishes"""
+        if result is not None:
+            self._display_result(result, model_name)
+        self._update_status()
+        # Loads/evictions may have happened in the background
+        self._on_model_change(None)
+    
+    def _on_job_error(self, error, model_name):
+        """Called on the Tk thread when a background job raises"""
+        error_msg = f"Error running {model_name}: {str(error)}"
+        self._set_output_text(error_msg)
+        self._update_status()
+        messagebox.showerror("Runtime Error", error_msg)
+    
+    def _cancel_jobs(self):
+        """Cancel queued and in-flight model jobs"""
+        cancelled = self._tasks.cancel_all()
+        if cancelled:
+            self._set_output_text(f"Cancelled {cancelled} job(s).")
+        self._update_status()
+    
+    def _toggle_timings(self):
+        """Start or stop recording per-stage timings"""
+        if self.timings_enabled.get():
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        self._refresh_timings(reschedule=False)
+    
+    def _refresh_timings(self, reschedule=True):
+        """Show the selected model's stage timings; reschedules itself once a second"""
+        if hasattr(self, 'timings_var'):
+            model = self._registry.get(self.model_var.get()) if self._registry.is_created(self.model_var.get()) else None
+            if not instrumentation.enabled:
+                self.timings_var.set("")
+            elif model is None:
+                self.timings_var.set("Timings: model not created yet")
+            else:
+                stages = instrumentation.summary(model.instrument_label)["stages"]
+                lines = [f"{stage:<16}{t['count']:>6}x  p50 {t['p50_ms']:8.1f} ms  p95 {t['p95_ms']:8.1f} ms"
+                         for stage, t in stages.items()]
+                self.timings_var.set("\n".join(lines) if lines else "Timings: no calls recorded yet")
+        if reschedule:
+            self.root.after(1000, self._refresh_timings)
+    
+    def _export_timings(self):
+        """Save all recorded timings in Prometheus text format"""
+        path = filedialog.asksaveasfilename(title="Export Timings", defaultextension=".prom",
+                                            filetypes=[("Prometheus text", "*.prom"), ("All files", "*.*")])
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(instrumentation.prometheus_text())
+            messagebox.showinfo("Export Timings", f"Timings saved to {path}")
+    
+    def _update_status(self):
+        """Show how many jobs are still pending"""
+        if hasattr(self, 'status_var'):
+            pending = self._tasks.pending_count
+            self.status_var.set(f"{pending} job(s) running" if pending else "Ready")
+    
+    def _set_output_text(self, text):
+        """Replace the contents of the output box"""
+        if hasattr(self, 'output_view'):
+            self.output_view.set_text(text)
+    
+    def _save_output(self):
+        """Save the full output history, including lines scrolled out of the view"""
+        path = filedialog.asksaveasfilename(title="Save Output", defaultextension=".txt",
+                                            filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            self.output_view.save(path)
+            messagebox.showinfo("Save Output", f"Output saved to {path}")
+    
+    def _on_close(self):
+        """Stop background workers before destroying the window"""
+        self._tasks.shutdown()
+        self._thumbnails.shutdown()
+        if hasattr(self._registry, 'shutdown'):
+            # Worker processes of isolated models
+            self._registry.shutdown()
+        if hasattr(self, 'output_view'):
+            self.output_view.close()
+        self.root.destroy()
     
     def _display_result(self, result, model_name):
         """Display model result"""
         try:
-            if not hasattr(self, 'output_text'):
+            if not hasattr(self, 'output_view'):
                 return
-                
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.delete(1.0, tk.END)
             
             if model_name == "Text-to-Image" and hasattr(result, 'save'):
-                # Display image
+                # Display image (resized on the thumbnail pool, not the Tk thread)
                 try:
-                    display_size = (300, 300)
-                    result.thumbnail(display_size, Image.Resampling.LANCZOS)
-                    photo = ImageTk.PhotoImage(result)
-                    self.image_label.configure(image=photo)
-                    self.image_label.image = photo
-                    self.output_text.insert(1.0, "Image generated successfully!\n\n")
-                    self.output_text.insert(tk.END, f"Image size: {result.size}")
+                    self._show_preview(result)
+                    self.gallery.add(result, caption=f"{result.size[0]}x{result.size[1]}")
+                    self._set_output_text(f"Image generated successfully!\n\nImage size: {result.size}")
                 except Exception as e:
-                    self.output_text.insert(1.0, f"Error displaying image: {str(e)}")
+                    self._set_output_text(f"Error displaying image: {str(e)}")
             else:
                 # Display text result
+                self._cancel_preview()
                 self.image_label.configure(image='')
                 self.image_label.configure(text="Image output will appear here")
-                self.output_text.insert(1.0, str(result))
-            
-            self.output_text.config(state=tk.DISABLED)
+                self._set_output_text(str(result))
             
         except Exception as e:
             print(f"Display result error: {e}")
@@ -431,14 +938,16 @@ Models:
     def _clear_output(self):
         """Clear output section"""
         try:
-            if hasattr(self, 'output_text'):
-                self.output_text.config(state=tk.NORMAL)
-                self.output_text.delete(1.0, tk.END)
-                self.output_text.config(state=tk.DISABLED)
+            if hasattr(self, 'output_view'):
+                self.output_view.clear()
             
             if hasattr(self, 'image_label'):
+                self._cancel_preview()
                 self.image_label.configure(image='')
                 self.image_label.configure(text="Image output will appear here")
+            
+            if hasattr(self, 'gallery'):
+                self.gallery.clear()
                 
         except Exception as e:
             print(f"Clear output error: {e}")
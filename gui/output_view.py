@@ -0,0 +1,109 @@
+import os
+import tempfile
+import tkinter as tk
+
+
+class OutputView:
+    """
+    Incremental front end for a read-only Text widget.
+    - append()/set_text() only queue text; the widget is updated at most fps
+      times a second, so per-token or per-batch callbacks cost one insert per frame
+    - at most max_lines lines stay in the widget; older lines are spilled to a
+      temporary file, and save() writes the full history back out
+    - the view keeps following new output only while it is scrolled to the bottom
+    """
+
+    def __init__(self, widget, max_lines=5000, fps=30, spill_dir=None):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.interval_ms = max(1, int(1000 / fps))
+        self.spill_dir = spill_dir
+        self.spill_path = None
+        self.spilled_lines = 0
+        self.flushes = 0
+        self._pending = []
+        self._replace = False
+        self._scheduled = None
+
+    def append(self, text):
+        """Queue text for the end of the view"""
+        if text:
+            self._pending.append(text)
+            self._schedule()
+
+    def set_text(self, text):
+        """Replace everything (including spilled history) with text on the next frame"""
+        self._pending = [text] if text else []
+        self._replace = True
+        self._schedule()
+
+    def clear(self):
+        self.set_text("")
+
+    def _schedule(self):
+        if self._scheduled is None:
+            self._scheduled = self.widget.after(self.interval_ms, self.flush)
+
+    def flush(self):
+        """Apply queued changes to the widget now (normally called by the frame timer)"""
+        if self._scheduled is not None:
+            self.widget.after_cancel(self._scheduled)
+            self._scheduled = None
+        if not self._pending and not self._replace:
+            return
+
+        follow = not self._replace and self.widget.yview()[1] >= 0.999
+        self.widget.config(state=tk.NORMAL)
+        if self._replace:
+            self.widget.delete("1.0", tk.END)
+            self._discard_spill()
+            self._replace = False
+        if self._pending:
+            self.widget.insert(tk.END, "".join(self._pending))
+            self._pending = []
+        self._trim()
+        self.widget.config(state=tk.DISABLED)
+        if follow:
+            self.widget.see(tk.END)
+        self.flushes += 1
+
+    def _trim(self):
+        """Move lines beyond max_lines from the top of the widget into the spill file"""
+        line_count = int(self.widget.index("end-1c").split(".")[0])
+        excess = line_count - self.max_lines
+        if excess <= 0:
+            return
+        cut = f"{excess + 1}.0"
+        if self.spill_path is None:
+            handle, self.spill_path = tempfile.mkstemp(prefix="ai-gui-output-", suffix=".txt", dir=self.spill_dir)
+            os.close(handle)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write(self.widget.get("1.0", cut))
+        self.widget.delete("1.0", cut)
+        self.spilled_lines += excess
+
+    def _discard_spill(self):
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+        self.spill_path = None
+        self.spilled_lines = 0
+
+    def save(self, path):
+        """Write the whole output, spilled lines included, to path"""
+        self.flush()
+        with open(path, "w", encoding="utf-8") as out:
+            if self.spill_path is not None:
+                with open(self.spill_path, encoding="utf-8") as spilled:
+                    for chunk in iter(lambda: spilled.read(1 << 16), ""):
+                        out.write(chunk)
+            out.write(self.widget.get("1.0", "end-1c"))
+
+    def close(self):
+        """Cancel the frame timer and remove the spill file"""
+        if self._scheduled is not None:
+            self.widget.after_cancel(self._scheduled)
+            self._scheduled = None
+        self._discard_spill()
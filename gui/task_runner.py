@@ -0,0 +1,156 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """Handle for a background job (Encapsulation: state is only changed through methods)"""
+
+    def __init__(self, job_id, runner):
+        self.job_id = job_id
+        self._runner = runner
+        self._cancelled = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Mark the job as cancelled; queued jobs never start, running jobs have their result dropped"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def report(self, value):
+        """Send a progress value back to the Tk thread (safe to call from the worker)"""
+        if not self.cancelled:
+            self._runner._results.put(("progress", self.job_id, value))
+
+
+class TaskRunner:
+    """
+    Runs model work on a worker pool and marshals results back to Tk.
+    Tk widgets must only be touched from the main loop, so workers push
+    messages onto a thread-safe queue which is drained with root.after.
+    Jobs submitted with a lane name run one at a time, in submission order,
+    on that lane's own thread.
+    """
+
+    def __init__(self, root, max_workers=2, poll_interval_ms=50):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="model-worker")
+        self._lanes = {}
+        self._results = queue.Queue()
+        self._jobs = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._poll_interval_ms = poll_interval_ms
+        self._closed = False
+        self.root.after(self._poll_interval_ms, self._poll)
+
+    @property
+    def pending_count(self):
+        """Number of jobs that are queued or still running"""
+        with self._lock:
+            return len(self._jobs)
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None,
+               with_job=False, lane=None, **kwargs):
+        """Queue func(*args, **kwargs) on the pool and return its Job handle.
+
+        Callbacks are always invoked on the Tk thread. When with_job is True the
+        Job is passed as the first argument so the worker can report progress or
+        check for cancellation. Jobs sharing a lane never overlap.
+        """
+        if self._closed:
+            raise RuntimeError("Task runner has been shut down")
+
+        with self._lock:
+            self._next_id += 1
+            job = Job(self._next_id, self)
+            self._jobs[job.job_id] = job
+            self._callbacks[job.job_id] = (on_done, on_error, on_progress)
+            executor = self._executor if lane is None else self._lane(lane)
+
+        call_args = (job,) + args if with_job else args
+        job.future = executor.submit(self._run, job, func, call_args, kwargs)
+        return job
+
+    def _lane(self, name):
+        """Single-worker executor for name (called with _lock held)"""
+        if name not in self._lanes:
+            self._lanes[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"model-{name}")
+        return self._lanes[name]
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled:
+            self._results.put(("cancelled", job.job_id, None))
+            return
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._results.put(("error", job.job_id, e))
+        else:
+            self._results.put(("done", job.job_id, result))
+
+    def cancel(self, job):
+        """Cancel a single job and stop tracking it; any late result is ignored"""
+        job.cancel()
+        with self._lock:
+            self._jobs.pop(job.job_id, None)
+            self._callbacks.pop(job.job_id, None)
+
+    def cancel_all(self):
+        """Cancel every queued or in-flight job and return how many were cancelled"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self.cancel(job)
+        return len(jobs)
+
+    def _poll(self):
+        """Drain the result queue on the Tk thread and dispatch callbacks"""
+        try:
+            while True:
+                kind, job_id, value = self._results.get_nowait()
+                self._dispatch(kind, job_id, value)
+        except queue.Empty:
+            pass
+
+        if not self._closed:
+            self.root.after(self._poll_interval_ms, self._poll)
+
+    def _dispatch(self, kind, job_id, value):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            callbacks = self._callbacks.get(job_id)
+            if kind != "progress":
+                self._jobs.pop(job_id, None)
+                self._callbacks.pop(job_id, None)
+
+        if job is None or callbacks is None or job.cancelled:
+            return
+
+        on_done, on_error, on_progress = callbacks
+        try:
+            if kind == "progress" and on_progress:
+                on_progress(value)
+            elif kind == "done" and on_done:
+                on_done(value)
+            elif kind == "error" and on_error:
+                on_error(value)
+        except Exception as e:
+            print(f"Task callback error: {e}")
+
+    def shutdown(self):
+        """Stop polling and drop any work that has not started yet"""
+        self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            lanes = list(self._lanes.values())
+        for lane in lanes:
+            lane.shutdown(wait=False, cancel_futures=True)
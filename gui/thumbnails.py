@@ -0,0 +1,217 @@
+import hashlib
+import math
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+from gui.task_runner import TaskRunner
+from models.file_hash import content_hash
+
+
+def thumbnail_key(source, size):
+    """Content hash of the file (or of the image pixels) plus the target size"""
+    if isinstance(source, str):
+        digest = content_hash(source)
+    else:
+        digest = hashlib.blake2b(source.tobytes(), digest_size=20).hexdigest() + f"{source.mode}{source.size}"
+    return digest, tuple(size)
+
+
+def decode_thumbnail(source, size):
+    """Worker-thread step: decode (at reduced size for JPEGs) and shrink to fit size"""
+    from PIL import Image
+
+    if isinstance(source, str):
+        with Image.open(source) as image:
+            # JPEG only: the decoder produces a 1/2, 1/4 or 1/8 scale image directly
+            image.draft("RGB", size)
+            thumb = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    else:
+        # Never resize the caller's image in place; it may be a cached result
+        thumb = source.copy()
+    thumb.thumbnail(size, Image.Resampling.LANCZOS)
+    return thumb
+
+
+class ThumbnailLoader:
+    """
+    Makes Tk PhotoImages for image files or PIL images without blocking the Tk loop.
+    Hashing, decoding and resizing run on a small worker pool; only the PhotoImage
+    (which must be created on the Tk thread) is built on the main loop. Ready
+    PhotoImages are kept in an LRU keyed by content hash and size.
+    """
+
+    def __init__(self, root, max_photos=256, workers=2):
+        self._tasks = TaskRunner(root, max_workers=workers)
+        self._photos = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_photos = max_photos
+        self.hits = 0
+        self.misses = 0
+
+    def _prepare(self, source, size):
+        key = thumbnail_key(source, size)
+        with self._lock:
+            if key in self._photos:
+                return key, None
+        return key, decode_thumbnail(source, size)
+
+    def request(self, source, size, callback, on_error=None):
+        """Call callback(photo) on the Tk thread once the thumbnail is ready; returns the Job"""
+        def done(result):
+            key, image = result
+            with self._lock:
+                photo = self._photos.get(key)
+                if photo is not None:
+                    self._photos.move_to_end(key)
+            if photo is None:
+                if image is None:
+                    # Evicted between the check and now: decode it again
+                    self.request(source, size, callback, on_error)
+                    return
+                from PIL import ImageTk
+                photo = ImageTk.PhotoImage(image)
+                self._store(key, photo)
+                self.misses += 1
+            else:
+                self.hits += 1
+            callback(photo)
+
+        return self._tasks.submit(self._prepare, source, size, on_done=done,
+                                  on_error=on_error or (lambda e: print(f"Thumbnail error: {e}")))
+
+    def _store(self, key, photo):
+        with self._lock:
+            self._photos[key] = photo
+            while len(self._photos) > self.max_photos:
+                self._photos.popitem(last=False)
+
+    def cancel(self, job):
+        self._tasks.cancel(job)
+
+    def shutdown(self):
+        self._tasks.shutdown()
+
+
+class ThumbnailGallery(ttk.Frame):
+    """
+    Scrollable grid of image thumbnails. Items are only (source, caption) until
+    they scroll into view: canvas items and PhotoImages exist for the visible rows
+    (plus one row of margin), and rows that leave the view are released.
+    """
+
+    def __init__(self, parent, loader, thumb_size=(96, 96), height=130, on_select=None):
+        super().__init__(parent)
+        self.loader = loader
+        self.thumb_size = thumb_size
+        self.cell_width = thumb_size[0] + 12
+        self.cell_height = thumb_size[1] + 24
+        self.on_select = on_select
+        self.columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(self, height=height, highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+
+        self._items = []
+        self._materialized = {}
+        self._columns = 0
+        self._refresh_pending = False
+
+        self.canvas.bind("<Configure>", lambda event: self._schedule_refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self._on_scroll("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self._on_scroll("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self._on_scroll("scroll", 1, "units"))
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def materialized_count(self):
+        """Thumbnails that currently have canvas items (the rest are just list entries)"""
+        return len(self._materialized)
+
+    def add(self, source, caption=""):
+        """Append an image file path or PIL image to the gallery"""
+        self._items.append((source, caption))
+        self._schedule_refresh()
+
+    def clear(self):
+        for index in list(self._materialized):
+            self._release(index)
+        self._items = []
+        self.canvas.configure(scrollregion=(0, 0, 0, 0))
+        self.canvas.yview_moveto(0)
+
+    def _on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh)
+
+    def _refresh(self):
+        """Materialize the rows in view and release the rest"""
+        self._refresh_pending = False
+        columns = max(1, self.canvas.winfo_width() // self.cell_width)
+        if columns != self._columns:
+            # Every cell moves when the column count changes
+            for index in list(self._materialized):
+                self._release(index)
+            self._columns = columns
+
+        rows = math.ceil(len(self._items) / columns)
+        self.canvas.configure(scrollregion=(0, 0, columns * self.cell_width, rows * self.cell_height))
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // self.cell_height) - 1) * columns
+        last = min(len(self._items), (int(bottom // self.cell_height) + 2) * columns)
+
+        for index in list(self._materialized):
+            if not first <= index < last:
+                self._release(index)
+        for index in range(first, last):
+            if index not in self._materialized:
+                self._materialize(index, columns)
+
+    def _cell_origin(self, index, columns):
+        return (index % columns) * self.cell_width + self.cell_width // 2, (index // columns) * self.cell_height + 4
+
+    def _materialize(self, index, columns):
+        source, caption = self._items[index]
+        x, y = self._cell_origin(index, columns)
+        width, height = self.thumb_size
+        entry = {"ids": [self.canvas.create_rectangle(x - width // 2, y, x + width // 2, y + height,
+                                                      outline="#cccccc"),
+                         self.canvas.create_text(x, y + height + 10, text=caption[:18], font=('Arial', 8))],
+                 "photo": None, "job": None}
+        self._materialized[index] = entry
+        entry["job"] = self.loader.request(source, self.thumb_size,
+                                           lambda photo: self._show(index, entry, photo, x, y + height // 2))
+
+    def _show(self, index, entry, photo, x, y):
+        if self._materialized.get(index) is not entry:
+            return  # scrolled away before the thumbnail was ready
+        entry["photo"] = photo  # keeps the image alive even if the LRU drops it
+        entry["job"] = None
+        entry["ids"].append(self.canvas.create_image(x, y, image=photo))
+
+    def _release(self, index):
+        entry = self._materialized.pop(index)
+        if entry["job"] is not None:
+            self.loader.cancel(entry["job"])
+        self.canvas.delete(*entry["ids"])
+
+    def _on_click(self, event):
+        if not self.on_select or not self._columns:
+            return
+        column = int(self.canvas.canvasx(event.x) // self.cell_width)
+        index = int(self.canvas.canvasy(event.y) // self.cell_height) * self._columns + column
+        if column < self._columns and 0 <= index < len(self._items):
+            self.on_select(self._items[index][0])
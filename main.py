@@ -1,10 +1,46 @@
+import time
+STARTED_AT = time.perf_counter()  # Measured before the GUI modules are imported
+
+import argparse
 import tkinter as tk
 from gui.main_window import MainWindow
+from models.disk_cache import enable_disk_cache
 
 def main():
     """Main function to run the Tkinter AI GUI application"""
+    parser = argparse.ArgumentParser(description="Tkinter AI GUI")
+    parser.add_argument("--warm-up", action="store_true",
+                        help="load model weights in the background once the window is shown")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="unload least recently used models above this much memory "
+                             "(default: 70%% of available RAM, 0 = no limit)")
+    parser.add_argument("--server", metavar="URL", default=None,
+                        help="use models hosted by server.py (e.g. http://127.0.0.1:8765) "
+                             "instead of loading them in this process")
+    parser.add_argument("--isolate", action="store_true",
+                        help="run each model in its own worker process (restarted if it crashes)")
+    parser.add_argument("--timings", action="store_true",
+                        help="record per-stage timings and log each stage as a JSON line")
+    args = parser.parse_args()
+    
+    if args.timings:
+        import logging
+        from models.instrumentation import instrumentation
+        logging.basicConfig(level=logging.INFO)
+        instrumentation.enable(log_stages=True)
+    
+    # Results from earlier sessions are reused (set AI_GUI_DISK_CACHE=off to disable)
+    enable_disk_cache()
+    model_registry = None
+    if args.server:
+        from models.remote_model import RemoteRegistry
+        model_registry = RemoteRegistry(args.server)
+    elif args.isolate:
+        from models.process_host import ProcessRegistry
+        model_registry = ProcessRegistry()
     root = tk.Tk()
-    app = MainWindow(root)
+    app = MainWindow(root, started_at=STARTED_AT, warm_up=args.warm_up,
+                     memory_budget_mb=args.memory_budget, model_registry=model_registry)
     root.mainloop()
 
 if __name__ == "__main__":
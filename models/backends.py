@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+# eager: plain fp32 PyTorch; int8: dynamic quantization of Linear layers;
+# compile: torch.compile; torchscript: torch.jit.trace; onnx: ONNX Runtime
+BACKENDS = ("eager", "int8", "compile", "torchscript", "onnx")
+
+
+def set_num_threads(num_threads):
+    """Set PyTorch's intra-op thread count (process-wide); None leaves the default"""
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(int(num_threads))
+    return torch.get_num_threads()
+
+
+def _conv1d_to_linear(model):
+    """
+    GPT-2 style models use transformers' Conv1D instead of nn.Linear, which
+    dynamic quantization does not touch. Swap them for equivalent Linear layers.
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for name, module in list(model.named_children()):
+        if isinstance(module, Conv1D):
+            in_features, out_features = module.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = module.weight.data.t().contiguous()
+            linear.bias.data = module.bias.data
+            setattr(model, name, linear)
+        else:
+            _conv1d_to_linear(module)
+    return model
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations fp32)"""
+    import torch
+
+    model = _conv1d_to_linear(model)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def compile_model(model):
+    """torch.compile the forward pass; keeps the HF model object (config, generate) intact"""
+    import torch
+
+    model.forward = torch.compile(model.forward)
+    return model
+
+
+class LogitsModule:
+    """
+    Callable stand-in for a Hugging Face classifier whose forward pass has been
+    replaced (TorchScript or ONNX). Returns an object with .logits like the original.
+    """
+
+    def __init__(self, forward_fn, config):
+        self._forward_fn = forward_fn
+        self.config = config
+
+    def __call__(self, pixel_values=None, **kwargs):
+        return SimpleNamespace(logits=self._forward_fn(pixel_values))
+
+    def eval(self):
+        return self
+
+
+def torchscript_classifier(model, example_inputs):
+    """Trace an image classifier to TorchScript"""
+    import torch
+
+    model.config.return_dict = False
+    traced = torch.jit.trace(model, example_inputs, strict=False)
+    traced = torch.jit.freeze(traced.eval())
+    return LogitsModule(lambda pixel_values: traced(pixel_values)[0], model.config)
+
+
+def onnx_classifier(model, example_inputs, num_threads=None, path=None):
+    """Export an image classifier to ONNX and run it with ONNX Runtime"""
+    import torch
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("The onnx backend needs onnxruntime: pip install onnx onnxruntime")
+
+    path = path or os.path.join(tempfile.gettempdir(), f"{model.config.model_type}-classifier.onnx")
+    torch.onnx.export(model, (example_inputs,), path,
+                      input_names=["pixel_values"], output_names=["logits"],
+                      dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+                      opset_version=17)
+
+    options = onnxruntime.SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = int(num_threads)
+    session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def forward(pixel_values):
+        outputs = session.run(["logits"], {"pixel_values": pixel_values.numpy()})
+        return torch.from_numpy(outputs[0])
+
+    return LogitsModule(forward, model.config)
+
+
+def _time_ms(fn, runs):
+    fn()  # warm-up (compilation, allocator)
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return (time.perf_counter() - started) * 1000 / runs, result
+
+
+def compare_to_baseline(baseline_fn, candidate_fn, runs=5):
+    """
+    Accuracy and speed of a backend against the fp32 baseline.
+    Both functions take no arguments and return a logits tensor for the same inputs.
+    """
+    import torch
+
+    with torch.no_grad():
+        baseline_ms, baseline = _time_ms(baseline_fn, runs)
+        candidate_ms, candidate = _time_ms(candidate_fn, runs)
+    baseline = baseline.float()
+    candidate = candidate.float()
+    return {
+        "max_abs_diff": float((baseline - candidate).abs().max()),
+        "top1_agreement": float((baseline.argmax(-1) == candidate.argmax(-1)).float().mean()),
+        "baseline_ms": baseline_ms,
+        "backend_ms": candidate_ms,
+        "speedup": baseline_ms / candidate_ms if candidate_ms else 0.0
+    }
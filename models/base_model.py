@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+import gc
+import inspect
 import logging
 from functools import wraps
+from models.cache import shared_cache
+from models.instrumentation import instrumentation
+from models.single_flight import SingleFlight
 
 def handle_model_errors(func):
     """Decorator for error handling in model methods"""
@@ -10,15 +15,61 @@ def handle_model_errors(func):
             return func(*args, **kwargs)
         except Exception as e:
             logging.error(f"Error in {func.__name__}: {str(e)}")
+            if args and isinstance(args[0], AIModel):
+                instrumentation.count(args[0].instrument_label, "errors")
             return f"Error: {str(e)}"
     return wrapper
 
+def single_flight(name, method):
+    """Wrap a model method so concurrent identical calls share one computation"""
+    streaming = inspect.isgeneratorfunction(method)
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = self._single_flight_key(name, args, kwargs)
+        if key is None:
+            return method(self, *args, **kwargs)
+        # Callbacks belong to each caller; the shared call gets versions combining all of them
+        callbacks = {k: v for k, v in kwargs.items() if callable(v)}
+        others = {k: v for k, v in kwargs.items() if k not in callbacks}
+        call = lambda **shared: method(self, *args, **others, **shared)
+        if streaming:
+            return self._flights.stream(key, call, callbacks)
+        return self._flights.do(key, call, callbacks)
+    wrapper._single_flight = True
+    return wrapper
+
 class AIModel(ABC):
     """
     Abstract base class for AI models demonstrating OOP concepts
     Encapsulation: Private attributes with property getters
     """
     
+    # Registry metadata: subclasses override these with plain literals so the
+    # registry can read them from the source without importing the module
+    model_id = None
+    display_name = None
+    category = ""
+    description = ""
+    input_type = "text"      # "text" or "image"
+    hardware = "cpu"         # "cpu", "gpu" or "network"
+    variants = []            # best first: {"name", "hf_id", "memory_mb"}
+    backends = ["eager"]     # inference backends load_model(backend=...) accepts
+    
+    # Single-flight: concurrent calls of these methods with the same normalized
+    # input and settings wait for one shared computation
+    single_flight_methods = ("process_input",)
+    normalize_whitespace = True   # collapse runs of whitespace, strip the ends
+    normalize_case = False        # treat inputs that differ only in case as identical
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.single_flight_methods:
+            method = cls.__dict__.get(name)
+            if (method is not None and not getattr(method, "_single_flight", False)
+                    and not getattr(method, "__isabstractmethod__", False)):
+                setattr(cls, name, single_flight(name, method))
+    
     def __init__(self, model_name, category, description):
         # Encapsulation: Protected attributes
         self._model_name = model_name
@@ -26,18 +77,61 @@ class AIModel(ABC):
         self._description = description
         self._model = None
         self._is_loaded = False
+        self._flights = SingleFlight()
     
     # Multiple decorators example
     @property
     @handle_model_errors
     def model_info(self):
         """Property getter for model information (Encapsulation)"""
-        return {
+        info = {
             "name": self._model_name,
             "category": self._category,
             "description": self._description,
             "loaded": self._is_loaded
         }
+        if isinstance(self, ModelCacheMixin):
+            info["cache"] = self.cache_stats
+        info["single_flight"] = self._flights.stats()
+        if instrumentation.enabled:
+            info["timings"] = instrumentation.summary(self.instrument_label)
+        info.update(self._extra_info())
+        return info
+    
+    def _extra_info(self):
+        """Hook for subclasses to add runtime figures to model_info"""
+        return {}
+    
+    def normalize_input(self, input_data):
+        """Input as used in the single-flight key (override for non-text inputs)"""
+        if not isinstance(input_data, str):
+            return input_data
+        if self.normalize_whitespace:
+            input_data = " ".join(input_data.split())
+        if self.normalize_case:
+            input_data = input_data.lower()
+        return input_data
+    
+    def _single_flight_settings(self):
+        """Model state that changes the output for the same input"""
+        params = getattr(self, "generation_params", None)
+        return (tuple(sorted(params.items())) if isinstance(params, dict) else None,
+                getattr(self, "backend", None))
+    
+    def _single_flight_key(self, method_name, args, kwargs):
+        """(method, normalized input, other arguments, settings), or None if the call cannot be keyed"""
+        if not args or any(callable(arg) for arg in args):
+            return None  # positional callbacks cannot be told apart from inputs
+        # Callbacks differ per caller but do not change the result; only their names are keyed
+        extra_kwargs = tuple(sorted((k, v) for k, v in kwargs.items() if not callable(v)))
+        callbacks = tuple(sorted(k for k, v in kwargs.items() if callable(v)))
+        key = (method_name, self.normalize_input(args[0]), args[1:], extra_kwargs, callbacks,
+               self._single_flight_settings())
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
     
     @abstractmethod
     def load_model(self):
@@ -50,6 +144,67 @@ class AIModel(ABC):
         """Abstract method for processing input (Polymorphism)"""
         pass
     
+    @property
+    def instrument_label(self):
+        """Name this model's stage timings are recorded under"""
+        return self.model_id or type(self).__name__
+    
+    def stage(self, name):
+        """Time a block as one stage of this model: with self.stage("forward"): ..."""
+        return instrumentation.stage(self.instrument_label, name)
+    
+    def unload_model(self):
+        """Release the weights so the memory can be reused; load_model() brings them back"""
+        self._model = None
+        self._is_loaded = False
+        gc.collect()
+        return f"{self._model_name} unloaded"
+    
+    def _torch_modules(self):
+        """Loaded torch modules, used to measure resident weights (override in subclasses)"""
+        return []
+    
+    def memory_footprint_mb(self):
+        """Size of the loaded weights in MB, or 0 if unknown (e.g. TorchScript/ONNX backends)"""
+        seen = set()
+        total = 0
+        
+        def add(value):
+            nonlocal total
+            if isinstance(value, (tuple, list)):
+                for item in value:
+                    add(item)
+            elif hasattr(value, "element_size") and hasattr(value, "nelement"):
+                # Quantized weights report their storage through the same API
+                key = (value.data_ptr(), value.nelement())
+                if key not in seen:
+                    seen.add(key)
+                    total += value.element_size() * value.nelement()
+        
+        for module in self._torch_modules():
+            if hasattr(module, "state_dict"):
+                for value in module.state_dict().values():
+                    add(value)
+        return total / (1024 * 1024)
+    
+    def estimated_memory_mb(self, **load_kwargs):
+        """Declared footprint of this instance's variant for a load with load_kwargs"""
+        hf_id = getattr(self, "_hf_id", None)
+        for variant in self.variants:
+            if variant.get("hf_id") == hf_id:
+                return variant.get("memory_mb", 0)
+        return self.variants[0].get("memory_mb", 0) if self.variants else 0
+    
+    @classmethod
+    def resolve_variant(cls, variant=None):
+        """Return the variant dict for a name/hf_id/dict, defaulting to the first (largest) one"""
+        if isinstance(variant, dict):
+            return variant
+        for candidate in cls.variants:
+            if variant is None or variant in (candidate.get("name"), candidate.get("hf_id")):
+                return candidate
+        raise ValueError(f"Unknown variant {variant!r} for {cls.__name__}")
+    
     def __str__(self):
         return f"{self._model_name} ({self._category})"
 
@@ -59,12 +214,41 @@ class ModelCacheMixin:
     Multiple Inheritance: This will be inherited by model classes
     """
     
-    def __init__(self):
-        self._cache = {}
+    def __init__(self, cache=None, namespace=None):
+        # All models share one bounded cache by default, separated by namespace
+        self._cache = cache if cache is not None else shared_cache
+        self._cache_base_namespace = namespace or f"{type(self).__name__}:{getattr(self, '_model_name', '')}"
+        self._cache_namespace = self._cache_base_namespace
         super().__init__()
     
-    def cache_result(self, key, result):
-        self._cache[key] = result
+    def set_cache_variant(self, **load_options):
+        """Key results by how the weights were loaded, so e.g. int8 and fp32 results never mix"""
+        tag = ",".join(f"{name}={value}" for name, value in sorted(load_options.items()) if value is not None)
+        self._cache_namespace = f"{self._cache_base_namespace}|{tag}" if tag else self._cache_base_namespace
+    
+    def _make_cache_key(self, key, params):
+        """Normalized input plus generation params, so different settings never collide"""
+        if isinstance(key, str):
+            key = key.strip()
+        if not params:
+            return key
+        return (key, tuple(sorted(params.items())))
+    
+    def cache_result(self, key, result, **params):
+        self._cache.put(self._cache_namespace, self._make_cache_key(key, params), result)
     
-    def get_cached_result(self, key):
-        return self._cache.get(key)
\ No newline at end of file
+    def get_cached_result(self, key, **params):
+        label = getattr(self, "instrument_label", type(self).__name__)
+        with instrumentation.stage(label, "cache_lookup"):
+            result = self._cache.get(self._cache_namespace, self._make_cache_key(key, params))
+        instrumentation.count(label, "cache_hits" if result is not None else "cache_misses")
+        return result
+    
+    def clear_cache(self):
+        """Drop every cached result for this model"""
+        self._cache.invalidate(self._cache_namespace)
+    
+    @property
+    def cache_stats(self):
+        """Hit/miss/eviction counters for this model's namespace"""
+        return self._cache.stats(self._cache_namespace)
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 if empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for a short window and runs them as one batch.
+    batch_fn receives a list of inputs and must return a list of results in the
+    same order. A batch is dispatched when max_batch_size requests are waiting or
+    max_wait_ms has passed since the first one arrived.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=20, name="micro-batcher"):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()    # no item can be queued behind the close sentinel
+        self._sentinel_seen = False
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=2000)
+        self._batch_sizes = deque(maxlen=2000)
+        self._completed = 0
+        self._first_request_at = None
+        self._worker = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Queue one input and return a Future for its result"""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Batcher has been closed")
+            now = time.perf_counter()
+            with self._stats_lock:
+                if self._first_request_at is None:
+                    self._first_request_at = now
+            self._queue.put((item, future, now))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Blocking helper: submit and wait for the result"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            self._sentinel_seen = True
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._sentinel_seen = True
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        try:
+            while not self._sentinel_seen:
+                batch = self._collect()
+                if batch is not None:
+                    self._run(batch)
+        finally:
+            self._fail_remaining()
+
+    def _fail_remaining(self):
+        """Anything still queued once the worker stops would otherwise wait forever"""
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not None and entry[1].set_running_or_notify_cancel():
+                entry[1].set_exception(RuntimeError("Batcher has been closed"))
+
+    def _run(self, batch):
+        """Worker thread: run one batch and resolve its futures"""
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self._batch_fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch function returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self._batch_sizes.append(len(batch))
+            self._completed += len(batch)
+            for _, _, submitted in batch:
+                self._latencies.append(finished - submitted)
+
+    def stats(self):
+        """Throughput and latency figures for reporting"""
+        with self._stats_lock:
+            latencies_ms = [value * 1000 for value in self._latencies]
+            sizes = list(self._batch_sizes)
+            elapsed = time.perf_counter() - self._first_request_at if self._first_request_at else 0.0
+            return {
+                "requests": self._completed,
+                "batches": len(sizes),
+                "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+                "throughput_rps": self._completed / elapsed if elapsed else 0.0,
+                "latency_p50_ms": percentile(latencies_ms, 50),
+                "latency_p95_ms": percentile(latencies_ms, 95),
+                "latency_p99_ms": percentile(latencies_ms, 99),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms
+            }
+
+    def close(self):
+        """Finish queued requests, then stop the worker thread"""
+        with self._close_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
@@ -0,0 +1,206 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Rough number of bytes a cached value keeps alive"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    # PIL images: width * height * bands
+    if hasattr(value, "getbands") and hasattr(value, "size"):
+        width, height = value.size
+        return width * height * len(value.getbands())
+    # NumPy arrays and torch tensors
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_size(vars(value))
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value, size, expires_at):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with optional TTL, bounded by entry count and bytes.
+    Entries live in per-model namespaces so one instance can be shared by all models.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=128 * 1024 * 1024, ttl_seconds=None):
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._total_bytes = 0
+        self._last_purge = time.monotonic()
+        self._stats = {}
+        self._disk = None
+        self.configure(max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    def configure(self, max_entries=None, max_bytes=None, ttl_seconds=None):
+        """Change the limits; pass 0 to disable a limit. Shrinking evicts immediately."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds or None
+            elif not hasattr(self, "ttl_seconds"):
+                self.ttl_seconds = None
+            self._enforce_limits()
+
+    def attach_disk(self, disk):
+        """Add a persistent second tier (e.g. DiskCache); memory misses fall through to it"""
+        self._disk = disk
+
+    @property
+    def disk(self):
+        return self._disk
+
+    def _counters(self, namespace):
+        if namespace not in self._stats:
+            self._stats[namespace] = {"hits": 0, "misses": 0, "evictions": 0,
+                                      "disk_hits": 0, "entries": 0, "bytes": 0}
+        return self._stats[namespace]
+
+    def get(self, namespace, key, default=None):
+        """Return a cached value and mark it most recently used"""
+        with self._lock:
+            counters = self._counters(namespace)
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove((namespace, key), evicted=True)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end((namespace, key))
+                counters["hits"] += 1
+                return entry.value
+
+        value = None
+        if self._disk is not None:
+            try:
+                value = self._disk.get(namespace, key)
+            except Exception as e:
+                # A broken disk tier costs a miss, never the inference
+                logging.warning(f"Disk cache read failed: {str(e)}")
+        with self._lock:
+            if value is None:
+                counters["misses"] += 1
+                return default
+            counters["hits"] += 1
+            counters["disk_hits"] += 1
+        # Promote to memory without writing it back to disk
+        self._put_memory(namespace, key, value)
+        return value
+
+    def put(self, namespace, key, value):
+        """Store a value, evicting least recently used entries if limits are exceeded"""
+        stored = self._put_memory(namespace, key, value)
+        if self._disk is not None:
+            try:
+                self._disk.put(namespace, key, value)
+            except Exception as e:
+                logging.warning(f"Disk cache write failed: {str(e)}")
+        return stored
+
+    def _put_memory(self, namespace, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if self.max_bytes and size > self.max_bytes:
+                # Would evict everything else and still not fit
+                return False
+            if (namespace, key) in self._entries:
+                self._remove((namespace, key))
+            expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+            self._entries[(namespace, key)] = _Entry(value, size, expires_at)
+            self._total_bytes += size
+            counters = self._counters(namespace)
+            counters["entries"] += 1
+            counters["bytes"] += size
+            self._purge_expired()
+            self._enforce_limits()
+            return True
+
+    def invalidate(self, namespace=None, key=None):
+        """Drop one key, one namespace, or everything (in memory and on disk)"""
+        with self._lock:
+            if key is not None:
+                if (namespace, key) in self._entries:
+                    self._remove((namespace, key))
+            else:
+                for full_key in list(self._entries):
+                    if namespace is None or full_key[0] == namespace:
+                        self._remove(full_key)
+        if self._disk is not None:
+            if key is not None:
+                self._disk.delete(namespace, key)
+            else:
+                self._disk.clear(namespace)
+
+    def stats(self, namespace=None):
+        """Hit/miss/eviction counters for a namespace, or totals across all of them"""
+        with self._lock:
+            if namespace is not None:
+                result = dict(self._counters(namespace))
+            else:
+                result = {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0}
+                for counters in self._stats.values():
+                    for name in result:
+                        result[name] += counters[name]
+                result["entries"] = len(self._entries)
+                result["bytes"] = self._total_bytes
+                if self._disk is not None:
+                    result["disk"] = self._disk.stats()
+            lookups = result["hits"] + result["misses"]
+            result["hit_rate"] = result["hits"] / lookups if lookups else 0.0
+            return result
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, full_key, evicted=False):
+        entry = self._entries.pop(full_key)
+        self._total_bytes -= entry.size
+        counters = self._counters(full_key[0])
+        counters["entries"] -= 1
+        counters["bytes"] -= entry.size
+        if evicted:
+            counters["evictions"] += 1
+
+    def _purge_expired(self):
+        # Full scans are only done every quarter TTL to keep put() cheap
+        if not self.ttl_seconds:
+            return
+        now = time.monotonic()
+        if now - self._last_purge < self.ttl_seconds / 4:
+            return
+        self._last_purge = now
+        for full_key, entry in list(self._entries.items()):
+            if entry.expires_at is not None and entry.expires_at <= now:
+                self._remove(full_key, evicted=True)
+
+    def _enforce_limits(self):
+        while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries) or
+                (self.max_bytes and self._total_bytes > self.max_bytes)):
+            oldest = next(iter(self._entries))
+            self._remove(oldest, evicted=True)
+
+
+# One cache shared by every model; each model class gets its own namespace
+shared_cache = ResultCache()
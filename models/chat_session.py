@@ -0,0 +1,136 @@
+import threading
+import time
+
+# Context tokens always left for the prompt, however large a reply is asked for
+MIN_PROMPT_TOKENS = 64
+
+
+class ChatSession:
+    """
+    Multi-turn DialoGPT conversation.
+    Keeps the tokenized history and the model's past key/values between turns so
+    each turn only runs its new tokens through the model. When the history would
+    overflow max_context_tokens the oldest turns are dropped and the cache is
+    rebuilt once from what remains. max_new_tokens is clamped so a reply never
+    takes the whole window.
+    """
+
+    def __init__(self, model, tokenizer, max_context_tokens=512, max_new_tokens=64,
+                 temperature=0.7, do_sample=True, top_k=50, no_repeat_ngram_size=3):
+        self._model = model
+        self._tokenizer = tokenizer
+        self.max_context_tokens = min(max_context_tokens,
+                                      getattr(model.config, "n_positions", max_context_tokens))
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.do_sample = do_sample
+        self.top_k = top_k
+        self.no_repeat_ngram_size = no_repeat_ngram_size
+
+        self._turns = []        # token ids per finished message (user and bot), each ending in EOS
+        self._past = None       # past key/values covering every token in _turns except _pending
+        self._pending = []      # tokens in _turns that are not in the cache yet
+        self._lock = threading.Lock()
+        self.turn_latencies = []
+
+    @property
+    def max_new_tokens(self):
+        return self._max_new_tokens
+
+    @max_new_tokens.setter
+    def max_new_tokens(self, value):
+        limit = max(1, self.max_context_tokens - MIN_PROMPT_TOKENS, self.max_context_tokens // 2)
+        self._max_new_tokens = max(1, min(int(value), limit))
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def history_length(self):
+        """Number of tokens currently kept as context"""
+        return sum(len(turn) for turn in self._turns)
+
+    def reset(self):
+        with self._lock:
+            self._turns = []
+            self._past = None
+            self._pending = []
+            self.turn_latencies = []
+
+    def _truncate(self, incoming):
+        """Drop the oldest turns until history + new message + reply budget fits the context window"""
+        budget = self.max_context_tokens - self.max_new_tokens - len(incoming)
+        dropped = False
+        while self._turns and self.history_length > budget:
+            self._turns.pop(0)
+            dropped = True
+        if dropped:
+            # Positions shift, so the cache has to be rebuilt from the remaining history
+            self._past = None
+            self._pending = [token for turn in self._turns for token in turn]
+
+    def _logits_processors(self):
+        from transformers import (LogitsProcessorList, NoRepeatNGramLogitsProcessor,
+                                  TemperatureLogitsWarper, TopKLogitsWarper)
+
+        processors = LogitsProcessorList()
+        if self.no_repeat_ngram_size:
+            processors.append(NoRepeatNGramLogitsProcessor(self.no_repeat_ngram_size))
+        if self.do_sample:
+            if self.temperature and self.temperature != 1.0:
+                processors.append(TemperatureLogitsWarper(self.temperature))
+            if self.top_k:
+                processors.append(TopKLogitsWarper(self.top_k))
+        return processors
+
+    def send(self, text):
+        """Add a user message, generate the reply and return it as text"""
+        import torch
+
+        with self._lock:
+            started = time.perf_counter()
+            eos = self._tokenizer.eos_token_id
+            user_ids = self._tokenizer.encode(text) + [eos]
+            # A single huge message keeps only its most recent tokens
+            user_ids = user_ids[-(self.max_context_tokens - self.max_new_tokens):]
+            self._truncate(user_ids)
+
+            feed = self._pending + user_ids
+            self._turns.append(user_ids)
+            self._pending = []
+            processors = self._logits_processors()
+            # n-gram blocking only looks at this turn so per-token cost stays flat
+            turn_ids = list(user_ids)
+            reply = []
+
+            try:
+                with torch.no_grad():
+                    outputs = self._model(input_ids=torch.tensor([feed]), past_key_values=self._past, use_cache=True)
+                    for _ in range(self.max_new_tokens):
+                        self._past = outputs.past_key_values
+                        scores = processors(torch.tensor([turn_ids]), outputs.logits[:, -1, :])
+                        if self.do_sample:
+                            next_token = int(torch.multinomial(torch.softmax(scores, dim=-1), 1)[0, 0])
+                        else:
+                            next_token = int(torch.argmax(scores, dim=-1)[0])
+                        if next_token == eos:
+                            break
+                        reply.append(next_token)
+                        turn_ids.append(next_token)
+                        outputs = self._model(input_ids=torch.tensor([[next_token]]),
+                                              past_key_values=self._past, use_cache=True)
+                    else:
+                        self._past = outputs.past_key_values
+            except Exception:
+                # Forget the failed turn and rebuild the cache from the history next time
+                self._turns.pop()
+                self._past = None
+                self._pending = [token for turn in self._turns for token in turn]
+                raise
+
+            # The closing EOS is fed at the start of the next turn instead of costing a forward pass now
+            self._turns.append(reply + [eos])
+            self._pending = [eos]
+            self.turn_latencies.append(time.perf_counter() - started)
+            return self._tokenizer.decode(reply, skip_special_tokens=True).strip()
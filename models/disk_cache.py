@@ -0,0 +1,185 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "hit137-ai-gui", "results.sqlite3")
+
+
+def make_disk_key(namespace, key):
+    """Stable digest of model namespace + cache key (input and generation params)"""
+    payload = json.dumps([namespace, key], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode(value):
+    """Turn a result into (kind, bytes) so images and raw bytes are stored as blobs"""
+    if isinstance(value, str):
+        return "text", value.encode("utf-8")
+    if isinstance(value, (bytes, bytearray)):
+        return "bytes", bytes(value)
+    if hasattr(value, "save") and hasattr(value, "getbands"):
+        buffer = io.BytesIO()
+        value.save(buffer, format="PNG")
+        return "image", buffer.getvalue()
+    return "pickle", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(kind, data):
+    if kind == "text":
+        return data.decode("utf-8")
+    if kind == "bytes":
+        return bytes(data)
+    if kind == "image":
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+    return pickle.loads(data)
+
+
+class DiskCache:
+    """
+    SQLite-backed result store that survives restarts.
+    Used as the second tier under ResultCache; least recently read rows are
+    deleted once max_bytes is exceeded and the file is vacuumed on compaction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=512 * 1024 * 1024, max_entries=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.commit()
+        self._total_bytes = self._query_total_bytes()
+
+    def _query_total_bytes(self):
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        return row[0]
+
+    def get(self, namespace, key):
+        """Return the stored value or None"""
+        disk_key = make_disk_key(namespace, key)
+        with self._lock:
+            row = self._conn.execute("SELECT kind, data FROM results WHERE key = ?",
+                                     (disk_key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?",
+                               (time.time(), disk_key))
+            self._conn.commit()
+        try:
+            return _decode(row[0], row[1])
+        except Exception:
+            # Unreadable row (e.g. class changed since it was pickled)
+            self.delete(namespace, key)
+            return None
+
+    def put(self, namespace, key, value):
+        """Write a value, compacting if the store grows past its caps"""
+        kind, data = _encode(value)
+        disk_key = make_disk_key(namespace, key)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM results WHERE key = ?", (disk_key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (disk_key, namespace, kind, sqlite3.Binary(data), len(data), now, now))
+            self._conn.commit()
+            self._total_bytes += len(data) - (old[0] if old else 0)
+            over_limit = self._over_limit()
+        if over_limit:
+            self.compact(vacuum=False)
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (make_disk_key(namespace, key),))
+            self._conn.commit()
+            self._total_bytes = self._query_total_bytes()
+
+    def clear(self, namespace=None):
+        """Remove every row, or only the rows of one model namespace"""
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM results")
+            else:
+                self._conn.execute("DELETE FROM results WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+            self._total_bytes = self._query_total_bytes()
+
+    def _over_limit(self):
+        if self.max_bytes and self._total_bytes > self.max_bytes:
+            return True
+        if self.max_entries:
+            count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return count > self.max_entries
+        return False
+
+    def compact(self, vacuum=True):
+        """Delete least recently read rows until under 90% of the caps, then optionally VACUUM"""
+        with self._lock:
+            if self.max_bytes:
+                target = int(self.max_bytes * 0.9)
+                rows = self._conn.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+                doomed = []
+                total = self._total_bytes
+                for key, size in rows:
+                    if total <= target:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+            if self.max_entries:
+                keep = int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY accessed DESC LIMIT ?)", (keep,))
+            self._conn.commit()
+            if vacuum:
+                self._conn.execute("VACUUM")
+            self._total_bytes = self._query_total_bytes()
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {"path": self.path, "entries": count, "bytes": self._total_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def enable_disk_cache(path=None, max_bytes=512 * 1024 * 1024, cache=None):
+    """
+    Attach a DiskCache under the shared result cache.
+    Without an explicit path the AI_GUI_DISK_CACHE environment variable is used;
+    set it to "off" to keep results in memory only.
+    """
+    from models.cache import shared_cache
+
+    path = path or os.environ.get("AI_GUI_DISK_CACHE") or DEFAULT_CACHE_PATH
+    if path.lower() == "off":
+        return None
+    disk = DiskCache(path, max_bytes=max_bytes)
+    (cache if cache is not None else shared_cache).attach_disk(disk)
+    return disk
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+_CHUNK_SIZE = 1024 * 1024
+_MAX_MEMO_ENTRIES = 4096
+
+# absolute path -> ((inode, size, mtime_ns), digest)
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def content_hash(path):
+    """
+    BLAKE2b digest of a file's bytes.
+    Unchanged files (same inode, size and mtime) reuse the last digest instead of
+    being read again, so repeated lookups cost one os.stat call.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    with _memo_lock:
+        memo = _memo.get(path)
+        if memo is not None and memo[0] == signature:
+            _memo.move_to_end(path)
+            return memo[1]
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    result = digest.hexdigest()
+
+    with _memo_lock:
+        _memo[path] = (signature, result)
+        _memo.move_to_end(path)
+        while len(_memo) > _MAX_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return result
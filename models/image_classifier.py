@@ -1,27 +1,81 @@
 from models.base_model import AIModel, ModelCacheMixin
-from transformers import ViTImageProcessor, ViTForImageClassification
-from PIL import Image
-import torch
+from models.file_hash import content_hash
+from models import backends as inference_backends
+from models.model_store import model_store
+from models.instrumentation import instrumentation
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+
+# torch, transformers, numpy and PIL are imported inside the methods that need
+# them so that importing this module (e.g. to build the GUI) stays cheap
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+
+
+class ClassificationResult:
+    """Top-k labels and probabilities for one image; only formatted when displayed"""
+    
+    def __init__(self, labels, probs):
+        self.labels = labels
+        self.probs = probs
+    
+    def to_dict(self):
+        return {"labels": self.labels.tolist(), "probs": self.probs.tolist()}
+    
+    def __str__(self):
+        return "\n".join(f"{label}: {prob:.4f}" for label, prob in zip(self.labels, self.probs))
 
 class ImageClassifierModel(AIModel, ModelCacheMixin):
     """Image Classification model demonstrating Multiple Inheritance"""
     
-    def __init__(self):
+    model_id = "image-classification"
+    display_name = "Image Classification"
+    category = "Image Classification"
+    description = "Classifies images into various categories"
+    input_type = "image"
+    hardware = "cpu"
+    variants = [
+        {"name": "ViT Base Patch16-224", "hf_id": "google/vit-base-patch16-224", "memory_mb": 350}
+    ]
+    backends = ["eager", "int8", "compile", "torchscript", "onnx"]
+    # Inputs are file paths: whitespace is significant
+    normalize_whitespace = False
+    
+    def __init__(self, variant=None):
+        variant = self.resolve_variant(variant)
+        self._hf_id = variant["hf_id"]
         # Multiple Inheritance
         AIModel.__init__(self,
-                        "ViT Base Patch16-224",
-                        "Image Classification",
-                        "Classifies images into various categories")
+                        variant["name"],
+                        self.category,
+                        self.description)
         ModelCacheMixin.__init__(self)
         self.processor = None
         self.model = None
+        self._labels = None
+        self.backend = "eager"
+        self.backend_report = None
     
-    def load_model(self):
+    def load_model(self, backend="eager", num_threads=None, verify=True):
         """Method Overriding: Specific implementation for image classification"""
         if not self._is_loaded:
             try:
-                self.processor = ViTImageProcessor.from_pretrained("google/vit-base-patch16-224")
-                self.model = ViTForImageClassification.from_pretrained("google/vit-base-patch16-224")
+                from transformers import ViTImageProcessor, ViTForImageClassification
+                
+                threads = inference_backends.set_num_threads(num_threads)
+                # Weights come from the local safetensors store when present (no hub round-trip)
+                self.processor = model_store.from_pretrained(ViTImageProcessor, self._hf_id)
+                self.model = model_store.from_pretrained(ViTForImageClassification, self._hf_id).eval()
+                model_store.ensure_saved(self._hf_id, self.model, self.processor)
+                self._labels = self._build_label_array(self.model.config.id2label)
+                if backend != "eager":
+                    self.model = self._build_backend(self.model, backend, num_threads, verify)
+                self.backend = backend
+                self.set_cache_variant(backend=backend)
+                if self.backend_report is not None:
+                    self.backend_report["num_threads"] = threads
                 self._is_loaded = True
                 return "Model loaded successfully"
             except Exception as e:
@@ -33,30 +87,179 @@ class ImageClassifierModel(AIModel, ModelCacheMixin):
         if not self._is_loaded:
             return "Please load the model first"
         
-        # Check cache first
-        cached = self.get_cached_result(image_path)
-        if cached:
-            return cached
-        
         try:
-            image = Image.open(image_path)
-            inputs = self.processor(images=image, return_tensors="pt")
+            import torch
             
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+            # Key on the file contents, not the path: edited files miss, copies hit
+            cache_key = f"blake2b:{content_hash(image_path)}"
+            cached = self.get_cached_result(cache_key)
+            if cached:
+                return cached
             
-            probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            top_prob, top_class = torch.topk(probabilities, 5)
+            with self.stage("preprocess"):
+                pixel_values = self._load_pixels(image_path)
             
-            results = []
-            for i in range(5):
-                class_name = self.model.config.id2label[top_class[0][i].item()]
-                prob = top_prob[0][i].item()
-                results.append(f"{class_name}: {prob:.4f}")
+            with self.stage("forward"), torch.no_grad():
+                outputs = self.model(pixel_values=pixel_values)
             
-            result_text = "\n".join(results)
-            self.cache_result(image_path, result_text)
-            return result_text
+            result = self._postprocess(outputs.logits)[0]
+            self.cache_result(cache_key, result)
+            return result
             
         except Exception as e:
-            return f"Error classifying image: {str(e)}"
\ No newline at end of file
+            return f"Error classifying image: {str(e)}"
+    
+    def unload_model(self):
+        """Method Overriding: drop processor, model and label table"""
+        self.processor = None
+        self.model = None
+        self._labels = None
+        return super().unload_model()
+    
+    def _torch_modules(self):
+        return [self.model] if self.model is not None else []
+    
+    def _build_backend(self, fp32_model, backend, num_threads, verify):
+        """Convert the fp32 model to the requested backend, checking it against the original"""
+        import copy
+        import torch
+        
+        size = self.processor.size
+        height, width = (size["height"], size["width"]) if "height" in size else (224, 224)
+        example = torch.randn(2, 3, height, width)
+        candidate = copy.deepcopy(fp32_model)
+        
+        if backend == "int8":
+            candidate = inference_backends.quantize_int8(candidate)
+        elif backend == "compile":
+            candidate = inference_backends.compile_model(candidate)
+        elif backend == "torchscript":
+            candidate = inference_backends.torchscript_classifier(candidate, example)
+        elif backend == "onnx":
+            candidate = inference_backends.onnx_classifier(candidate, example, num_threads=num_threads)
+        else:
+            raise ValueError(f"Unknown backend '{backend}', choose from {', '.join(self.backends)}")
+        
+        if verify:
+            self.backend_report = inference_backends.compare_to_baseline(
+                lambda: fp32_model(pixel_values=example).logits,
+                lambda: candidate(pixel_values=example).logits)
+            self.backend_report["backend"] = backend
+        return candidate
+    
+    def _extra_info(self):
+        info = {"backend": self.backend}
+        if self.backend_report is not None:
+            info["backend_report"] = self.backend_report
+        return info
+    
+    def normalize_input(self, image_path):
+        """Copies of the same file share one flight, like they share a cache entry"""
+        try:
+            return f"blake2b:{content_hash(image_path)}"
+        except (OSError, TypeError):
+            return image_path
+    
+    @staticmethod
+    def _build_label_array(id2label):
+        """Index -> label lookup table so a whole top-k tensor maps to names in one step"""
+        import numpy as np
+        
+        labels = np.empty(len(id2label), dtype=object)
+        for index, label in id2label.items():
+            labels[int(index)] = label
+        return labels
+    
+    def _topk(self, logits, k=5):
+        """Softmax + top-k over the whole batch; returns (labels, probs) arrays of shape (batch, k)"""
+        import torch
+        
+        probabilities = torch.nn.functional.softmax(logits, dim=-1)
+        top_prob, top_class = torch.topk(probabilities, k)
+        return self._labels[top_class.numpy()], top_prob.numpy()
+    
+    @instrumentation.timed("postprocess")
+    def _postprocess(self, logits, k=5):
+        """One ClassificationResult per image in the batch"""
+        labels, probs = self._topk(logits, k)
+        return [ClassificationResult(labels[row], probs[row]) for row in range(labels.shape[0])]
+    
+    def _load_pixels(self, image_path):
+        """Decode one image as RGB (palette, RGBA and greyscale files too) into a (1, 3, H, W) tensor"""
+        from PIL import Image
+        
+        with Image.open(image_path) as image:
+            return self.processor(images=image.convert("RGB"), return_tensors="pt")["pixel_values"]
+    
+    def _prepare_image(self, image_path):
+        """Worker-thread step: hash, check cache, decode and preprocess one image"""
+        try:
+            cache_key = f"blake2b:{content_hash(image_path)}"
+            cached = self.get_cached_result(cache_key)
+            if cached:
+                return image_path, cache_key, cached, None
+            with self.stage("preprocess"):
+                pixel_values = self._load_pixels(image_path)[0]
+            return image_path, cache_key, None, pixel_values
+        except Exception as e:
+            return image_path, None, f"Error classifying image: {str(e)}", None
+    
+    def classify_batch(self, image_paths, batch_size=16, num_workers=4, prefetch_batches=2):
+        """
+        Classify many images, yielding a list of (path, result) pairs per batch.
+        Decoding and preprocessing run on worker threads while the model runs
+        the previous batch as one stacked tensor.
+        """
+        if not self._is_loaded:
+            raise RuntimeError("Please load the model first")
+        
+        image_paths = list(image_paths)
+        batches = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+        
+        with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="image-prefetch") as pool:
+            pending = deque()
+            next_batch = 0
+            
+            while pending or next_batch < len(batches):
+                # Keep a few batches decoding ahead of the model
+                while next_batch < len(batches) and len(pending) < prefetch_batches + 1:
+                    pending.append([pool.submit(self._prepare_image, path) for path in batches[next_batch]])
+                    next_batch += 1
+                
+                prepared = [future.result() for future in pending.popleft()]
+                yield self._run_prepared_batch(prepared)
+    
+    def _run_prepared_batch(self, prepared):
+        """Forward pass over the uncached images of one prefetched batch"""
+        import torch
+        
+        results = {}
+        to_run = [item for item in prepared if item[3] is not None]
+        
+        if to_run:
+            pixel_values = torch.stack([item[3] for item in to_run])
+            with self.stage("forward"), torch.no_grad():
+                logits = self.model(pixel_values=pixel_values).logits
+            instrumentation.count(self.instrument_label, "batched_items", len(to_run))
+            for (path, cache_key, _, _), result in zip(to_run, self._postprocess(logits)):
+                self.cache_result(cache_key, result)
+                results[path] = result
+        
+        return [(path, results.get(path, ready)) for path, _, ready, _ in prepared]
+    
+    @staticmethod
+    def list_images(folder):
+        """All image files directly inside folder, sorted by name"""
+        return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                      if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+if __name__ == "__main__":
+    # Usage: python -m models.image_classifier FOLDER [BATCH_SIZE]
+    classifier = ImageClassifierModel()
+    print(classifier.load_model(), file=sys.stderr)
+    paths = ImageClassifierModel.list_images(sys.argv[1])
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    for batch in classifier.classify_batch(paths, batch_size=size):
+        for path, result in batch:
+            print(f"{path}\n{result}\n", flush=True)
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+from models.batching import percentile
+
+logger = logging.getLogger("ai_gui.timings")
+
+# Shared no-op context: entering it costs one attribute check when timing is off
+_DISABLED = nullcontext()
+
+
+class _StageStats:
+    def __init__(self, max_samples):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+
+class _Stage:
+    """Times one with-block and records it under (model, stage)"""
+
+    __slots__ = ("owner", "model", "name", "started")
+
+    def __init__(self, owner, model, name):
+        self.owner = owner
+        self.model = model
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.owner.record(self.model, self.name, time.perf_counter() - self.started, failed=exc_type is not None)
+        return False
+
+
+class Instrumentation:
+    """
+    Per-model, per-stage timings and counters (preprocess, forward, cache lookup...).
+    Disabled by default; AI_GUI_TIMINGS=1 or enable() turns it on. Each finished
+    stage can also be logged as one JSON line, and everything exports as
+    Prometheus text.
+    """
+
+    def __init__(self, enabled=None, max_samples=512, log_stages=False):
+        if enabled is None:
+            enabled = os.environ.get("AI_GUI_TIMINGS", "0") not in ("", "0")
+        self.enabled = enabled
+        self.log_stages = log_stages
+        self.max_samples = max_samples
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self, log_stages=None):
+        self.enabled = True
+        if log_stages is not None:
+            self.log_stages = log_stages
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def stage(self, model, name):
+        """Context manager timing one stage of a model; a no-op while disabled"""
+        if not self.enabled:
+            return _DISABLED
+        return _Stage(self, model, name)
+
+    def timed(self, name):
+        """Method decorator: time the call as stage name of the model (self)"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(model, *args, **kwargs):
+                if not self.enabled:
+                    return func(model, *args, **kwargs)
+                with _Stage(self, model.instrument_label, name):
+                    return func(model, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, model, name, seconds, failed=False):
+        with self._lock:
+            stats = self._stages.get((model, name))
+            if stats is None:
+                stats = self._stages[(model, name)] = _StageStats(self.max_samples)
+            stats.add(seconds)
+            if failed:
+                key = (model, f"{name}_errors")
+                self._counters[key] = self._counters.get(key, 0) + 1
+        if self.log_stages:
+            logger.info(json.dumps({"model": model, "stage": name, "ms": round(seconds * 1000, 3),
+                                    "failed": failed}))
+
+    def count(self, model, name, amount=1):
+        """Increment a counter (hits, errors, items...) while enabled"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(model, name)] = self._counters.get((model, name), 0) + amount
+
+    def summary(self, model):
+        """{"stages": {stage: count/mean/p50/p95/max ms}, "counters": {...}} for one model"""
+        with self._lock:
+            stages = {name: (stats.count, stats.total, stats.max, list(stats.samples))
+                      for (owner, name), stats in self._stages.items() if owner == model}
+            counters = {name: value for (owner, name), value in self._counters.items() if owner == model}
+        result = {}
+        for name, (count, total, longest, samples) in stages.items():
+            ms = [s * 1000 for s in samples]
+            result[name] = {"count": count, "mean_ms": total * 1000 / count,
+                            "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95),
+                            "max_ms": longest * 1000}
+        return {"stages": result, "counters": counters}
+
+    def prometheus_text(self, prefix="ai_gui"):
+        """All timings and counters in the Prometheus text exposition format"""
+        with self._lock:
+            stages = [(model, name, stats.count, stats.total, list(stats.samples))
+                      for (model, name), stats in sorted(self._stages.items())]
+            counters = sorted(self._counters.items())
+
+        lines = [f"# HELP {prefix}_stage_seconds Time spent in each model stage",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for model, name, count, total, samples in stages:
+            labels = f'model="{model}",stage="{name}"'
+            for quantile in (0.5, 0.95, 0.99):
+                lines.append(f'{prefix}_stage_seconds{{{labels},quantile="{quantile}"}} '
+                             f"{percentile(samples, quantile * 100):.6f}")
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {count}")
+        lines += [f"# HELP {prefix}_events_total Model event counters",
+                  f"# TYPE {prefix}_events_total counter"]
+        for (model, name), value in counters:
+            lines.append(f'{prefix}_events_total{{model="{model}",event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,218 @@
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from models.registry import available_memory_mb
+
+
+def process_rss_mb():
+    """Resident set size of this process in MB, or None if it cannot be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _ModelRecord:
+    def __init__(self, model):
+        self.model = model
+        self.memory_mb = 0.0
+        self.last_used = 0.0
+        self.in_use = 0
+        self.load_kwargs = {}
+        self.was_loaded = False
+        self.loading = False        # pinned against eviction while load_model runs
+        self.reserved_mb = 0.0      # estimate counted against the budget until the load finishes
+
+
+class ModelManager:
+    """
+    Keeps loaded models within a global memory budget.
+    Models are loaded through ensure_loaded(); when a load would exceed the budget
+    the least recently used idle models are unloaded first. Unloaded models are
+    reloaded transparently (with the same load arguments) the next time they run.
+    """
+
+    def __init__(self, budget_mb=None, max_events=200):
+        if budget_mb is None:
+            available = available_memory_mb()
+            budget_mb = int(available * 0.7) if available else 0
+        self.budget_mb = budget_mb          # 0 disables the budget
+        self._records = {}
+        self._lock = threading.RLock()
+        self._load_locks = {}
+        self.events = deque(maxlen=max_events)
+
+    def _record(self, model):
+        key = id(model)
+        if key not in self._records:
+            self._records[key] = _ModelRecord(model)
+            self._load_locks[key] = threading.Lock()
+        return self._records[key]
+
+    def _log(self, message):
+        self.events.append(f"{time.strftime('%H:%M:%S')} {message}")
+
+    @property
+    def used_mb(self):
+        with self._lock:
+            return sum(r.reserved_mb if r.loading else r.memory_mb
+                       for r in self._records.values() if r.loading or r.model._is_loaded)
+
+    def was_loaded(self, model):
+        """True once the model has been loaded through the manager (even if unloaded since)"""
+        with self._lock:
+            return self._record(model).was_loaded
+
+    def _estimate_mb(self, model):
+        """Declared footprint of the model for its remembered load arguments"""
+        return model.estimated_memory_mb(**self._record(model).load_kwargs)
+
+    @staticmethod
+    def _load_options(model, load_kwargs):
+        """load_kwargs with load_model's defaults filled in, so {} and the explicit defaults compare equal"""
+        # A process-hosted proxy takes **load_kwargs; the hosted class has the real signature
+        spec = getattr(model, "spec", None)
+        try:
+            load_model = spec.load_class().load_model if spec is not None else model.load_model
+            parameters = inspect.signature(load_model).parameters.values()
+        except (ImportError, AttributeError, TypeError, ValueError):
+            return dict(load_kwargs)
+        defaults = {p.name: p.default for p in parameters
+                    if p.default is not inspect.Parameter.empty and p.kind is not p.VAR_KEYWORD}
+        return dict(defaults, **load_kwargs)
+
+    def _make_room(self, needed_mb, keep):
+        """Unload least recently used idle models until needed_mb fits in the budget"""
+        if not self.budget_mb:
+            return
+        candidates = sorted((r for r in self._records.values()
+                             if r.model is not keep and r.model._is_loaded and r.in_use == 0
+                             and not r.loading),
+                            key=lambda r: r.last_used)
+        for record in candidates:
+            if self.used_mb + needed_mb <= self.budget_mb:
+                break
+            freed = record.memory_mb
+            record.model.unload_model()
+            self._log(f"Unloaded {record.model} (LRU, freed {freed:.0f} MB)")
+
+    def ensure_loaded(self, model, **load_kwargs):
+        """
+        Load the model if needed (evicting others to stay in budget); returns the load message.
+        load_kwargs that differ from those of the loaded weights reload the model with them,
+        unless it is running; they are remembered for transparent reloads once a load succeeds.
+        """
+        with self._lock:
+            record = self._record(model)
+            load_lock = self._load_locks[id(model)]
+
+        with load_lock:
+            if (model._is_loaded and load_kwargs
+                    and self._load_options(model, load_kwargs) != self._load_options(model, record.load_kwargs)):
+                with self._lock:
+                    if record.in_use:
+                        return f"{model} is busy; load it again with the new options once it finishes"
+                    freed = record.memory_mb
+                    model.unload_model()
+                    self._log(f"Unloaded {model} (reloading with new options, freed {freed:.0f} MB)")
+
+            if model._is_loaded:
+                record.last_used = time.monotonic()
+                if not record.was_loaded:
+                    record.was_loaded = True
+                    record.memory_mb = model.memory_footprint_mb() or self._estimate_mb(model)
+                return "Model already loaded"
+
+            load_kwargs = load_kwargs or record.load_kwargs
+            with self._lock:
+                needed_mb = model.estimated_memory_mb(**load_kwargs)
+                self._make_room(needed_mb, keep=model)
+                # Loads outside use() have in_use == 0; pin the record so a concurrent load cannot evict it
+                record.loading = True
+                record.reserved_mb = needed_mb
+
+            try:
+                rss_before = process_rss_mb()
+                started = time.perf_counter()
+                with model.stage("load"):
+                    result = model.load_model(**load_kwargs)
+                elapsed = time.perf_counter() - started
+            except BaseException:
+                with self._lock:
+                    record.loading = False
+                    record.reserved_mb = 0.0
+                raise
+
+            measured = None
+            if model._is_loaded:
+                rss_after = process_rss_mb()
+                measured = model.memory_footprint_mb()
+                if not measured and rss_before is not None and rss_after is not None:
+                    measured = max(0.0, rss_after - rss_before)
+            with self._lock:
+                record.loading = False
+                record.reserved_mb = 0.0
+                if model._is_loaded:
+                    record.load_kwargs = load_kwargs
+                    record.memory_mb = measured or self._estimate_mb(model)
+                    record.last_used = time.monotonic()
+                    record.was_loaded = True
+                    self._log(f"Loaded {model} ({record.memory_mb:.0f} MB in {elapsed:.1f}s)")
+                    # The real size may be larger than the estimate
+                    self._make_room(0, keep=model)
+            return result
+
+    def unload(self, model):
+        with self._lock:
+            record = self._record(model)
+            if not model._is_loaded:
+                return f"{model} is not loaded"
+            if record.in_use:
+                return f"{model} is busy"
+            freed = record.memory_mb
+            result = model.unload_model()
+            self._log(f"Unloaded {model} (manual, freed {freed:.0f} MB)")
+            return result
+
+    @contextmanager
+    def use(self, model):
+        """Keep the model loaded (and protected from eviction) for the duration of the block"""
+        with self._lock:
+            record = self._record(model)
+            record.in_use += 1
+            record.last_used = time.monotonic()
+        try:
+            self.ensure_loaded(model)
+            yield model
+        finally:
+            with self._lock:
+                record.in_use -= 1
+                record.last_used = time.monotonic()
+
+    def run(self, model, input_data):
+        """process_input with transparent reload"""
+        with self.use(model):
+            return model.process_input(input_data)
+
+    def stats(self):
+        """Budget, usage and per-model memory figures"""
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb,
+                "used_mb": self.used_mb,
+                "process_rss_mb": process_rss_mb(),
+                "models": [{"name": str(r.model), "loaded": r.model._is_loaded,
+                            "memory_mb": r.memory_mb, "in_use": r.in_use, "loading": r.loading}
+                           for r in self._records.values()]
+            }
@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hit137-ai-gui", "models")
+
+
+class ModelStore:
+    """
+    Offline copy of Hugging Face models, saved as safetensors and indexed by a
+    manifest. Models in the store load straight from disk: no hub resolution,
+    and safetensors files are memory-mapped instead of unpickled and copied.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root=None, auto_save=None):
+        self.root = root or os.environ.get("AI_GUI_MODEL_STORE") or DEFAULT_STORE_DIR
+        if auto_save is None:
+            auto_save = os.environ.get("AI_GUI_MODEL_STORE_AUTOSAVE", "0") == "1"
+        # Opt-in: saving a hub download writes a second full copy of its weights.
+        # Otherwise models enter the store through "python -m models.model_store import"
+        self.auto_save = auto_save
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, self.MANIFEST)
+
+    def _read_manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _write_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def entries(self):
+        with self._lock:
+            return dict(self._read_manifest())
+
+    def local_path(self, hf_id):
+        """Directory of a stored model, or None if it is not in the store"""
+        with self._lock:
+            entry = self._read_manifest().get(hf_id)
+        if not entry:
+            return None
+        path = os.path.join(self.root, entry["path"])
+        return path if os.path.isdir(path) else None
+
+    def from_pretrained(self, loader_class, hf_id, **kwargs):
+        """
+        loader_class.from_pretrained from the store when possible, else from the hub.
+        Model classes (anything with save_pretrained and a config) are loaded with
+        safetensors and low_cpu_mem_usage so weights are mapped rather than copied.
+        """
+        path = self.local_path(hf_id)
+        is_model = hasattr(loader_class, "config_class") or loader_class.__name__.startswith("AutoModel")
+        if is_model:
+            kwargs.setdefault("low_cpu_mem_usage", True)
+        if path is not None:
+            if is_model:
+                kwargs.setdefault("use_safetensors", True)
+            return loader_class.from_pretrained(path, local_files_only=True, **kwargs)
+        return loader_class.from_pretrained(hf_id, **kwargs)
+
+    def save(self, hf_id, *components):
+        """Write model/tokenizer/processor objects into the store and record them in the manifest"""
+        directory = hf_id.replace("/", "--")
+        path = os.path.join(self.root, directory)
+        temp_path = path + ".partial"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        for component in components:
+            if hasattr(component, "config") and hasattr(component, "state_dict"):
+                component.save_pretrained(temp_path, safe_serialization=True)
+            else:
+                component.save_pretrained(temp_path)
+
+        files = {name: os.path.getsize(os.path.join(temp_path, name)) for name in os.listdir(temp_path)}
+        with self._lock:
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(temp_path, path)
+            manifest = self._read_manifest()
+            manifest[hf_id] = {"path": directory, "files": files, "saved_at": time.time()}
+            self._write_manifest()
+        return path
+
+    def ensure_saved(self, hf_id, *components):
+        """Save after a hub load if auto_save is on and the model is not stored yet"""
+        if self.auto_save and self.local_path(hf_id) is None:
+            try:
+                return self.save(hf_id, *components)
+            except Exception as e:
+                print(f"Could not save {hf_id} to the model store: {e}", file=sys.stderr)
+        return None
+
+    def remove(self, hf_id):
+        with self._lock:
+            entry = self._read_manifest().pop(hf_id, None)
+            if entry:
+                shutil.rmtree(os.path.join(self.root, entry["path"]), ignore_errors=True)
+                self._write_manifest()
+        return entry is not None
+
+
+model_store = ModelStore()
+
+
+# Classes used to fetch each kind of model, for the import/bench commands
+_LOADERS = {
+    "text-generation": ("transformers:AutoModelForCausalLM", "transformers:AutoTokenizer"),
+    "image-classification": ("transformers:AutoModelForImageClassification", "transformers:AutoImageProcessor")
+}
+
+
+def _import_class(path):
+    import importlib
+    module, name = path.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def import_model(hf_id, task, store=model_store):
+    """Download a model once from the hub and save it into the store"""
+    components = [_import_class(path).from_pretrained(hf_id) for path in _LOADERS[task]]
+    return store.save(hf_id, *components)
+
+
+def _cold_load_seconds(hf_id, task, use_store):
+    """Time from_pretrained in a fresh interpreter so nothing is warm in-process"""
+    code = (
+        "import sys, time\n"
+        "from models.model_store import model_store, _LOADERS, _import_class\n"
+        f"hf_id, task, use_store = {hf_id!r}, {task!r}, {use_store!r}\n"
+        "classes = [_import_class(p) for p in _LOADERS[task]]\n"
+        "start = time.perf_counter()\n"
+        "for cls in classes:\n"
+        "    if use_store:\n"
+        "        model_store.from_pretrained(cls, hf_id)\n"
+        "    else:\n"
+        "        cls.from_pretrained(hf_id)\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def benchmark_cold_load(hf_id, task, runs=3):
+    """Cold-load seconds via the hub cache vs. the local store (best of runs)"""
+    if model_store.local_path(hf_id) is None:
+        import_model(hf_id, task)
+    hub = min(_cold_load_seconds(hf_id, task, False) for _ in range(runs))
+    store = min(_cold_load_seconds(hf_id, task, True) for _ in range(runs))
+    return {"hf_id": hf_id, "hub_seconds": hub, "store_seconds": store,
+            "speedup": hub / store if store else 0.0}
+
+
+if __name__ == "__main__":
+    # python -m models.model_store import microsoft/DialoGPT-medium text-generation
+    # python -m models.model_store bench google/vit-base-patch16-224 image-classification
+    # python -m models.model_store list
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "import":
+        print(import_model(sys.argv[2], sys.argv[3]))
+    elif command == "bench":
+        print(json.dumps(benchmark_cold_load(sys.argv[2], sys.argv[3]), indent=2))
+    else:
+        print(json.dumps(model_store.entries(), indent=2))
@@ -0,0 +1,843 @@
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import shared_memory
+
+from models.base_model import AIModel
+from models.registry import available_memory_mb, registry as default_registry
+
+# Arrays, images and byte strings at least this large travel through shared
+# memory; smaller values are cheaper to pickle along with the message
+SHARED_MEMORY_MIN_BYTES = 64 * 1024
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process exited (or was killed) before answering"""
+
+
+class WorkerError(RuntimeError):
+    """The hosted model raised; the message carries the original exception type"""
+
+
+class SharedBlock:
+    """Picklable pointer to an array, image or byte string placed in shared memory"""
+
+    def __init__(self, name, kind, meta):
+        self.name = name
+        self.kind = kind      # "ndarray", "tensor", "image" or "bytes"
+        self.meta = meta
+
+
+class _Callback:
+    """Stands in for a callable keyword argument; the worker turns it back into a function"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _new_block(nbytes, blocks):
+    block = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+    blocks.append(block)
+    return block
+
+
+def _put_array(array, kind, blocks):
+    import numpy as np
+
+    block = _new_block(array.nbytes, blocks)
+    target = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    target[...] = array
+    del target  # the buffer cannot be closed while a view is exported
+    return SharedBlock(block.name, kind, (array.shape, array.dtype.str))
+
+
+def to_wire(value, blocks):
+    """
+    Replace large arrays, tensors, images and bytes in value (recursing into plain
+    lists, tuples and dicts) by SharedBlocks; the created segments are appended
+    to blocks so the sender can close or unlink them
+    """
+    if type(value) in (list, tuple):
+        return type(value)(to_wire(item, blocks) for item in value)
+    if type(value) is dict:
+        return {key: to_wire(item, blocks) for key, item in value.items()}
+
+    # Only types whose module is already imported can occur, so nothing heavy is imported here
+    numpy = sys.modules.get("numpy")
+    torch = sys.modules.get("torch")
+    pil_image = sys.modules.get("PIL.Image")
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject or value.nbytes < SHARED_MEMORY_MIN_BYTES:
+            return value
+        return _put_array(value, "ndarray", blocks)
+    if torch is not None and isinstance(value, torch.Tensor):
+        if value.element_size() * value.nelement() < SHARED_MEMORY_MIN_BYTES:
+            return value
+        try:
+            array = value.detach().cpu().numpy()
+        except TypeError:
+            return value  # dtypes numpy lacks (e.g. bfloat16) are pickled
+        return _put_array(array, "tensor", blocks)
+    if pil_image is not None and isinstance(value, pil_image.Image):
+        image = value.convert("RGBA") if value.mode == "P" else value
+        data = image.tobytes()
+        if len(data) < SHARED_MEMORY_MIN_BYTES:
+            return value
+        block = _new_block(len(data), blocks)
+        block.buf[:len(data)] = data
+        return SharedBlock(block.name, "image", (image.mode, image.size, len(data)))
+    if isinstance(value, bytes) and len(value) >= SHARED_MEMORY_MIN_BYTES:
+        block = _new_block(len(value), blocks)
+        block.buf[:len(value)] = value
+        return SharedBlock(block.name, "bytes", len(value))
+    return value
+
+
+def _read_block(descriptor):
+    """Copy a SharedBlock's contents out of shared memory, then free the segment"""
+    block = shared_memory.SharedMemory(name=descriptor.name)
+    try:
+        if descriptor.kind in ("ndarray", "tensor"):
+            import numpy as np
+
+            shape, dtype = descriptor.meta
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array = view.copy()
+            del view
+            if descriptor.kind == "tensor":
+                import torch
+                return torch.from_numpy(array)
+            return array
+        if descriptor.kind == "image":
+            from PIL import Image
+
+            mode, size, nbytes = descriptor.meta
+            return Image.frombytes(mode, size, bytes(block.buf[:nbytes]))
+        return bytes(block.buf[:descriptor.meta])
+    finally:
+        block.close()
+        block.unlink()
+
+
+def from_wire(value):
+    """Inverse of to_wire; every SharedBlock is read once and unlinked"""
+    if isinstance(value, SharedBlock):
+        return _read_block(value)
+    if type(value) in (list, tuple):
+        return type(value)(from_wire(item) for item in value)
+    if type(value) is dict:
+        return {key: from_wire(item) for key, item in value.items()}
+    return value
+
+
+def release(value):
+    """Unlink the SharedBlocks in a message nobody will read"""
+    if isinstance(value, SharedBlock):
+        try:
+            block = shared_memory.SharedMemory(name=value.name)
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+    elif type(value) in (list, tuple):
+        for item in value:
+            release(item)
+    elif type(value) is dict:
+        for item in value.values():
+            release(item)
+
+
+def _close_blocks(blocks, unlink=False):
+    for block in blocks:
+        block.close()
+        if unlink:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def host_settings(threads=4):
+    """Process-wide options of this process that a worker should share"""
+    from models.cache import shared_cache
+    from models.instrumentation import instrumentation
+
+    disk = shared_cache.disk
+    return {"disk_cache": getattr(disk, "path", None), "timings": instrumentation.enabled,
+            "log_stages": instrumentation.log_stages, "threads": threads}
+
+
+def _worker_main(conn, module, class_name, variant, settings):
+    """Entry point of the worker process: one model instance answering requests from the pipe"""
+    import signal
+    from concurrent.futures import ThreadPoolExecutor
+    from models.instrumentation import instrumentation
+    from models.model_manager import process_rss_mb
+
+    # Ctrl+C in the terminal is for the parent; it stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if settings.get("disk_cache"):
+        from models.disk_cache import enable_disk_cache
+        enable_disk_cache(settings["disk_cache"])
+    if settings.get("timings"):
+        if settings.get("log_stages"):
+            logging.basicConfig(level=logging.INFO)
+        instrumentation.enable(log_stages=settings.get("log_stages"))
+
+    model_class = getattr(importlib.import_module(module), class_name)
+    model = model_class(variant=variant) if variant is not None else model_class()
+    send_lock = threading.Lock()
+    running = set()
+    cancelled = set()
+    # Objects the model handed out (e.g. chat sessions), addressed as (handle, attribute)
+    objects = {}
+
+    def send(kind, call_id, payload):
+        blocks = []
+        message = (kind, call_id, to_wire(payload, blocks))
+        try:
+            with send_lock:
+                conn.send(message)
+        except Exception:
+            _close_blocks(blocks, unlink=True)
+            raise
+        _close_blocks(blocks)
+
+    def bind(call_id, value):
+        if not isinstance(value, _Callback):
+            return value
+        if value.name == "should_stop":
+            return lambda: call_id in cancelled
+        return lambda *args: send("progress", call_id, (value.name, args))
+
+    def resolve(name):
+        if not isinstance(name, tuple):
+            return model, name
+        handle, attribute = name
+        if handle not in objects:
+            raise LookupError(f"object {handle} no longer exists in the worker")
+        return objects[handle], attribute
+
+    def run(op, call_id, name, args, kwargs):
+        try:
+            args = from_wire(args)
+            kwargs = {key: bind(call_id, item) for key, item in from_wire(kwargs).items()}
+            target, name = resolve(name)
+            if op == "get":
+                send("result", call_id, getattr(target, name))
+            elif op == "set":
+                setattr(target, name, args[0])
+                send("result", call_id, None)
+            elif op == "call":
+                send("result", call_id, getattr(target, name)(*args, **kwargs))
+            elif op == "new":
+                # The result stays here; the caller gets a handle to address it
+                objects[call_id] = getattr(target, name)(*args, **kwargs)
+                send("result", call_id, call_id)
+            else:
+                pieces = getattr(target, name)(*args, **kwargs)
+                try:
+                    for piece in pieces:
+                        if call_id in cancelled:
+                            break
+                        send("piece", call_id, piece)
+                finally:
+                    pieces.close()
+                send("done", call_id, None)
+        except Exception as e:
+            try:
+                send("error", call_id, f"{type(e).__name__}: {str(e)}")
+            except Exception:
+                logging.exception(f"Could not report error from {class_name}.{name}")
+        finally:
+            running.discard(call_id)
+            cancelled.discard(call_id)
+
+    pool = ThreadPoolExecutor(max_workers=settings.get("threads", 4), thread_name_prefix="hosted-model")
+    while True:
+        try:
+            op, call_id, name, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            break  # parent went away
+        if op == "exit":
+            break
+        if op == "ping":
+            # Answered here, not on the pool, so a busy model still shows it is alive
+            send("pong", call_id, {"pid": os.getpid(), "rss_mb": process_rss_mb(), "busy": len(running)})
+        elif op == "cancel":
+            if name in running:
+                cancelled.add(name)
+        elif op == "drop":
+            objects.pop(name, None)
+        else:
+            running.add(call_id)
+            pool.submit(run, op, call_id, name, args, kwargs)
+    conn.close()
+    # Running generations are abandoned rather than joined
+    os._exit(0)
+
+
+class WorkerProcess:
+    """
+    One lifetime of a worker process hosting a model, driven over a pipe.
+    A reader thread routes replies to the waiting calls by call id; when the
+    pipe breaks every pending call fails with WorkerCrashed and on_exit runs.
+    """
+
+    def __init__(self, module, class_name, variant=None, settings=None, on_exit=None):
+        # spawn, not fork: forking a process that runs Tk and torch thread pools is unsafe
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, name=f"model-{class_name}", daemon=True,
+                                       args=(child_conn, module, class_name, variant, settings or {}))
+        self.process.start()
+        child_conn.close()
+        self.on_exit = on_exit
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._exited = False
+        threading.Thread(target=self._read, name=f"model-{class_name}-reader", daemon=True).start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def alive(self):
+        return not self._exited and self.process.is_alive()
+
+    @property
+    def exitcode(self):
+        return self.process.exitcode
+
+    def _read(self):
+        while True:
+            try:
+                kind, call_id, payload = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                replies = self._pending.get(call_id)
+            if replies is None:
+                release(payload)  # the caller stopped listening (e.g. a closed stream)
+            else:
+                replies.put((kind, payload))
+        self.process.join(timeout=5)
+        with self._lock:
+            self._exited = True
+            pending, self._pending = list(self._pending.values()), {}
+        for replies in pending:
+            replies.put(("exit", None))
+        if self.on_exit:
+            self.on_exit(self)
+
+    def _send(self, message):
+        try:
+            with self._send_lock:
+                self._conn.send(message)
+        except (OSError, EOFError, ValueError) as e:
+            raise WorkerCrashed(f"worker process {self.pid} is not running ({str(e)})")
+
+    def _register(self):
+        replies = queue.Queue()
+        with self._lock:
+            if self._exited:
+                raise WorkerCrashed(f"worker process {self.pid} exited with code {self.exitcode}")
+            call_id = next(self._ids)
+            self._pending[call_id] = replies
+        return call_id, replies
+
+    def _unregister(self, call_id):
+        with self._lock:
+            self._pending.pop(call_id, None)
+
+    def events(self, op, name=None, args=(), kwargs=None):
+        """
+        Send one request and yield its (kind, payload) replies until it finishes.
+        Callable keyword arguments stay in this process: should_stop is polled and
+        turned into a cancel message, other callbacks are called with the
+        arguments the worker reports.
+        """
+        kwargs = dict(kwargs or {})
+        callbacks = {key: value for key, value in kwargs.items() if callable(value)}
+        should_stop = callbacks.pop("should_stop", None)
+        kwargs.update({key: _Callback(key) for key in list(callbacks) + (["should_stop"] if should_stop else [])})
+
+        call_id, replies = self._register()
+        blocks = []
+        finished = False
+        try:
+            self._send((op, call_id, name, to_wire(tuple(args), blocks), to_wire(kwargs, blocks)))
+            _close_blocks(blocks)
+            stop_sent = False
+            while True:
+                # Checked after every reply as well as on the timeout: a fast stream never times out
+                if should_stop and not stop_sent and should_stop():
+                    self._cancel(call_id)
+                    stop_sent = True
+                try:
+                    kind, payload = replies.get(timeout=0.1 if should_stop and not stop_sent else None)
+                except queue.Empty:
+                    continue
+                if kind == "exit":
+                    raise WorkerCrashed(f"worker process {self.pid} exited with code {self.exitcode}")
+                payload = from_wire(payload)
+                if kind == "progress":
+                    callback_name, callback_args = payload
+                    callbacks[callback_name](*callback_args)
+                    continue
+                finished = kind in ("result", "error", "done")
+                yield kind, payload
+                if finished:
+                    return
+        finally:
+            self._unregister(call_id)
+            # The worker copies inputs out on arrival, so they can go once the call is over
+            _close_blocks(blocks, unlink=True)
+            if not finished:
+                self._cancel(call_id)
+
+    def _cancel(self, call_id):
+        try:
+            self._send(("cancel", None, call_id, (), {}))
+        except WorkerCrashed:
+            pass
+
+    def call(self, op, name=None, args=(), kwargs=None):
+        """Run one request to completion and return its result (raises WorkerError/WorkerCrashed)"""
+        for kind, payload in self.events(op, name, args, kwargs):
+            if kind == "error":
+                raise WorkerError(payload)
+            if kind == "result":
+                return payload
+
+    def stream(self, name, args=(), kwargs=None):
+        """Yield the pieces of a generator method; closing this generator cancels it in the worker"""
+        for kind, payload in self.events("stream", name, args, kwargs):
+            if kind == "error":
+                raise WorkerError(payload)
+            if kind == "piece":
+                yield payload
+
+    def ping(self, timeout=10.0):
+        """Round trip through the worker's main loop; returns its pid, RSS and busy call count"""
+        call_id, replies = self._register()
+        try:
+            started = time.perf_counter()
+            self._send(("ping", call_id, None, (), {}))
+            try:
+                kind, payload = replies.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"worker process {self.pid} did not answer within {timeout:.0f}s")
+            if kind == "exit":
+                raise WorkerCrashed(f"worker process {self.pid} exited with code {self.exitcode}")
+            return dict(payload, ping_ms=(time.perf_counter() - started) * 1000)
+        finally:
+            self._unregister(call_id)
+
+    def stop(self, timeout=5.0):
+        """Ask the worker to exit; terminate it if it does not"""
+        try:
+            self._send(("exit", None, None, (), {}))
+        except WorkerCrashed:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def kill(self):
+        """Hard stop for a hung worker; pending calls fail with WorkerCrashed"""
+        self.process.kill()
+
+    def drop(self, handle):
+        """Forget an object created with the "new" op"""
+        try:
+            self._send(("drop", None, handle, (), {}))
+        except WorkerCrashed:
+            pass
+
+
+class HostedObject:
+    """
+    Proxy for an object a hosted model returned (e.g. a ChatSession): methods and
+    attributes are forwarded to the worker, and the object is dropped there once
+    this proxy is garbage collected. A restarted worker no longer has it.
+    """
+
+    def __init__(self, worker, handle):
+        object.__setattr__(self, "_worker", worker)
+        object.__setattr__(self, "_handle", handle)
+        weakref.finalize(self, worker.drop, handle)
+
+    @property
+    def worker(self):
+        return self._worker
+
+    def _call(self, name, *args, **kwargs):
+        return self._worker.call("call", (self._handle, name), args, kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._worker.call("get", (self._handle, name))
+
+    def __setattr__(self, name, value):
+        self._worker.call("set", (self._handle, name), (value,))
+
+
+class HostedChatSession(HostedObject):
+    """ChatSession running in the worker process"""
+
+    def send(self, text):
+        return self._call("send", text)
+
+    def reset(self):
+        return self._call("reset")
+
+
+class ProcessHostedModel(AIModel):
+    """
+    Proxy for a model that loads and runs in its own worker process
+    (Polymorphism: same interface as the hosted model). A crash in the model
+    or a native backend only takes down the worker: the proxy restarts it and
+    reloads the model with the same arguments. Unloading stops the process,
+    which returns all of its memory to the system.
+    """
+
+    # The hosted model coalesces identical requests itself
+    single_flight_methods = ()
+
+    def __init__(self, spec, variant=None, settings=None, health_interval=5.0, ping_timeout=10.0,
+                 max_restarts=3, restart_window=60.0):
+        self.spec = spec
+        self.model_id = spec.model_id
+        self.display_name = spec.name
+        self.input_type = spec.input_type
+        self.hardware = spec.hardware
+        self.variants = spec.variants
+        self.backends = spec.backends
+        self._variant = variant
+        self._hf_id = variant.get("hf_id") if isinstance(variant, dict) else spec.hf_id
+        AIModel.__init__(self,
+                         variant["name"] if isinstance(variant, dict) else spec.name,
+                         spec.category,
+                         spec.description)
+        self.settings = settings
+        self.health_interval = health_interval
+        self.ping_timeout = ping_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.restarts = 0
+        self.last_exit = None
+        self.last_health = None
+        self._worker = None
+        self._load_kwargs = None
+        # Settings applied through the proxy, replayed when a restarted worker reloads
+        self._settings_calls = {}
+        self._restart_times = deque()
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._ready.set()
+        self._closed = threading.Event()
+        self._monitor = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.alive:
+                self._worker = WorkerProcess(self.spec.module, self.spec.class_name, self._variant,
+                                             self.settings if self.settings is not None else host_settings(),
+                                             on_exit=self._worker_exited)
+                self._closed.clear()
+                if self._monitor is None or not self._monitor.is_alive():
+                    self._monitor = threading.Thread(target=self._watch, name=f"{self.model_id}-health",
+                                                     daemon=True)
+                    self._monitor.start()
+            return self._worker
+
+    def _call(self, name, *args, **kwargs):
+        self._ready.wait()
+        return self._ensure_worker().call("call", name, args, kwargs)
+
+    def _stream(self, name, *args, **kwargs):
+        self._ready.wait()
+        yield from self._ensure_worker().stream(name, args, kwargs)
+
+    def _watch(self):
+        """Health check: ping the worker every health_interval; kill it if it stops answering"""
+        while not self._closed.wait(self.health_interval):
+            worker = self._worker
+            if worker is None or not worker.alive:
+                continue
+            try:
+                self.last_health = worker.ping(self.ping_timeout)
+            except TimeoutError as e:
+                logging.error(f"{self}: {str(e)}, restarting it")
+                worker.kill()
+            except WorkerCrashed:
+                pass  # _worker_exited handles it
+
+    def _worker_exited(self, worker):
+        """Reader thread of a finished worker: restart and reload if it was not stopped on purpose"""
+        with self._lock:
+            if worker is not self._worker:
+                return
+            self._worker = None
+            self.last_exit = worker.exitcode
+            logging.error(f"{self}: worker process {worker.pid} exited with code {worker.exitcode}")
+            if self._load_kwargs is None:
+                return  # nothing loaded: the next call starts a fresh worker
+            now = time.monotonic()
+            while self._restart_times and now - self._restart_times[0] > self.restart_window:
+                self._restart_times.popleft()
+            if len(self._restart_times) >= self.max_restarts:
+                logging.error(f"{self}: {self.max_restarts} crashes within {self.restart_window:.0f}s, "
+                              f"not restarting")
+                self._load_kwargs = None
+                self._is_loaded = False
+                return
+            self._restart_times.append(now)
+            self.restarts += 1
+            # Calls wait for the reload instead of reaching a worker whose model is not loaded yet
+            self._ready.clear()
+        try:
+            logging.info(f"{self}: restarting worker ({self.restarts} restart(s))")
+            result = self._load(**self._load_kwargs)
+            if not self._is_loaded:
+                logging.error(f"{self}: reload after restart failed: {result}")
+        finally:
+            self._ready.set()
+
+    def _load(self, **load_kwargs):
+        worker = self._ensure_worker()
+        result = worker.call("call", "load_model", (), load_kwargs)
+        self._is_loaded = worker.call("get", "_is_loaded")
+        self._load_kwargs = load_kwargs if self._is_loaded else None
+        for name, (op, kwargs) in list(self._settings_calls.items()):
+            worker.call(op, name, (), kwargs)
+        return result
+
+    def load_model(self, **load_kwargs):
+        """Start the worker process (if needed) and load the model inside it"""
+        self._ready.wait()
+        try:
+            return self._load(**load_kwargs)
+        except (WorkerCrashed, WorkerError) as e:
+            return f"Error loading model: {str(e)}"
+
+    def unload_model(self):
+        """Stop the worker process; load_model() starts a new one"""
+        self.shutdown()
+        return f"{self._model_name} unloaded"
+
+    def shutdown(self):
+        with self._lock:
+            worker, self._worker = self._worker, None
+            self._load_kwargs = None
+            self._is_loaded = False
+            self._closed.set()
+        if worker is not None:
+            worker.stop()
+
+    def process_input(self, input_data):
+        """Polymorphism: run the hosted model's process_input in the worker"""
+        try:
+            return self._call("process_input", input_data)
+        except (WorkerCrashed, WorkerError) as e:
+            return f"Error: {str(e)}"
+
+    def health(self):
+        """Ping the worker now: pid, RSS, busy calls and round-trip time, plus restart count"""
+        worker = self._worker
+        status = {"alive": worker is not None and worker.alive, "restarts": self.restarts,
+                  "last_exit": self.last_exit}
+        if status["alive"]:
+            try:
+                self.last_health = worker.ping(self.ping_timeout)
+                status.update(self.last_health)
+            except (TimeoutError, WorkerCrashed) as e:
+                status.update(alive=False, error=str(e))
+        return status
+
+    @property
+    def model_info(self):
+        """Method Overriding: info reported by the hosted model, plus the worker's state"""
+        worker = self._worker
+        info = None
+        if worker is not None and worker.alive:
+            try:
+                info = worker.call("get", "model_info")
+            except (WorkerCrashed, WorkerError):
+                pass
+        if not isinstance(info, dict):
+            info = {"name": self._model_name, "category": self._category,
+                    "description": self._description, "loaded": self._is_loaded}
+        info["process"] = dict(self.last_health or {}, alive=worker is not None and worker.alive,
+                               pid=worker.pid if worker is not None else None,
+                               restarts=self.restarts, last_exit=self.last_exit)
+        return info
+
+    def memory_footprint_mb(self):
+        """Weights measured in the worker, else the worker's whole RSS"""
+        try:
+            return self._call("memory_footprint_mb") or self.health().get("rss_mb") or 0
+        except (WorkerCrashed, WorkerError):
+            return 0
+
+    def estimated_memory_mb(self, **load_kwargs):
+        """Asked of the hosted model (it knows e.g. that remote backends keep no weights)"""
+        try:
+            return self._call("estimated_memory_mb", **load_kwargs)
+        except (WorkerCrashed, WorkerError):
+            return super().estimated_memory_mb(**load_kwargs)
+
+
+class ProcessHostedStreamingModel(ProcessHostedModel):
+    """Hosted text model whose reply arrives piece by piece"""
+
+    def stream_input(self, user_input, should_stop=None, **settings):
+        """Pieces are forwarded as the worker yields them; closing this generator cancels it"""
+        yield from self._stream("stream_input", user_input, should_stop=should_stop, **settings)
+
+    def configure_generation(self, **settings):
+        """Forwarded to the hosted model; kept so a restarted worker gets the same settings"""
+        result = self._call("configure_generation", **settings)
+        merged = dict(self._settings_calls.get("configure_generation", ("call", {}))[1])
+        merged.update((key, value) for key, value in settings.items() if value is not None)
+        self._settings_calls["configure_generation"] = ("call", merged)
+        return result
+
+
+class ProcessHostedChatModel(ProcessHostedStreamingModel):
+    """Hosted text generator: chat sessions and the micro-batcher live in the worker too"""
+
+    def create_session(self, **session_kwargs):
+        """Start a conversation whose KV cache stays in the worker; a restart ends it"""
+        self._ready.wait()
+        worker = self._ensure_worker()
+        return HostedChatSession(worker, worker.call("new", "create_session", (), session_kwargs))
+
+    def session_is_current(self, session):
+        """False once the session's worker has been restarted or stopped"""
+        return (isinstance(session, HostedChatSession) and self._is_loaded
+                and session.worker is self._worker and session.worker.alive)
+
+    def enable_batching(self, max_batch_size=8, max_wait_ms=20):
+        """Batch process_input calls in the worker; a restarted worker batches again"""
+        kwargs = {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms}
+        self._ready.wait()
+        self._ensure_worker().call("new", "enable_batching", (), kwargs)
+        self._settings_calls["enable_batching"] = ("new", kwargs)
+
+    def disable_batching(self):
+        self._settings_calls.pop("enable_batching", None)
+        return self._call("disable_batching")
+
+    @property
+    def batching_stats(self):
+        """Read from the worker; None when batching is off or no worker is running"""
+        worker = self._worker
+        if worker is None or not worker.alive:
+            return None
+        try:
+            return worker.call("get", "batching_stats")
+        except (WorkerCrashed, WorkerError):
+            return None
+
+    def compare_assisted(self, prompts, assistant="auto", max_new_tokens=64):
+        """Run the hosted model's assisted decoding comparison in the worker"""
+        return self._call("compare_assisted", list(prompts), assistant=assistant, max_new_tokens=max_new_tokens)
+
+
+class ProcessHostedImageModel(ProcessHostedModel):
+    """Hosted text-to-image model; the image comes back through shared memory"""
+
+    def generate_image(self, text_prompt, progress_callback=None, should_stop=None, preview=None):
+        """Same signature as TextToImageModel.generate_image"""
+        try:
+            return self._call("generate_image", text_prompt, progress_callback=progress_callback,
+                              should_stop=should_stop, preview=preview)
+        except (WorkerCrashed, WorkerError) as e:
+            return f"Error generating image: {str(e)}"
+
+
+class ProcessHostedClassifierModel(ProcessHostedModel):
+    """Hosted image classifier; decoding and preprocessing run in the worker, outside the GIL of the GUI"""
+
+    def classify_batch(self, image_paths, batch_size=16, num_workers=4, prefetch_batches=2):
+        """Same as ImageClassifierModel.classify_batch, one list of (path, result) pairs per batch"""
+        yield from self._stream("classify_batch", list(image_paths), batch_size=batch_size,
+                                num_workers=num_workers, prefetch_batches=prefetch_batches)
+
+    def list_images(self, folder):
+        """Listing a folder needs no model, so it runs in this process"""
+        return self.spec.load_class().list_images(folder)
+
+
+class ProcessRegistry:
+    """ModelRegistry look-alike whose models each run in a dedicated worker process"""
+
+    def __init__(self, registry=None, **host_options):
+        self._registry = registry or default_registry
+        self._host_options = host_options
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return self._registry.names()
+
+    def specs(self):
+        return self._registry.specs()
+
+    def spec(self, name):
+        """Look a spec up by display name or model_id"""
+        return self._registry.spec(name)
+
+    def is_created(self, name):
+        spec = self.spec(name)
+        return spec is not None and spec.name in self._instances
+
+    def get(self, name, variant=None):
+        """Return the proxy for a model, creating it on first use (the process starts on load)"""
+        with self._lock:
+            spec = self.spec(name)
+            if spec is None:
+                return None
+            if spec.name not in self._instances:
+                if variant is None and spec.variants:
+                    available = available_memory_mb() if self._registry.prefer_low_memory else None
+                    variant = spec.select_variant(available)
+                # Importing the model module is cheap: heavy imports happen in load_model()
+                model_class = spec.load_class()
+                if hasattr(model_class, "generate_image"):
+                    proxy_class = ProcessHostedImageModel
+                elif hasattr(model_class, "create_session"):
+                    proxy_class = ProcessHostedChatModel
+                elif hasattr(model_class, "stream_input"):
+                    proxy_class = ProcessHostedStreamingModel
+                elif hasattr(model_class, "classify_batch"):
+                    proxy_class = ProcessHostedClassifierModel
+                else:
+                    proxy_class = ProcessHostedModel
+                self._instances[spec.name] = proxy_class(spec, variant, **self._host_options)
+            return self._instances[spec.name]
+
+    def shutdown(self):
+        """Stop every worker process"""
+        with self._lock:
+            models = list(self._instances.values())
+        for model in models:
+            model.shutdown()
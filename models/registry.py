@@ -0,0 +1,200 @@
+import ast
+import importlib
+import logging
+import os
+import threading
+
+ENTRY_POINT_GROUP = "hit137_ai_gui.models"
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Class attributes an AIModel subclass declares for the registry
+METADATA_FIELDS = ("model_id", "display_name", "category", "description",
+                   "input_type", "hardware", "variants", "backends")
+
+
+def available_memory_mb():
+    """Memory available to new allocations in MB, or None if it cannot be determined"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available // (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+class ModelSpec:
+    """Name and metadata of a model; the implementing module is only imported on demand"""
+
+    def __init__(self, module, class_name, model_id, display_name, category="", description="",
+                 input_type="text", hardware="cpu", variants=None, backends=None):
+        self.module = module
+        self.class_name = class_name
+        self.model_id = model_id
+        self.name = display_name
+        self.category = category
+        self.description = description
+        self.input_type = input_type
+        self.hardware = hardware
+        # Ordered best (largest) first; each is a dict with name, hf_id and memory_mb
+        self.variants = list(variants or [])
+        self.backends = list(backends or ["eager"])
+
+    @classmethod
+    def from_class(cls, model_class):
+        """Build a spec from an already imported AIModel subclass (used for entry points)"""
+        metadata = {field: getattr(model_class, field, None) for field in METADATA_FIELDS}
+        metadata = {k: v for k, v in metadata.items() if v is not None}
+        return cls(model_class.__module__, model_class.__name__, **metadata)
+
+    @property
+    def hf_id(self):
+        return self.variants[0].get("hf_id") if self.variants else None
+
+    @property
+    def memory_mb(self):
+        return self.variants[0].get("memory_mb", 0) if self.variants else 0
+
+    def select_variant(self, available_mb=None, headroom=0.8):
+        """Pick the best variant that fits in the available memory, else the smallest one"""
+        if not self.variants:
+            return None
+        if available_mb is None:
+            return self.variants[0]
+        for variant in self.variants:
+            if variant.get("memory_mb", 0) <= available_mb * headroom:
+                return variant
+        return min(self.variants, key=lambda v: v.get("memory_mb", 0))
+
+    def load_class(self):
+        """Import the model module and return its AIModel subclass"""
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def __repr__(self):
+        return f"ModelSpec({self.model_id!r}, {self.module}.{self.class_name})"
+
+
+def _literal_class_attributes(class_node):
+    """Class-level NAME = <literal> assignments, evaluated without importing the module"""
+    attributes = {}
+    for node in class_node.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                attributes[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return attributes
+
+
+def scan_models_dir(directory=MODELS_DIR, package="models"):
+    """Find AIModel subclasses in directory by parsing the source (no imports)"""
+    specs = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".py"):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError) as e:
+            logging.warning(f"Skipping {path}: {str(e)}")
+            continue
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            base_names = {base.id for base in node.bases if isinstance(base, ast.Name)}
+            if "AIModel" not in base_names:
+                continue
+            attributes = _literal_class_attributes(node)
+            if "model_id" not in attributes or "display_name" not in attributes:
+                continue
+            metadata = {k: v for k, v in attributes.items() if k in METADATA_FIELDS}
+            specs.append(ModelSpec(f"{package}.{filename[:-3]}", node.name, **metadata))
+    return specs
+
+
+def entry_point_specs(group=ENTRY_POINT_GROUP):
+    """Specs for models installed by other packages under the given entry point group"""
+    from importlib.metadata import entry_points
+
+    try:
+        points = entry_points(group=group)
+    except TypeError:
+        # Python < 3.10
+        points = entry_points().get(group, [])
+
+    specs = []
+    for point in points:
+        try:
+            specs.append(ModelSpec.from_class(point.load()))
+        except Exception as e:
+            logging.warning(f"Could not load model plugin {point.name}: {str(e)}")
+    return specs
+
+
+class ModelRegistry:
+    """
+    Keeps model specs and lazily creates one instance per model.
+    Nothing heavy (torch, transformers) is imported until get() is called and the
+    model's load_model() or process_input() runs.
+    """
+
+    def __init__(self, prefer_low_memory=True):
+        self._specs = {}
+        self._aliases = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+        self.prefer_low_memory = prefer_low_memory
+
+    def register(self, spec):
+        self._specs[spec.name] = spec
+        self._aliases[spec.model_id] = spec.name
+        return spec
+
+    def discover(self, directory=MODELS_DIR, include_entry_points=True):
+        """Register every model found in the models/ folder and installed plugins"""
+        for spec in scan_models_dir(directory):
+            self.register(spec)
+        if include_entry_points:
+            for spec in entry_point_specs():
+                self.register(spec)
+        return self
+
+    def names(self):
+        return list(self._specs)
+
+    def specs(self):
+        return list(self._specs.values())
+
+    def spec(self, name):
+        """Look a spec up by display name or model_id"""
+        return self._specs.get(name) or self._specs.get(self._aliases.get(name))
+
+    def is_created(self, name):
+        spec = self.spec(name)
+        return spec is not None and spec.name in self._instances
+
+    def get(self, name, variant=None):
+        """Return the shared instance for a model, creating it on first use"""
+        with self._lock:
+            spec = self.spec(name)
+            if spec is None:
+                return None
+            if spec.name not in self._instances:
+                if variant is None and spec.variants:
+                    available = available_memory_mb() if self.prefer_low_memory else None
+                    variant = spec.select_variant(available)
+                if variant is not None:
+                    self._instances[spec.name] = spec.load_class()(variant=variant)
+                else:
+                    self._instances[spec.name] = spec.load_class()()
+            return self._instances[spec.name]
+
+
+registry = ModelRegistry().discover()
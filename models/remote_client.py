@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import random
+import threading
+
+DEFAULT_API_URL = "https://api-inference.huggingface.co/models"
+
+
+class RemoteInferenceError(Exception):
+    """Non-retryable HTTP error, or retries exhausted, from the remote inference API"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class RemoteInferenceClient:
+    """
+    Pooled, keep-alive async HTTP client for a Hugging Face style inference API.
+    - one aiohttp session (connection pool) reused for every request
+    - at most max_concurrency requests in flight
+    - 503 "model loading" and 429 responses are retried with exponential backoff
+    - identical in-flight requests are coalesced into a single HTTP call
+    The client owns an event loop on a background thread, so synchronous callers
+    (the GUI worker pool, CLI) can use infer() directly.
+    """
+
+    def __init__(self, base_url=None, token=None, max_concurrency=4, timeout_seconds=120,
+                 max_retries=6, backoff_base=1.0, backoff_max=30.0):
+        self.base_url = (base_url or os.environ.get("HF_API_URL") or DEFAULT_API_URL).rstrip("/")
+        self.token = token if token is not None else os.environ.get("HF_API_TOKEN")
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._inflight = {}
+        self._start_lock = threading.Lock()
+        self.stats = {"requests": 0, "http_calls": 0, "coalesced": 0, "retries": 0}
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="remote-inference-loop", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    async def _get_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise RemoteInferenceError("Remote inference needs aiohttp: pip install aiohttp")
+
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _backoff_delay(self, attempt, suggested=None):
+        delay = self.backoff_base * (2 ** attempt)
+        if suggested:
+            delay = max(delay, float(suggested))
+        # Jitter so coalesced-but-distinct requests do not retry in lockstep
+        return min(self.backoff_max, delay) * random.uniform(0.8, 1.2)
+
+    async def _post_with_retry(self, model_id, payload):
+        session = await self._get_session()
+        url = f"{self.base_url}/{model_id}"
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                self.stats["http_calls"] += 1
+                async with session.post(url, json=payload) as response:
+                    body = await response.read()
+                    if response.status < 400:
+                        return body, response.headers.get("Content-Type", "")
+
+                    if response.status in (503, 429) and attempt < self.max_retries:
+                        suggested = None
+                        try:
+                            suggested = json.loads(body).get("estimated_time")
+                        except (ValueError, AttributeError):
+                            pass
+                        self.stats["retries"] += 1
+                        await asyncio.sleep(self._backoff_delay(attempt, suggested))
+                        continue
+
+                    message = body.decode("utf-8", errors="replace")[:500]
+                    raise RemoteInferenceError(f"HTTP {response.status} from {url}: {message}",
+                                               status=response.status)
+        raise RemoteInferenceError(f"{model_id} still unavailable after {self.max_retries} retries", status=503)
+
+    async def infer_async(self, model_id, payload):
+        """POST payload to the model and return (body bytes, content type)"""
+        self.stats["requests"] += 1
+        key = (model_id, json.dumps(payload, sort_keys=True))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post_with_retry(model_id, payload))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: one caller timing out must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def infer(self, model_id, payload, timeout=None):
+        """Blocking wrapper around infer_async, safe to call from any thread"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self.infer_async(model_id, payload), loop)
+        return future.result(timeout)
+
+    def close(self):
+        """Close the connection pool and stop the event loop"""
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(10)
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop = None
@@ -0,0 +1,178 @@
+import base64
+import io
+import json
+import os
+import threading
+import urllib.request
+
+from models.base_model import AIModel
+from models.registry import ModelSpec
+
+
+def _request(url, body=None, timeout=600):
+    """POST body as JSON (GET when None) and return the open response"""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET",
+                                     headers={"Content-Type": "application/json"})
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+def _json(url, body=None, timeout=600):
+    with _request(url, body, timeout) as response:
+        return json.loads(response.read())
+
+
+class RemoteModel(AIModel):
+    """
+    Thin-client proxy for a model hosted by server.py (Polymorphism: same interface
+    as the local models, but load/run happen in the server process)
+    """
+
+    def __init__(self, base_url, description):
+        self.base_url = base_url.rstrip("/")
+        self.model_id = description["model_id"]
+        self.display_name = description["display_name"]
+        self.input_type = description["input_type"]
+        self.hardware = "network"
+        self.variants = description["variants"]
+        self.backends = description["backends"]
+        self._hf_id = self.variants[0]["hf_id"] if self.variants else None
+        AIModel.__init__(self,
+                         self.display_name,
+                         description["category"],
+                         description["description"])
+        self._is_loaded = description.get("loaded", False)
+
+    @property
+    def _url(self):
+        return f"{self.base_url}/models/{self.model_id}"
+
+    @property
+    def model_info(self):
+        """Method Overriding: info reported by the server (falls back to local state)"""
+        try:
+            info = _json(self._url, timeout=5)
+            self._is_loaded = info.get("loaded", self._is_loaded)
+            info["description"] = f"{info.get('description', '')} [served by {self.base_url}]"
+            return info
+        except Exception:
+            return {"name": self._model_name, "category": self._category,
+                    "description": self._description, "loaded": self._is_loaded}
+
+    def load_model(self, **load_kwargs):
+        """Ask the server to load the model (shared by every client)"""
+        try:
+            response = _json(f"{self._url}/load", load_kwargs)
+            self._is_loaded = response["loaded"]
+            return response["message"]
+        except Exception as e:
+            return f"Error loading model: {str(e)}"
+
+    def unload_model(self):
+        """Ask the server to release the weights"""
+        response = _json(f"{self._url}/unload", {})
+        self._is_loaded = response["loaded"]
+        return response["message"]
+
+    def estimated_memory_mb(self, **load_kwargs):
+        """Weights live in the server process"""
+        return 0
+
+    def _decode(self, response):
+        if "error" in response:
+            return response["error"]
+        if "image" in response:
+            from PIL import Image
+            return Image.open(io.BytesIO(base64.b64decode(response["image"])))
+        return response["text"]
+
+    def process_input(self, input_data):
+        """Polymorphism: send the input to the server; image files are uploaded"""
+        try:
+            if self.input_type == "image":
+                with open(input_data, "rb") as f:
+                    body = {"image_base64": base64.b64encode(f.read()).decode("ascii"),
+                            "filename": os.path.basename(input_data)}
+            else:
+                body = {"input": input_data}
+            return self._decode(_json(f"{self._url}/predict", body))
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+
+class RemoteStreamingModel(RemoteModel):
+    """Remote text model whose reply arrives piece by piece"""
+
+    def stream_input(self, user_input, should_stop=None):
+        """Yield decoded chunks of the server's chunked response; closing it stops generation"""
+        import codecs
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with _request(f"{self._url}/stream", {"input": user_input}) as response:
+            while not (should_stop and should_stop()):
+                # read1 returns whatever chunk has arrived instead of waiting for n bytes
+                data = response.read1(4096)
+                if not data:
+                    break
+                piece = decoder.decode(data)
+                if piece:
+                    yield piece
+
+
+class RemoteImageModel(RemoteModel):
+    """Remote text-to-image model"""
+
+    def generate_image(self, text_prompt, progress_callback=None, should_stop=None, preview=False):
+        """Same signature as TextToImageModel.generate_image; progress is not reported"""
+        try:
+            response = _json(f"{self._url}/predict", {"input": text_prompt, "preview": bool(preview)})
+            return self._decode(response)
+        except Exception as e:
+            return f"Error generating image: {str(e)}"
+
+
+class RemoteRegistry:
+    """ModelRegistry look-alike listing the models a server offers"""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self._descriptions = {d["display_name"]: d for d in _json(f"{self.base_url}/models", timeout=timeout)}
+        self._specs = {name: ModelSpec(d["module"], d["class_name"], d["model_id"], name,
+                                       category=d["category"], description=d["description"],
+                                       input_type=d["input_type"], hardware="network",
+                                       variants=d["variants"], backends=d["backends"])
+                       for name, d in self._descriptions.items()}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return list(self._specs)
+
+    def specs(self):
+        return list(self._specs.values())
+
+    def spec(self, name):
+        """Look a spec up by display name or model_id"""
+        if name in self._specs:
+            return self._specs[name]
+        return next((s for s in self._specs.values() if s.model_id == name), None)
+
+    def is_created(self, name):
+        spec = self.spec(name)
+        return spec is not None and spec.name in self._instances
+
+    def get(self, name, variant=None):
+        with self._lock:
+            spec = self.spec(name)
+            if spec is None:
+                return None
+            if spec.name not in self._instances:
+                description = self._descriptions[spec.name]
+                if description["image_output"]:
+                    model_class = RemoteImageModel
+                elif description["stream"]:
+                    model_class = RemoteStreamingModel
+                else:
+                    model_class = RemoteModel
+                self._instances[spec.name] = model_class(self.base_url, description)
+            return self._instances[spec.name]
@@ -0,0 +1,198 @@
+import threading
+
+
+class _Call:
+    def __init__(self, owner):
+        self.owner = owner
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Callback dicts of the callers still attached; guarded by condition
+        self.callers = []
+        self.condition = threading.Condition()
+
+
+class _StreamCall(_Call):
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.pieces = []
+        self.finished = False
+        self.iterator = None
+        self.driving = True    # the leader drives from the start
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller (the leader)
+    runs the function and later callers wait for it and get the same result or
+    exception. Nothing is kept once the call completes; repeated requests after
+    that are the result cache's job.
+
+    Callbacks stay per caller: the function gets a should_stop that is true only
+    once every attached caller wants to stop, and other callbacks (progress) are
+    called for every caller. A streaming caller that stops on its own detaches;
+    if it was driving the generator, a remaining caller takes over, so nobody is
+    handed a truncated stream as if it were complete.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        return {"leaders": self.leaders, "shared": self.shared, "in_flight": self.in_flight}
+
+    def _join(self, key, call_class, callbacks):
+        """Return (call, role) where role is "leader", "follower" or "reentrant" """
+        me = threading.get_ident()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.owner == me:
+                # The leader calling itself again (e.g. through super()): must not wait on itself
+                return call, "reentrant"
+            if call is None:
+                call = self._calls[key] = call_class(me)
+                role = "leader"
+                self.leaders += 1
+            else:
+                role = "follower"
+                self.shared += 1
+            with call.condition:
+                call.callers.append(callbacks)
+            return call, role
+
+    def _leave(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    @staticmethod
+    def _all_stopped(call):
+        with call.condition:
+            callers = list(call.callers)
+        return all(caller["should_stop"]() for caller in callers)
+
+    def _shared_callbacks(self, call, names):
+        """Callbacks for the shared computation, combining those of every attached caller"""
+        def combine(name):
+            if name == "should_stop":
+                return lambda: self._all_stopped(call)
+
+            def broadcast(*args):
+                with call.condition:
+                    callers = list(call.callers)
+                for caller in callers:
+                    caller[name](*args)
+            return broadcast
+        return {name: combine(name) for name in names}
+
+    def do(self, key, func, callbacks=None):
+        """Run func(**shared_callbacks) once for all concurrent callers with the same key"""
+        callbacks = callbacks or {}
+        call, role = self._join(key, _Call, callbacks)
+        if role == "reentrant":
+            return func(**callbacks)
+        if role == "follower":
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(**self._shared_callbacks(call, callbacks))
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._leave(key, call)
+            call.done.set()
+
+    def stream(self, key, func, callbacks=None):
+        """Generator version: every caller gets all pieces, whoever happens to be driving the generator"""
+        callbacks = callbacks or {}
+        call, role = self._join(key, _StreamCall, callbacks)
+        if role == "reentrant":
+            yield from func(**callbacks)
+            return
+        if role == "leader":
+            call.iterator = iter(func(**self._shared_callbacks(call, callbacks)))
+        yield from self._participate(key, call, callbacks, driving=role == "leader")
+
+    def _participate(self, key, call, callbacks, driving):
+        own_stop = callbacks.get("should_stop")
+
+        def gave_up():
+            # Stopping alone means leaving; when everyone stops, the generator winds down itself
+            return own_stop is not None and own_stop() and not self._all_stopped(call)
+
+        index = 0
+        try:
+            while not gave_up():
+                if driving:
+                    try:
+                        piece = next(call.iterator)
+                    except StopIteration:
+                        self._finish(key, call)
+                        return
+                    except BaseException as e:
+                        self._finish(key, call, e)
+                        raise
+                    with call.condition:
+                        call.pieces.append(piece)
+                        call.condition.notify_all()
+                    index += 1
+                    yield piece
+                    continue
+
+                with call.condition:
+                    while index >= len(call.pieces) and not call.finished and call.driving:
+                        if gave_up():
+                            break
+                        call.condition.wait(0.1 if own_stop is not None else None)
+                    pieces = call.pieces[index:]
+                    finished = call.finished
+                    if not pieces and not finished and not call.driving:
+                        # The driver left: carry on with the same generator
+                        call.driving = driving = True
+                        call.owner = threading.get_ident()
+                index += len(pieces)
+                yield from pieces
+                if finished:
+                    if call.error is not None:
+                        raise call.error
+                    return
+        finally:
+            self._detach(key, call, callbacks, driving)
+
+    def _finish(self, key, call, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            with call.condition:
+                call.error = error
+                call.finished = True
+                call.driving = False
+                call.condition.notify_all()
+
+    def _detach(self, key, call, callbacks, driving):
+        """A caller leaves; the last one out closes a generator nobody is reading any more"""
+        with self._lock:
+            with call.condition:
+                call.callers = [caller for caller in call.callers if caller is not callbacks]
+                if driving and not call.finished:
+                    call.driving = False
+                abandoned = not call.finished and not call.callers and not call.driving
+                if abandoned:
+                    call.finished = True
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                call.condition.notify_all()
+        if abandoned and call.iterator is not None and hasattr(call.iterator, "close"):
+            call.iterator.close()
@@ -1,5 +1,11 @@
+from collections import deque
+import time
 from models.base_model import AIModel, ModelCacheMixin
-from transformers import pipeline
+from models.batching import MicroBatcher
+from models.chat_session import ChatSession
+from models import backends as inference_backends
+from models.model_store import model_store
+from models.instrumentation import instrumentation
 
 class TextGeneratorModel(AIModel, ModelCacheMixin):
     """
@@ -7,25 +13,86 @@ class TextGeneratorModel(AIModel, ModelCacheMixin):
     Demonstrating Multiple Inheritance and Method Overriding
     """
     
-    def __init__(self):
+    model_id = "text-generation"
+    display_name = "Text Generation"
+    category = "Text Generation"
+    description = "Generates conversational text"
+    input_type = "text"
+    hardware = "cpu"
+    variants = [
+        {"name": "DialoGPT Medium", "hf_id": "microsoft/DialoGPT-medium", "memory_mb": 1500},
+        {"name": "DialoGPT Small", "hf_id": "microsoft/DialoGPT-small", "memory_mb": 500}
+    ]
+    # TorchScript/ONNX cannot drive generate(), so only in-place PyTorch backends are offered
+    backends = ["eager", "int8", "compile"]
+    # A second identical prompt (e.g. a double click) replays the first one's stream
+    single_flight_methods = ("process_input", "stream_input")
+    
+    def __init__(self, variant=None):
+        variant = self.resolve_variant(variant)
+        self._hf_id = variant["hf_id"]
         # Multiple Inheritance
         AIModel.__init__(self,
-                        "DialoGPT Medium",
-                        "Text Generation", 
-                        "Generates conversational text using microsoft/DialoGPT-medium")
+                        variant["name"],
+                        self.category, 
+                        f"Generates conversational text using {self._hf_id}")
         ModelCacheMixin.__init__(self)
         self.pipeline = None
+        # Sampling settings; also part of the cache key
+        self.generation_params = {
+            "max_new_tokens": 128,
+            "no_repeat_ngram_size": 3,
+            "do_sample": True,
+            "temperature": 0.7
+        }
+        # Generation ends early once the reply contains one of these (it is cut off there)
+        self.stop_sequences = ()
+        self._batcher = None
+        self.backend = "eager"
+        self.backend_report = None
+        # Draft model for assisted (speculative) decoding
+        self.assistant_model = None
+        self.assistant_id = None
+        self._speed = deque(maxlen=100)
     
-    def load_model(self):
-        """Method Overriding: Real model loading with error handling"""
+    def load_model(self, backend="eager", num_threads=None, verify=True, assistant=None):
+        """
+        Method Overriding: Real model loading with error handling.
+        assistant: variant name or hf_id of a smaller draft model ("auto" picks
+        the smallest other variant) for assisted decoding
+        """
         try:
+            if backend not in self.backends:
+                return f"Error loading model: backend '{backend}' is not supported for text generation"
+            
+            # Imported here so the GUI can start without loading transformers
+            from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
+            
+            threads = inference_backends.set_num_threads(num_threads)
+            # Weights come from the local safetensors store when present (no hub round-trip)
+            model = model_store.from_pretrained(AutoModelForCausalLM, self._hf_id)
+            tokenizer = model_store.from_pretrained(AutoTokenizer, self._hf_id)
+            model_store.ensure_saved(self._hf_id, model, tokenizer)
+            
             # Real Hugging Face pipeline
             self.pipeline = pipeline(
                 "text-generation",
-                model="microsoft/DialoGPT-medium",
-                tokenizer="microsoft/DialoGPT-medium"
+                model=model,
+                tokenizer=tokenizer
             )
+            if backend != "eager":
+                self.pipeline.model = self._build_backend(self.pipeline.model, backend, verify)
+                if self.backend_report is not None:
+                    self.backend_report["num_threads"] = threads
+            self.backend = backend
+            self.set_cache_variant(backend=backend)
             self._is_loaded = True
+            if self._resolve_assistant(assistant) is not None:
+                try:
+                    self.enable_assisted_decoding(assistant)
+                except Exception as e:
+                    return f"Text Generation model loaded, but not its draft model: {str(e)}"
+                return f"Text Generation model loaded successfully from Hugging Face (draft: {self.assistant_id})!"
             return "Text Generation model loaded successfully from Hugging Face!"
         except Exception as e:
             return f"Error loading model: {str(e)}\n\nPlease install: pip install transformers torch"
@@ -36,33 +103,455 @@ class TextGeneratorModel(AIModel, ModelCacheMixin):
             return "Please load the model first"
         
         # Check cache first
-        cached = self.get_cached_result(user_input)
+        params = self._cache_params()
+        cached = self.get_cached_result(user_input, **params)
         if cached:
             return cached
         
         try:
-            # Real text generation
-            response = self.pipeline(
-                user_input,
-                max_length=150,
-                num_return_sequences=1,
-                pad_token_id=self.pipeline.tokenizer.eos_token_id,
-                no_repeat_ngram_size=3,
-                do_sample=True,
-                temperature=0.7
-            )
-            
-            generated_text = response[0]['generated_text']
-            # Remove the input from response to get only the new text
-            if user_input in generated_text:
-                bot_response = generated_text[len(user_input):].strip()
+            if self._batcher is not None:
+                # Concurrent callers share one padded generate() call
+                with self.stage("batched_generate"):
+                    bot_response = self._batcher(user_input)
             else:
-                bot_response = generated_text.strip()
+                # Real text generation
+                bot_response = self._reply(user_input)
             
-            result = f"🤖 AI Response:\n\n{bot_response}\n\n(Generated using DialoGPT-medium from Hugging Face)"
+            result = self._response_header() + bot_response + self._response_footer()
             
-            self.cache_result(user_input, result)
+            self.cache_result(user_input, result, **params)
             return result
             
         except Exception as e:
             return f"Error generating text: {str(e)}"
+    
+    def generate_batch(self, prompts):
+        """Run several prompts through one left-padded generate() call; returns the new text for each"""
+        import torch
+        
+        tokenizer = self.pipeline.tokenizer
+        model = self.pipeline.model
+        
+        # Assisted decoding only supports batches of one, so the batch runs without the draft
+        params = dict(self.generation_params)
+        with self.stage("tokenize"):
+            encoded = self._left_pad([tokenizer(prompt)["input_ids"] for prompt in prompts])
+        prompt_length = encoded["input_ids"].shape[1]
+        
+        started = time.perf_counter()
+        with self.stage("forward"), torch.no_grad():
+            output_ids = model.generate(**encoded, pad_token_id=tokenizer.eos_token_id, **params)
+        new_ids = output_ids[:, prompt_length:]
+        self._record_speed(int((new_ids != tokenizer.eos_token_id).sum()), time.perf_counter() - started)
+        
+        with self.stage("decode"):
+            return [self._cut_at_stop(text).strip() for text in
+                    tokenizer.batch_decode(new_ids, skip_special_tokens=True)]
+    
+    def unload_model(self):
+        """Method Overriding: drop the pipeline (and its batcher and draft model) to free the weights"""
+        self.disable_batching()
+        self.disable_assisted_decoding()
+        self.pipeline = None
+        return super().unload_model()
+    
+    def _torch_modules(self):
+        modules = [self.pipeline.model] if self.pipeline is not None else []
+        if self.assistant_model is not None:
+            modules.append(self.assistant_model)
+        return modules
+    
+    def estimated_memory_mb(self, **load_kwargs):
+        """Method Overriding: the draft model's weights come on top of the main model's"""
+        total = super().estimated_memory_mb(**load_kwargs)
+        assistant = self._resolve_assistant(load_kwargs.get("assistant"))
+        for variant in self.variants:
+            if assistant is not None and variant["hf_id"] == assistant:
+                total += variant.get("memory_mb", 0)
+        return total
+    
+    def _left_pad(self, sequences):
+        """
+        input_ids/attention_mask for a batch, padded on the left so generation continues
+        each prompt. Padded here rather than through the tokenizer, whose padding_side is
+        shared with every other caller.
+        """
+        import torch
+        
+        tokenizer = self.pipeline.tokenizer
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        width = max(len(ids) for ids in sequences)
+        input_ids = torch.tensor([[pad_id] * (width - len(ids)) + list(ids) for ids in sequences])
+        attention_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids in sequences])
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+    
+    def create_session(self, max_context_tokens=512, **settings):
+        """
+        Start a multi-turn conversation that reuses the KV cache between turns.
+        settings (configure_generation's arguments) override the model's for this session.
+        """
+        if not self._is_loaded:
+            raise RuntimeError("Please load the model first")
+        params, _ = self._resolve_settings(**settings)
+        return ChatSession(self.pipeline.model, self.pipeline.tokenizer,
+                           max_context_tokens=max_context_tokens,
+                           max_new_tokens=params.get("max_new_tokens", 64),
+                           temperature=params.get("temperature", 1.0),
+                           do_sample=params.get("do_sample", True),
+                           no_repeat_ngram_size=params.get("no_repeat_ngram_size", 0))
+    
+    def session_is_current(self, session):
+        """False for a session created before the weights were unloaded or reloaded"""
+        return self._is_loaded and session.model is self.pipeline.model
+    
+    def compare_assisted(self, prompts, assistant="auto", max_new_tokens=64):
+        """Method form of compare_assisted(), so hosted and local models answer alike"""
+        return compare_assisted(self, prompts, assistant=assistant, max_new_tokens=max_new_tokens)
+    
+    def enable_batching(self, max_batch_size=8, max_wait_ms=20):
+        """Route process_input through a micro-batcher so concurrent prompts share a forward pass"""
+        self.disable_batching()
+        self._batcher = MicroBatcher(self.generate_batch, max_batch_size=max_batch_size,
+                                     max_wait_ms=max_wait_ms, name="text-generation-batcher")
+        return self._batcher
+    
+    def disable_batching(self):
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+    
+    def configure_generation(self, **settings):
+        """Change the sampling settings; arguments left as None keep their current value"""
+        params, stop_sequences = self._resolve_settings(**settings)
+        # Replaced, not mutated, so a generation already running keeps its settings
+        self.generation_params = params
+        self.stop_sequences = stop_sequences
+        return dict(params, stop_sequences=list(stop_sequences))
+    
+    def _resolve_settings(self, temperature=None, no_repeat_ngram_size=None, max_new_tokens=None,
+                          do_sample=None, stop_sequences=None):
+        """(generation params, stop sequences): the current ones with the given values applied"""
+        if temperature is not None and temperature <= 0:
+            raise ValueError("temperature must be greater than 0")
+        if max_new_tokens is not None and max_new_tokens < 1:
+            raise ValueError("max_new_tokens must be at least 1")
+        if no_repeat_ngram_size is not None and no_repeat_ngram_size < 0:
+            raise ValueError("no_repeat_ngram_size must not be negative")
+        
+        params = dict(self.generation_params)
+        for name, value in (("temperature", temperature), ("no_repeat_ngram_size", no_repeat_ngram_size),
+                            ("max_new_tokens", max_new_tokens), ("do_sample", do_sample)):
+            if value is not None:
+                params[name] = value
+        if stop_sequences is None:
+            return params, self.stop_sequences
+        return params, tuple(s for s in stop_sequences if s)
+    
+    def _cache_params(self, params=None, stop_sequences=None):
+        """Generation params plus stop sequences: everything that changes the reply"""
+        params = self.generation_params if params is None else params
+        stop_sequences = self.stop_sequences if stop_sequences is None else stop_sequences
+        if not stop_sequences:
+            return params
+        return dict(params, stop_sequences=stop_sequences)
+    
+    def _single_flight_settings(self):
+        return super()._single_flight_settings() + (self.stop_sequences,)
+    
+    def _resolve_assistant(self, assistant):
+        """hf_id of the draft model for a variant name/hf_id; "auto" is the smallest variant below this one"""
+        if not assistant:
+            return None
+        if assistant == "auto":
+            size = super().estimated_memory_mb() if self.variants else 0
+            smaller = [v for v in self.variants if v["hf_id"] != self._hf_id and v.get("memory_mb", 0) < size]
+            return min(smaller, key=lambda v: v.get("memory_mb", 0))["hf_id"] if smaller else None
+        for variant in self.variants:
+            if assistant in (variant["name"], variant["hf_id"]):
+                return variant["hf_id"]
+        return assistant
+    
+    def enable_assisted_decoding(self, assistant="auto"):
+        """
+        Load a small draft model that proposes several tokens per step for the main
+        model to verify in one forward pass. Accepted tokens follow the main model's
+        distribution, so replies are unchanged while fewer main-model passes run.
+        """
+        from transformers import AutoModelForCausalLM
+        
+        if not self._is_loaded:
+            raise RuntimeError("Please load the model first")
+        hf_id = self._resolve_assistant(assistant)
+        if hf_id is None:
+            raise ValueError(f"No draft model available for {self._hf_id}")
+        if hf_id == self._hf_id:
+            raise ValueError("The draft model must be smaller than the model it assists")
+        
+        draft = model_store.from_pretrained(AutoModelForCausalLM, hf_id).eval()
+        if draft.config.vocab_size != self.pipeline.model.config.vocab_size:
+            raise ValueError(f"{hf_id} does not share the tokenizer of {self._hf_id}")
+        model_store.ensure_saved(hf_id, draft, self.pipeline.tokenizer)
+        self.assistant_model = draft
+        self.assistant_id = hf_id
+        return hf_id
+    
+    def disable_assisted_decoding(self):
+        self.assistant_model = None
+        self.assistant_id = None
+    
+    def _stopping_criteria(self, prompt_length, should_stop=None, stop_sequences=None):
+        """Stop on request and once the new text contains a stop sequence"""
+        from transformers import StoppingCriteria, StoppingCriteriaList
+        
+        tokenizer = self.pipeline.tokenizer
+        stop_sequences = self.stop_sequences if stop_sequences is None else stop_sequences
+        find_stop = self._find_stop
+        
+        class _StopWhenAsked(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return bool(should_stop and should_stop())
+        
+        class _StopOnSequences(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                # Whole reply, not just the last token: a draft step can accept several tokens at once
+                text = tokenizer.decode(input_ids[0, prompt_length:], skip_special_tokens=True)
+                return find_stop(text, stop_sequences) is not None
+        
+        criteria = StoppingCriteriaList([_StopWhenAsked()])
+        if stop_sequences:
+            criteria.append(_StopOnSequences())
+        return criteria
+    
+    @staticmethod
+    def _find_stop(text, stop_sequences):
+        """Index of the earliest stop sequence in text, or None"""
+        found = [index for index in (text.find(s) for s in stop_sequences) if index >= 0]
+        return min(found) if found else None
+    
+    def _cut_at_stop(self, text, stop_sequences=None):
+        index = self._find_stop(text, self.stop_sequences if stop_sequences is None else stop_sequences)
+        return text if index is None else text[:index]
+    
+    def _generate(self, user_input, streamer=None, should_stop=None, params=None, stop_sequences=None):
+        """One generate() call with the given (default: current) settings and draft model; returns the new token ids"""
+        import torch
+        
+        tokenizer = self.pipeline.tokenizer
+        with self.stage("tokenize"):
+            inputs = tokenizer(user_input, return_tensors="pt")
+        prompt_length = inputs["input_ids"].shape[1]
+        params = dict(self.generation_params if params is None else params)
+        if self.assistant_model is not None:
+            params["assistant_model"] = self.assistant_model
+        
+        started = time.perf_counter()
+        with torch.no_grad():
+            output_ids = self.pipeline.model.generate(
+                **inputs,
+                streamer=streamer,
+                pad_token_id=tokenizer.eos_token_id,
+                stopping_criteria=self._stopping_criteria(prompt_length, should_stop, stop_sequences),
+                **params
+            )
+        new_tokens = output_ids[0, prompt_length:]
+        self._record_speed(len(new_tokens), time.perf_counter() - started)
+        return new_tokens
+    
+    def _reply(self, user_input):
+        """Generate and decode one reply, bypassing the result cache"""
+        with self.stage("generate"):
+            new_tokens = self._generate(user_input)
+        with self.stage("decode"):
+            text = self.pipeline.tokenizer.decode(new_tokens, skip_special_tokens=True)
+        return self._cut_at_stop(text).strip()
+    
+    def _record_speed(self, tokens, seconds):
+        self._speed.append((tokens, seconds))
+        instrumentation.count(self.instrument_label, "generated_tokens", tokens)
+    
+    @property
+    def generation_stats(self):
+        """Decoding speed over the recent replies and the settings in use"""
+        samples = list(self._speed)
+        tokens = sum(count for count, _ in samples)
+        seconds = sum(elapsed for _, elapsed in samples)
+        last_tokens, last_seconds = samples[-1] if samples else (0, 0.0)
+        return {"replies": len(samples), "tokens": tokens,
+                "tokens_per_s": tokens / seconds if seconds else 0.0,
+                "last_tokens_per_s": last_tokens / last_seconds if last_seconds else 0.0,
+                "assistant": self.assistant_id,
+                "max_new_tokens": self.generation_params.get("max_new_tokens"),
+                "stop_sequences": list(self.stop_sequences)}
+    
+    @property
+    def batching_stats(self):
+        """Throughput/latency numbers of the micro-batcher, or None when batching is off"""
+        return self._batcher.stats() if self._batcher is not None else None
+    
+    def _build_backend(self, fp32_model, backend, verify):
+        """Quantize or compile the fp32 model, checking next-token logits against the original"""
+        import copy
+        
+        candidate = copy.deepcopy(fp32_model.eval())
+        if backend == "int8":
+            candidate = inference_backends.quantize_int8(candidate)
+        elif backend == "compile":
+            candidate = inference_backends.compile_model(candidate)
+        
+        if verify:
+            sample = self.pipeline.tokenizer("Hello, how are you today?", return_tensors="pt")
+            self.backend_report = inference_backends.compare_to_baseline(
+                lambda: fp32_model(**sample).logits[:, -1, :],
+                lambda: candidate(**sample).logits[:, -1, :])
+            self.backend_report["backend"] = backend
+        return candidate
+    
+    def _extra_info(self):
+        info = {"backend": self.backend}
+        if self.backend_report is not None:
+            info["backend_report"] = self.backend_report
+        if self._batcher is not None:
+            info["batching"] = self.batching_stats
+        info["generation"] = self.generation_stats
+        return info
+    
+    def _response_header(self):
+        return "🤖 AI Response:\n\n"
+    
+    def _response_footer(self):
+        return f"\n\n(Generated using {self._hf_id} from Hugging Face)"
+    
+    def stream_input(self, user_input, should_stop=None, **settings):
+        """
+        Generator version of process_input: yields text pieces as tokens are produced.
+        Joining everything it yields gives the same text process_input would return.
+        should_stop is polled between tokens so callers can abort generation early.
+        settings (configure_generation's arguments) apply to this call only.
+        """
+        if not self._is_loaded:
+            yield "Please load the model first"
+            return
+        
+        try:
+            generation_params, stop_sequences = self._resolve_settings(**settings)
+        except (TypeError, ValueError) as e:
+            yield f"Error generating text: {str(e)}"
+            return
+        params = self._cache_params(generation_params, stop_sequences)
+        cached = self.get_cached_result(user_input, **params)
+        if cached:
+            yield cached
+            return
+        
+        try:
+            import threading
+            from transformers import TextIteratorStreamer
+            
+            tokenizer = self.pipeline.tokenizer
+            streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+            errors = []
+            
+            def generate():
+                try:
+                    self._generate(user_input, streamer=streamer, should_stop=should_stop,
+                                   params=generation_params, stop_sequences=stop_sequences)
+                except Exception as e:
+                    errors.append(e)
+                    streamer.end()
+            
+            # generate() pushes decoded text into the streamer from its own thread
+            worker = threading.Thread(target=generate, daemon=True)
+            started = time.perf_counter()
+            worker.start()
+            
+            yield self._response_header()
+            # Trailing whitespace, and text that could be the start of a stop sequence, are
+            # held back until more text shows whether they belong to the reply
+            hold_back = max((len(s) for s in stop_sequences), default=1) - 1
+            text = ""
+            emitted = 0
+            stopped = False
+            for piece in streamer:
+                if stopped:
+                    continue  # drain what generate() produced before it saw the stop sequence
+                if not text:
+                    piece = piece.lstrip()
+                    if not piece:
+                        continue
+                    if instrumentation.enabled:
+                        instrumentation.record(self.instrument_label, "first_token", time.perf_counter() - started)
+                text += piece
+                cut = self._find_stop(text, stop_sequences)
+                if cut is not None:
+                    text = text[:cut].rstrip()
+                    stopped = True
+                safe = text if stopped else text[:max(0, len(text.rstrip()) - hold_back)].rstrip()
+                ready = max(emitted, len(safe))
+                if ready > emitted:
+                    yield text[emitted:ready]
+                    emitted = ready
+            worker.join()
+            if errors:
+                yield f"Error generating text: {str(errors[0])}"
+                return
+            text = text.rstrip()
+            if len(text) > emitted:
+                yield text[emitted:]
+            yield self._response_footer()
+            
+            # Only complete responses are cached
+            if not (should_stop and should_stop()):
+                result = self._response_header() + text.strip() + self._response_footer()
+                self.cache_result(user_input, result, **params)
+            
+        except Exception as e:
+            yield f"Error generating text: {str(e)}"
+
+
+def compare_assisted(model, prompts, assistant="auto", max_new_tokens=64):
+    """
+    Greedy tokens/sec without and with the draft model on the same prompts.
+    Greedy decoding makes both runs produce the same replies, so only speed differs.
+    The timed replies bypass the result cache, which is neither read nor changed.
+    """
+    saved = model.generation_params, model.assistant_model, model.assistant_id, list(model._speed)
+    model.disable_assisted_decoding()
+    model.configure_generation(do_sample=False, max_new_tokens=max_new_tokens)
+    runs = {}
+    try:
+        for label in ("plain", "assisted"):
+            if label == "assisted":
+                model.enable_assisted_decoding(assistant)
+            model._reply(prompts[0])  # warm-up, not measured
+            model._speed.clear()
+            replies = [model._reply(prompt) for prompt in prompts]
+            runs[label] = dict(model.generation_stats, replies_text=replies)
+    finally:
+        model.generation_params, model.assistant_model, model.assistant_id, speed = saved
+        model._speed.clear()
+        model._speed.extend(speed)
+    
+    plain, assisted = runs["plain"]["tokens_per_s"], runs["assisted"]["tokens_per_s"]
+    same = sum(a == b for a, b in zip(runs["plain"]["replies_text"], runs["assisted"]["replies_text"]))
+    return {"plain_tokens_per_s": plain, "assisted_tokens_per_s": assisted,
+            "speedup": assisted / plain if plain else 0.0,
+            "identical_replies": same / len(prompts), "assistant": runs["assisted"]["assistant"]}
+
+
+if __name__ == "__main__":
+    # Usage: python -m models.text_generator [--variant NAME] [--assistant auto|NAME] PROMPT...
+    import argparse
+    import json
+    
+    parser = argparse.ArgumentParser(description="Measure assisted decoding speed")
+    parser.add_argument("prompts", nargs="+")
+    parser.add_argument("--variant", default=None, help="main model (default: DialoGPT Medium)")
+    parser.add_argument("--assistant", default="auto", help="draft model (default: smallest smaller variant)")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    args = parser.parse_args()
+    
+    generator = TextGeneratorModel(variant=args.variant)
+    message = generator.load_model()
+    if not generator._is_loaded:
+        parser.error(message)
+    print(json.dumps(compare_assisted(generator, args.prompts, args.assistant, args.max_new_tokens), indent=2))
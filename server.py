@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models.cache import shared_cache
+from models.disk_cache import enable_disk_cache
+from models.instrumentation import instrumentation
+from models.model_manager import ModelManager
+from models.registry import registry as default_registry
+
+DEFAULT_PORT = 8765
+LOAD_OPTIONS = ("backend", "num_threads", "assistant", "dtype")
+
+
+def result_to_json(result):
+    """JSON body for a model result: text, classification dict or base64 PNG"""
+    if hasattr(result, "save") and hasattr(result, "size"):
+        buffer = io.BytesIO()
+        result.save(buffer, format="PNG")
+        return {"image": base64.b64encode(buffer.getvalue()).decode("ascii")}
+    if hasattr(result, "to_dict"):
+        return {"output": result.to_dict(), "text": str(result)}
+    text = str(result)
+    if text.startswith("Error") or text.startswith("Please load"):
+        return {"error": text}
+    return {"text": text}
+
+
+class ModelServer:
+    """
+    Serves registry models over HTTP so several clients share one set of weights.
+    Each model gets its own worker pool (requests queue there); loads and reloads
+    go through a ModelManager, and every model uses the shared result cache.
+    """
+
+    def __init__(self, registry=None, manager=None, workers_per_model=1, max_queue=32):
+        self.registry = registry or default_registry
+        self.manager = manager or ModelManager()
+        self.workers_per_model = workers_per_model
+        self.max_queue = max_queue
+        self._pools = {}
+        self._queued = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, spec):
+        with self._lock:
+            if spec.name not in self._pools:
+                self._pools[spec.name] = ThreadPoolExecutor(max_workers=self.workers_per_model,
+                                                            thread_name_prefix=f"serve-{spec.model_id}")
+                self._queued[spec.name] = 0
+            return self._pools[spec.name]
+
+    def _reserve(self, spec):
+        """Take a queue slot for spec's pool; rejects with 503 when the queue is full"""
+        from aiohttp import web
+
+        pool = self._pool(spec)
+        with self._lock:
+            if self._queued[spec.name] >= self.max_queue:
+                raise web.HTTPServiceUnavailable(text=f"{spec.name} queue is full")
+            self._queued[spec.name] += 1
+        return pool
+
+    async def _run_reserved(self, spec, pool, func, *args):
+        """Run func on a pool whose slot was taken by _reserve, then give the slot back"""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        finally:
+            with self._lock:
+                self._queued[spec.name] -= 1
+
+    async def _submit(self, spec, func, *args):
+        """Run func on the model's pool; rejects with 503 when the queue is full"""
+        pool = self._reserve(spec)
+        return await self._run_reserved(spec, pool, func, *args)
+
+    @staticmethod
+    async def _read_body(request):
+        """The request's JSON object, which must carry a string "input" (or an image upload)"""
+        from aiohttp import web
+
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Request body must be JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="Request body must be a JSON object")
+        if "image_base64" not in body and not isinstance(body.get("input"), str):
+            raise web.HTTPBadRequest(text='Request body needs an "input" string')
+        return body
+
+    @staticmethod
+    async def _read_load_options(request):
+        """The load request's options: an optional JSON object limited to LOAD_OPTIONS"""
+        from aiohttp import web
+
+        if not request.can_read_body:
+            return {}
+        try:
+            options = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Request body must be JSON")
+        if not isinstance(options, dict):
+            raise web.HTTPBadRequest(text="Request body must be a JSON object")
+        unknown = sorted(set(options) - set(LOAD_OPTIONS))
+        if unknown:
+            raise web.HTTPBadRequest(text=f"Unknown load options {unknown}; expected some of {list(LOAD_OPTIONS)}")
+        return options
+
+    def _spec(self, request):
+        from aiohttp import web
+
+        spec = self.registry.spec(request.match_info["name"])
+        if spec is None:
+            raise web.HTTPNotFound(text=f"Unknown model {request.match_info['name']!r}")
+        return spec
+
+    def _describe(self, spec):
+        model_class = spec.load_class()
+        created = self.registry.is_created(spec.name)
+        return {
+            "model_id": spec.model_id, "display_name": spec.name, "module": spec.module,
+            "class_name": spec.class_name, "category": spec.category, "description": spec.description,
+            "input_type": spec.input_type, "hardware": spec.hardware, "variants": spec.variants,
+            "backends": spec.backends,
+            "loaded": created and self.registry.get(spec.name)._is_loaded,
+            "stream": hasattr(model_class, "stream_input"),
+            "image_output": hasattr(model_class, "generate_image"),
+            "queued": self._queued.get(spec.name, 0)
+        }
+
+    async def list_models(self, request):
+        from aiohttp import web
+        return web.json_response([self._describe(spec) for spec in self.registry.specs()])
+
+    async def model_info(self, request):
+        from aiohttp import web
+        spec = self._spec(request)
+        model = self.registry.get(spec.name)
+        info = json.loads(json.dumps(model.model_info, default=str))
+        return web.json_response(dict(info, queued=self._queued.get(spec.name, 0)))
+
+    async def load(self, request):
+        from aiohttp import web
+        spec = self._spec(request)
+        load_kwargs = await self._read_load_options(request)
+        model = self.registry.get(spec.name)
+        message = await self._submit(spec, lambda: self.manager.ensure_loaded(model, **load_kwargs))
+        return web.json_response({"message": message, "loaded": model._is_loaded})
+
+    async def unload(self, request):
+        from aiohttp import web
+        spec = self._spec(request)
+        if not self.registry.is_created(spec.name):
+            return web.json_response({"message": f"{spec.name} is not loaded", "loaded": False})
+        model = self.registry.get(spec.name)
+        return web.json_response({"message": self.manager.unload(model), "loaded": model._is_loaded})
+
+    def _run(self, model, body):
+        """Worker thread: one prediction, with image uploads staged in a temp file"""
+        with self.manager.use(model):
+            if "image_base64" in body:
+                suffix = os.path.splitext(body.get("filename", ""))[1] or ".png"
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, "upload" + suffix)
+                    with open(path, "wb") as f:
+                        f.write(base64.b64decode(body["image_base64"]))
+                    return model.process_input(path)
+            if "preview" in body and hasattr(model, "generate_image"):
+                return model.generate_image(body["input"], preview=bool(body["preview"]))
+            return model.process_input(body["input"])
+
+    async def predict(self, request):
+        from aiohttp import web
+        spec = self._spec(request)
+        body = await self._read_body(request)
+        model = self.registry.get(spec.name)
+        result = await self._submit(spec, self._run, model, body)
+        return web.json_response(result_to_json(result))
+
+    async def stream(self, request):
+        """Chunked text/plain response, one chunk per generated piece"""
+        from aiohttp import web
+        spec = self._spec(request)
+        body = await self._read_body(request)
+        if "image_base64" in body:
+            raise web.HTTPBadRequest(text='Streaming needs an "input" string')
+        model = self.registry.get(spec.name)
+        if not hasattr(model, "stream_input"):
+            raise web.HTTPBadRequest(text=f"{spec.name} does not support streaming")
+
+        loop = asyncio.get_running_loop()
+        pieces = asyncio.Queue()
+        stopped = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                with self.manager.use(model):
+                    for piece in model.stream_input(body["input"], should_stop=stopped.is_set):
+                        loop.call_soon_threadsafe(pieces.put_nowait, piece)
+            finally:
+                loop.call_soon_threadsafe(pieces.put_nowait, done)
+
+        # Take the queue slot first so a full queue is still answered with a real 503
+        pool = self._reserve(spec)
+        response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+        try:
+            await response.prepare(request)
+        except BaseException:
+            with self._lock:
+                self._queued[spec.name] -= 1
+            raise
+        worker = asyncio.ensure_future(self._run_reserved(spec, pool, produce))
+        getter = None
+        try:
+            while True:
+                # Wait on the worker too, so a failure before produce() runs ends the response
+                getter = asyncio.ensure_future(pieces.get())
+                await asyncio.wait({getter, worker}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    piece = getter.result()
+                else:
+                    getter.cancel()
+                    if pieces.empty():
+                        break
+                    piece = pieces.get_nowait()
+                if piece is done:
+                    break
+                await response.write(piece.encode("utf-8"))
+            try:
+                await worker
+            except Exception as e:
+                # Headers are already sent, so the error goes into the body like a model error
+                await response.write(f"Error: {str(e)}".encode("utf-8"))
+        except (ConnectionResetError, asyncio.CancelledError):
+            # Client went away: stop generating instead of finishing for nobody
+            stopped.set()
+            if getter is not None:
+                getter.cancel()
+            raise
+        await response.write_eof()
+        return response
+
+    async def stats(self, request):
+        from aiohttp import web
+        return web.json_response(json.loads(json.dumps(
+            {"memory": self.manager.stats(), "cache": shared_cache.stats(),
+             "queued": dict(self._queued)}, default=str)))
+
+    async def metrics(self, request):
+        """Stage timings and counters for a Prometheus scraper"""
+        from aiohttp import web
+        return web.Response(text=instrumentation.prometheus_text(), content_type="text/plain")
+
+    def make_app(self):
+        from aiohttp import web
+
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.add_routes([
+            web.get("/models", self.list_models),
+            web.get("/models/{name}", self.model_info),
+            web.post("/models/{name}/load", self.load),
+            web.post("/models/{name}/unload", self.unload),
+            web.post("/models/{name}/predict", self.predict),
+            web.post("/models/{name}/stream", self.stream),
+            web.get("/stats", self.stats),
+            web.get("/metrics", self.metrics)
+        ])
+        app.on_shutdown.append(lambda app: self.shutdown())
+        return app
+
+    async def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self.registry, "shutdown"):
+            self.registry.shutdown()
+
+
+def main(argv=None):
+    """python -m server [--port 8765] [--preload text-generation ...]"""
+    parser = argparse.ArgumentParser(description="Serve the AI models over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="worker threads per model")
+    parser.add_argument("--max-queue", type=int, default=32, help="queued requests per model before 503")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="unload least recently used models above this much memory")
+    parser.add_argument("--preload", nargs="*", default=[], metavar="MODEL", help="models to load at startup")
+    parser.add_argument("--timings", action="store_true", help="record per-stage timings (served at /metrics)")
+    parser.add_argument("--isolate", action="store_true",
+                        help="run each model in its own worker process (restarted if it crashes)")
+    args = parser.parse_args(argv)
+
+    from aiohttp import web
+
+    enable_disk_cache()
+    if args.timings:
+        instrumentation.enable()
+    model_registry = None
+    if args.isolate:
+        from models.process_host import ProcessRegistry
+        model_registry = ProcessRegistry()
+    server = ModelServer(registry=model_registry, manager=ModelManager(budget_mb=args.memory_budget),
+                         workers_per_model=args.workers, max_queue=args.max_queue)
+    for name in args.preload:
+        model = server.registry.get(name)
+        if model is None:
+            parser.error(f"unknown model {name!r}")
+        print(f"{name}: {server.manager.ensure_loaded(model)}")
+    web.run_app(server.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
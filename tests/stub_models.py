@@ -0,0 +1,89 @@
+"""Small stand-in models for the concurrency tests (imported by spawned workers too)"""
+import os
+import threading
+import time
+
+from models.base_model import AIModel
+
+
+class StubSession:
+    def __init__(self, model, max_new_tokens=16, temperature=0.7):
+        self.model = model
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.history = []
+        self.turn_latencies = []
+        self._lock = threading.Lock()    # not picklable: the session has to stay in the worker
+
+    @property
+    def history_length(self):
+        return len(self.history)
+
+    def send(self, text):
+        with self._lock:
+            self.history.append(text)
+            self.turn_latencies.append(0.001)
+            return f"reply {len(self.history)} to {text} (t={self.temperature})"
+
+
+class StubTextModel(AIModel):
+    """Echoes its input; "crash" kills the process it runs in"""
+
+    model_id = "stub-text"
+    display_name = "Stub Text"
+
+    def __init__(self, variant=None):
+        super().__init__("Stub Text", "Test", "Echo model for tests")
+        self.load_kwargs = None
+        self.batching = None
+
+    def load_model(self, backend="eager", num_threads=None):
+        self.load_kwargs = {"backend": backend, "num_threads": num_threads}
+        self._is_loaded = True
+        return f"loaded with {backend}"
+
+    def process_input(self, text):
+        if text == "crash":
+            os._exit(3)
+        if text == "fail":
+            raise ValueError("stub failure")
+        return f"echo: {text}"
+
+    def loaded_with(self):
+        return self.load_kwargs
+
+    def data(self, size):
+        return bytes(range(256)) * (size // 256)
+
+    def array(self, size):
+        import numpy as np
+        return np.arange(size, dtype=np.int64)
+
+    def count(self, steps, on_progress=None):
+        for step in range(steps):
+            on_progress(step)
+        return steps
+
+    def stream_input(self, text, should_stop=None):
+        for i in range(100):
+            if should_stop is not None and should_stop():
+                return
+            time.sleep(0.01)
+            yield f"{text}{i} "
+
+    def create_session(self, **settings):
+        return StubSession(self, **settings)
+
+    def enable_batching(self, max_batch_size=8, max_wait_ms=20):
+        self.batching = threading.Lock()    # stays in the worker, like a real MicroBatcher
+        return self.batching
+
+    def disable_batching(self):
+        self.batching = None
+
+    @property
+    def batching_stats(self):
+        return {"enabled": self.batching is not None}
+
+    def estimated_memory_mb(self, **load_kwargs):
+        return 1
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from models.batching import MicroBatcher, percentile
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([5, 1, 3], 50) == 3
+    assert percentile(list(range(1, 101)), 95) == 95
+
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or [item * 2 for item in items],
+                           max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        assert [future.result(5) for future in futures] == [0, 2, 4, 6]
+        assert batches == [[0, 1, 2, 3]]
+    finally:
+        batcher.close()
+
+
+def test_partial_batch_dispatches_after_max_wait():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_ms=20)
+    try:
+        started = time.perf_counter()
+        assert batcher("only", timeout=5) == "only"
+        assert time.perf_counter() - started < 1
+        assert batcher.stats()["batches"] == 1
+    finally:
+        batcher.close()
+
+
+def test_batch_error_reaches_every_caller():
+    def fail(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(fail, max_batch_size=2, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(ValueError, match="bad batch"):
+                future.result(5)
+    finally:
+        batcher.close()
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=2, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="results for"):
+                future.result(5)
+    finally:
+        batcher.close()
+
+
+def test_close_finishes_queued_requests_then_rejects():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items], max_batch_size=3, max_wait_ms=5)
+    futures = [batcher.submit(i) for i in range(10)]
+    batcher.close()
+    assert [future.result(5) for future in futures] == list(range(1, 11))
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(1)
+
+
+def test_close_racing_submit_never_strands_a_future():
+    for _ in range(50):
+        batcher = MicroBatcher(lambda items: items, max_batch_size=4, max_wait_ms=1)
+        futures = []
+
+        def submit():
+            try:
+                futures.append(batcher.submit(1))
+            except RuntimeError:
+                pass
+
+        threads = [threading.Thread(target=submit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        batcher.close()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            assert future.result(5) == 1
+
+
+def test_stats_count_requests_and_batches():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=5, max_wait_ms=100)
+    try:
+        futures = [batcher.submit(i) for i in range(10)]
+        for future in futures:
+            future.result(5)
+        stats = batcher.stats()
+        assert stats["requests"] == 10
+        assert stats["batches"] == 2
+        assert stats["avg_batch_size"] == 5
+    finally:
+        batcher.close()
@@ -0,0 +1,144 @@
+import contextlib
+import threading
+import time
+
+from models.model_manager import ModelManager
+
+
+class StubModel:
+    """Just enough of the AIModel interface for the manager"""
+
+    def __init__(self, name, memory_mb, load_seconds=0.0):
+        self.name = name
+        self.memory_mb = memory_mb
+        self.load_seconds = load_seconds
+        self._is_loaded = False
+        self.loads = []
+        self.loading = threading.Event()
+
+    def __str__(self):
+        return self.name
+
+    def stage(self, name):
+        return contextlib.nullcontext()
+
+    def estimated_memory_mb(self, **load_kwargs):
+        return self.memory_mb
+
+    def memory_footprint_mb(self):
+        return self.memory_mb
+
+    def load_model(self, backend="eager", num_threads=None):
+        self.loading.set()
+        time.sleep(self.load_seconds)
+        self.loads.append(backend)
+        self._is_loaded = True
+        return f"{self.name} loaded ({backend})"
+
+    def unload_model(self):
+        self._is_loaded = False
+        return f"{self.name} unloaded"
+
+
+def test_loads_once_and_reports_already_loaded():
+    manager = ModelManager(budget_mb=0)
+    model = StubModel("a", 10)
+    assert manager.ensure_loaded(model) == "a loaded (eager)"
+    assert manager.ensure_loaded(model) == "Model already loaded"
+    assert model.loads == ["eager"]
+    assert manager.used_mb == 10
+
+
+def test_least_recently_used_idle_model_is_evicted():
+    manager = ModelManager(budget_mb=100)
+    a, b, c = StubModel("a", 40), StubModel("b", 40), StubModel("c", 40)
+    manager.ensure_loaded(a)
+    manager.ensure_loaded(b)
+    with manager.use(a):
+        pass    # a is now more recently used than b
+    manager.ensure_loaded(c)
+    assert a._is_loaded and c._is_loaded and not b._is_loaded
+    assert manager.used_mb <= 100
+
+
+def test_models_in_use_are_not_evicted():
+    manager = ModelManager(budget_mb=50)
+    a, b = StubModel("a", 40), StubModel("b", 40)
+    with manager.use(a):
+        manager.ensure_loaded(b)
+        assert a._is_loaded
+    assert manager.unload(b) == "b unloaded"
+
+
+def test_use_reloads_an_evicted_model_with_its_options():
+    manager = ModelManager(budget_mb=50)
+    a, b = StubModel("a", 40), StubModel("b", 40)
+    manager.ensure_loaded(a, backend="int8")
+    manager.ensure_loaded(b)
+    assert not a._is_loaded
+    with manager.use(a):
+        assert a._is_loaded
+    assert a.loads == ["int8", "int8"]
+
+
+def test_new_options_reload_but_explicit_defaults_do_not():
+    manager = ModelManager(budget_mb=0)
+    model = StubModel("a", 10)
+    manager.ensure_loaded(model)
+    assert manager.ensure_loaded(model, backend="eager", num_threads=None) == "Model already loaded"
+    assert manager.ensure_loaded(model, backend="int8", num_threads=None) == "a loaded (int8)"
+    assert manager.ensure_loaded(model, backend="eager", num_threads=None) == "a loaded (eager)"
+    assert model.loads == ["eager", "int8", "eager"]
+
+
+def test_busy_model_is_not_reloaded_with_new_options():
+    manager = ModelManager(budget_mb=0)
+    model = StubModel("a", 10)
+    manager.ensure_loaded(model)
+    with manager.use(model):
+        assert "busy" in manager.ensure_loaded(model, backend="int8")
+        assert "busy" in manager.unload(model)
+    assert model.loads == ["eager"]
+
+
+def test_model_still_loading_is_neither_evicted_nor_ignored():
+    manager = ModelManager(budget_mb=100)
+    slow, fast = StubModel("slow", 60, load_seconds=0.3), StubModel("fast", 60)
+    loader = threading.Thread(target=manager.ensure_loaded, args=(slow,))
+    loader.start()
+    assert slow.loading.wait(5)
+    # The reserved estimate counts before load_model returns
+    assert manager.used_mb == 60
+    manager.ensure_loaded(fast)
+    loader.join(5)
+    assert slow._is_loaded
+    # Only once slow finished did the budget force the idle fast model out
+    assert not fast._is_loaded
+    assert manager.used_mb == 60
+
+
+def test_concurrent_loads_of_one_model_load_it_once():
+    manager = ModelManager(budget_mb=0)
+    model = StubModel("a", 10, load_seconds=0.1)
+    threads = [threading.Thread(target=manager.ensure_loaded, args=(model,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert model.loads == ["eager"]
+
+
+def test_failed_load_releases_its_reservation():
+    manager = ModelManager(budget_mb=100)
+    model = StubModel("a", 60)
+
+    def fail(**load_kwargs):
+        raise RuntimeError("no weights")
+
+    model.load_model = fail
+    try:
+        manager.ensure_loaded(model)
+    except RuntimeError:
+        pass
+    assert manager.used_mb == 0
+    assert manager.stats()["models"][0]["loading"] is False
@@ -0,0 +1,60 @@
+import pytest
+
+from models.model_store import ModelStore
+
+
+def test_auto_save_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("AI_GUI_MODEL_STORE_AUTOSAVE", raising=False)
+    assert not ModelStore(root=str(tmp_path)).auto_save
+    monkeypatch.setenv("AI_GUI_MODEL_STORE_AUTOSAVE", "1")
+    assert ModelStore(root=str(tmp_path)).auto_save
+
+
+def test_ensure_saved_does_nothing_unless_enabled(tmp_path):
+    class Component:
+        def save_pretrained(self, path):
+            raise AssertionError("should not be saved")
+
+    store = ModelStore(root=str(tmp_path), auto_save=False)
+    assert store.ensure_saved("org/model", Component()) is None
+    assert store.entries() == {}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("tokenizers")
+    transformers = pytest.importorskip("transformers")
+    from benchmarks import standins
+
+    store = ModelStore(root=str(tmp_path / "store"), auto_save=False)
+    model, tokenizer = standins.build_tiny_text_generator(store)
+    path = store.save(standins.TINY_TEXT_ID, model, tokenizer)
+
+    assert store.local_path(standins.TINY_TEXT_ID) == path
+    entry = store.entries()[standins.TINY_TEXT_ID]
+    assert "model.safetensors" in entry["files"]
+
+    # A fresh store reads the manifest from disk
+    reopened = ModelStore(root=str(tmp_path / "store"), auto_save=False)
+    loaded = reopened.from_pretrained(transformers.AutoModelForCausalLM, standins.TINY_TEXT_ID).eval()
+    loaded_tokenizer = reopened.from_pretrained(transformers.AutoTokenizer, standins.TINY_TEXT_ID)
+
+    expected = model.state_dict()
+    for name, tensor in loaded.state_dict().items():
+        assert torch.equal(tensor, expected[name]), name
+    text = "the model reads a prompt"
+    assert loaded_tokenizer.encode(text) == tokenizer.encode(text)
+
+
+def test_remove(tmp_path):
+    class Component:
+        def save_pretrained(self, path):
+            with open(f"{path}/config.json", "w") as f:
+                f.write("{}")
+
+    store = ModelStore(root=str(tmp_path))
+    store.save("org/model", Component())
+    assert store.local_path("org/model") is not None
+    assert store.remove("org/model")
+    assert store.local_path("org/model") is None
+    assert not store.remove("org/model")
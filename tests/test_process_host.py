@@ -0,0 +1,140 @@
+import os
+import time
+
+import pytest
+
+from models.process_host import (ProcessHostedChatModel, ProcessHostedModel, ProcessRegistry,
+                                 WorkerError, from_wire, to_wire)
+from models.registry import ModelSpec
+
+SPEC = ModelSpec("stub_models", "StubTextModel", "stub-text", "Stub Text")
+
+
+@pytest.fixture
+def hosted():
+    model = ProcessHostedChatModel(SPEC, settings={}, health_interval=0.5)
+    yield model
+    model.shutdown()
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.05)
+
+
+def test_wire_round_trip_uses_shared_memory_for_large_bytes():
+    blocks = []
+    data = b"x" * 100_000
+    wire = to_wire(("small", data), blocks)
+    assert len(blocks) == 1 and wire[0] == "small"
+    assert from_wire(wire) == ("small", data)
+
+
+def test_wire_round_trip_uses_shared_memory_for_large_arrays():
+    np = pytest.importorskip("numpy")
+    blocks = []
+    array = np.arange(100_000, dtype=np.float32)
+    wire = to_wire({"small": b"abc", "big": array}, blocks)
+    assert blocks, "large array should travel in shared memory"
+    value = from_wire(wire)
+    assert value["small"] == b"abc"
+    assert np.array_equal(value["big"], array)
+
+
+def test_load_and_call_run_in_the_worker(hosted):
+    assert hosted.load_model(backend="int8") == "loaded with int8"
+    assert hosted._is_loaded
+    assert hosted.process_input("hi") == "echo: hi"
+    assert hosted.health()["pid"] != os.getpid()
+
+
+def test_worker_errors_come_back_as_messages(hosted):
+    hosted.load_model()
+    assert "ValueError: stub failure" in hosted.process_input("fail")
+    with pytest.raises(WorkerError):
+        hosted._call("no_such_method")
+
+
+def test_large_results_come_back_intact(hosted):
+    hosted.load_model()
+    assert hosted._call("data", 256 * 1024) == bytes(range(256)) * 1024
+
+
+def test_large_arrays_come_back_intact(hosted):
+    np = pytest.importorskip("numpy")
+    hosted.load_model()
+    assert np.array_equal(hosted._call("array", 50_000), np.arange(50_000))
+
+
+def test_progress_callbacks_run_in_this_process(hosted):
+    hosted.load_model()
+    seen = []
+    assert hosted._call("count", 5, on_progress=seen.append) == 5
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_stream_stops_when_asked(hosted):
+    hosted.load_model()
+    started = time.monotonic()
+    pieces = list(hosted.stream_input("x", should_stop=lambda: time.monotonic() - started > 0.1))
+    assert 0 < len(pieces) < 100
+
+
+def test_crashed_worker_restarts_and_reloads(hosted):
+    hosted.load_model(backend="int8")
+    first_pid = hosted.health()["pid"]
+    assert hosted.process_input("crash").startswith("Error")
+    wait_for(lambda: hosted.restarts == 1 and hosted.health()["alive"])
+    assert hosted.process_input("again") == "echo: again"
+    assert hosted.health()["pid"] != first_pid
+    assert hosted._call("loaded_with") == {"backend": "int8", "num_threads": None}
+
+
+def test_chat_session_lives_in_the_worker(hosted):
+    hosted.load_model()
+    session = hosted.create_session(temperature=0.5)
+    assert hosted.session_is_current(session)
+    assert session.send("a") == "reply 1 to a (t=0.5)"
+    session.temperature = 0.9
+    assert session.send("b") == "reply 2 to b (t=0.9)"
+    assert session.history_length == 2
+    hosted.unload_model()
+    assert not hosted.session_is_current(session)
+
+
+def test_batching_is_replayed_after_a_restart(hosted):
+    hosted.load_model()
+    hosted.enable_batching(max_batch_size=4)
+    assert hosted.batching_stats == {"enabled": True}
+    hosted.process_input("crash")
+    wait_for(lambda: hosted.restarts == 1 and hosted.health()["alive"])
+    # Calls wait for the reload, which replays enable_batching
+    assert hosted.process_input("again") == "echo: again"
+    assert hosted.batching_stats == {"enabled": True}
+    hosted.disable_batching()
+    assert hosted.batching_stats == {"enabled": False}
+
+
+def test_unload_stops_the_process(hosted):
+    hosted.load_model()
+    worker = hosted._worker
+    hosted.unload_model()
+    assert not hosted._is_loaded
+    wait_for(lambda: not worker.alive)
+
+
+def test_registry_picks_the_chat_proxy():
+    class Specs:
+        def spec(self, name):
+            return SPEC if name in (SPEC.name, SPEC.model_id) else None
+
+    registry = ProcessRegistry(Specs(), settings={})
+    model = registry.get("stub-text")
+    try:
+        assert isinstance(model, ProcessHostedChatModel)
+        assert isinstance(model, ProcessHostedModel)
+    finally:
+        model.shutdown()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+web = pytest.importorskip("aiohttp.web")
+
+from models.remote_client import RemoteInferenceClient, RemoteInferenceError
+
+
+class StubServer:
+    """Inference API stand-in on a background loop: routes are (status, body) scripts per model"""
+
+    def __init__(self):
+        self.calls = []
+        self.scripts = {}
+        self.active = 0
+        self.max_active = 0
+        self.delay = 0.0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _handle(self, request):
+        model_id = request.match_info["model"]
+        self.calls.append((model_id, await request.json(), request.headers.get("Authorization")))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        script = self.scripts.get(model_id, [])
+        status, body = script.pop(0) if len(script) > 1 else (script[0] if script else (200, {"ok": True}))
+        return web.json_response(body, status=status)
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post("/{model}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        return self._runner.addresses[0][1]
+
+    def start(self):
+        self._thread.start()
+        port = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(10)
+        return f"http://127.0.0.1:{port}"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    url = stub.start()
+    stub.url = url
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = RemoteInferenceClient(base_url=server.url, token="secret", max_concurrency=2,
+                                   backoff_base=0.01, backoff_max=0.05, max_retries=3)
+    yield client
+    client.close()
+
+
+def test_posts_payload_with_token(server, client):
+    body, content_type = client.infer("model-a", {"inputs": "hello"}, timeout=10)
+    assert body == b'{"ok": true}'
+    assert content_type.startswith("application/json")
+    assert server.calls == [("model-a", {"inputs": "hello"}, "Bearer secret")]
+
+
+def test_retries_loading_model(server, client):
+    server.scripts["model-a"] = [(503, {"error": "loading", "estimated_time": 0.01}),
+                                 (429, {"error": "slow down"}),
+                                 (200, {"done": 1})]
+    body, _ = client.infer("model-a", {"inputs": "x"}, timeout=10)
+    assert body == b'{"done": 1}'
+    assert client.stats["retries"] == 2
+    assert client.stats["http_calls"] == 3
+
+
+def test_gives_up_after_max_retries(server, client):
+    server.scripts["model-a"] = [(503, {"error": "loading"})]
+    with pytest.raises(RemoteInferenceError) as raised:
+        client.infer("model-a", {"inputs": "x"}, timeout=10)
+    assert raised.value.status == 503
+    assert len(server.calls) == client.max_retries + 1
+
+
+def test_client_error_is_not_retried(server, client):
+    server.scripts["model-a"] = [(400, {"error": "bad input"})]
+    with pytest.raises(RemoteInferenceError) as raised:
+        client.infer("model-a", {"inputs": "x"}, timeout=10)
+    assert raised.value.status == 400
+    assert "bad input" in str(raised.value)
+    assert len(server.calls) == 1
+
+
+def test_identical_requests_are_coalesced(server, client):
+    server.delay = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.infer("model-a", {"inputs": "same"}, timeout=10)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4 and len(set(results)) == 1
+    assert len(server.calls) == 1
+    assert client.stats["coalesced"] == 3
+
+
+def test_concurrency_is_bounded(server, client):
+    server.delay = 0.1
+    threads = [threading.Thread(target=client.infer, args=("model-a", {"inputs": str(i)}), kwargs={"timeout": 10})
+               for i in range(6)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(server.calls) == 6
+    assert server.max_active <= client.max_concurrency
+    # Three rounds of two: bounded, but still concurrent
+    assert time.perf_counter() - started < 6 * server.delay
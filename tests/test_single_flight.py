@@ -0,0 +1,175 @@
+import threading
+import time
+
+import pytest
+
+from models.base_model import AIModel
+from models.single_flight import SingleFlight
+
+
+def run_together(count, target):
+    """Start count threads on target(i) and return their results by index"""
+    results = [None] * count
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target(i))) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "shared"
+
+    threading.Timer(0.2, release.set).start()
+    assert run_together(4, lambda i: flights.do("key", compute)) == ["shared"] * 4
+    assert len(calls) == 1
+    assert flights.stats() == {"leaders": 1, "shared": 3, "in_flight": 0}
+
+
+def test_error_reaches_every_caller():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("boom")
+
+    def call(i):
+        try:
+            flights.do("key", compute)
+        except ValueError as e:
+            return str(e)
+
+    threading.Timer(0.2, release.set).start()
+    assert run_together(3, call) == ["boom"] * 3
+
+
+def test_nothing_is_kept_after_completion():
+    flights = SingleFlight()
+    values = iter(["first", "second"])
+    assert flights.do("key", lambda: next(values)) == "first"
+    assert flights.do("key", lambda: next(values)) == "second"
+
+
+def test_progress_goes_to_every_caller_and_stop_needs_everyone():
+    flights = SingleFlight()
+    progress = {0: [], 1: []}
+    stops = {0: threading.Event(), 1: threading.Event()}
+    joined = threading.Event()
+
+    def compute(should_stop, on_progress):
+        joined.wait(5)
+        for step in range(200):
+            if should_stop():
+                return f"stopped at {step}"
+            on_progress(step)
+            if step == 2:
+                stops[0].set()    # one caller cancelling does not stop the shared work
+            time.sleep(0.001)
+        return "finished"
+
+    def call(i):
+        if i == 1:
+            time.sleep(0.1)
+            threading.Timer(0.1, joined.set).start()
+        return flights.do("key", compute, {"should_stop": stops[i].is_set, "on_progress": progress[i].append})
+
+    assert run_together(2, call) == ["finished", "finished"]
+    assert progress[0] == progress[1] == list(range(200))
+
+
+def test_stream_shares_pieces():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def pieces():
+        started.set()
+        for i in range(5):
+            time.sleep(0.05)
+            yield i
+
+    def call(i):
+        if i:
+            started.wait(5)
+        return list(flights.stream("key", pieces))
+
+    assert run_together(3, call) == [[0, 1, 2, 3, 4]] * 3
+    assert flights.stats()["leaders"] == 1
+
+
+def test_stream_driver_leaving_hands_over_the_generator():
+    flights = SingleFlight()
+    generated = []
+    leader_stop = threading.Event()
+    follower_joined = threading.Event()
+
+    def pieces(should_stop):
+        for i in range(10):
+            if should_stop():
+                return
+            generated.append(i)
+            yield i
+            time.sleep(0.02)
+
+    def leader():
+        received = []
+        for piece in flights.stream("key", pieces, {"should_stop": leader_stop.is_set}):
+            received.append(piece)
+            if piece == 0:
+                follower_joined.wait(5)
+            if piece == 2:
+                leader_stop.set()
+        return received
+
+    def follower():
+        time.sleep(0.05)
+        follower_joined.set()
+        return list(flights.stream("key", pieces, {"should_stop": lambda: False}))
+
+    received = run_together(2, lambda i: follower() if i else leader())
+    assert received[0] == [0, 1, 2]
+    assert received[1] == list(range(10))
+    assert generated == list(range(10))
+
+
+def test_reentrant_call_does_not_wait_on_itself():
+    flights = SingleFlight()
+    assert flights.do("key", lambda: flights.do("key", lambda: "inner")) == "inner"
+
+
+class EchoModel(AIModel):
+    def __init__(self):
+        super().__init__("Echo", "Test", "Counts its computations")
+        self.computed = 0
+
+    def load_model(self):
+        self._is_loaded = True
+
+    def process_input(self, text, on_progress=None):
+        self.computed += 1
+        time.sleep(0.2)
+        if on_progress is not None:
+            on_progress(text)
+        return text.upper()
+
+
+def test_model_methods_coalesce_on_normalized_input():
+    model = EchoModel()
+    progress = {0: [], 1: [], 2: []}
+
+    def call(i):
+        time.sleep(0.02 * i)
+        return model.process_input("hello   world " if i else "hello world", on_progress=progress[i].append)
+
+    assert run_together(3, call) == ["HELLO WORLD"] * 3
+    assert model.computed == 1
+    # Every caller's own callback was called
+    assert all(len(values) == 1 for values in progress.values())